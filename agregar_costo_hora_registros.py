@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Agregar columna costo_hora_uf a registros_horas y completarla
+
+Cada registro de horas guarda el costo hora (UF) de la persona al momento de
+registrarse, así las sumas de costo (SUM(horas * costo_hora_uf)) se calculan en
+la base de datos sin cargar la Persona de cada registro.
+
+Pasos:
+    1. Agrega la columna costo_hora_uf si no existe
+    2. Completa los registros sin costo hora con el costo vigente de cada persona
+    3. Reconstruye resumen_horas_mensual con los costos fijados
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python agregar_costo_hora_registros.py             # Simulación
+    python agregar_costo_hora_registros.py --ejecutar  # Aplica los cambios
+"""
+
+import sys
+import time
+
+from sqlalchemy import text, inspect
+
+from app import app, db
+
+
+def columna_existe():
+    columnas = inspect(db.engine).get_columns('registros_horas')
+    return any(c['name'] == 'costo_hora_uf' for c in columnas)
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print("AGREGAR costo_hora_uf A registros_horas")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        existe = columna_existe()
+        print(f"Columna costo_hora_uf: {'ya existe' if existe else 'no existe'}")
+
+        if not ejecutar:
+            print()
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            if not existe:
+                print("SQL que se ejecutará:")
+                print("  ALTER TABLE registros_horas ADD COLUMN costo_hora_uf FLOAT;")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python agregar_costo_hora_registros.py --ejecutar")
+            return
+
+        if not existe:
+            with db.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE registros_horas ADD COLUMN costo_hora_uf FLOAT"))
+            print("✓ Columna costo_hora_uf agregada")
+
+        from resumen_horas import completar_costo_hora_registros, reconstruir_resumen
+
+        inicio = time.time()
+        actualizados = completar_costo_hora_registros()
+        print(f"✓ {actualizados:,} registros con costo hora fijado ({time.time() - inicio:.1f}s)")
+
+        # Crea la tabla resumen_horas_mensual si aún no existe
+        db.create_all()
+
+        inicio = time.time()
+        filas = reconstruir_resumen()
+        print(f"✓ {filas:,} filas escritas en resumen_horas_mensual ({time.time() - inicio:.1f}s)")
+
+    print()
+    print("✅ Costo hora de registros completado")
+
+
+if __name__ == '__main__':
+    main()
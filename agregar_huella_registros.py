@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Agregar columna huella (con índice único) a registros_horas y completarla
+
+Las importaciones de horas insertan con ON CONFLICT (huella) DO NOTHING (ver
+motor_importacion.py): reimportar un archivo no duplica horas y no hace falta
+una consulta por fila para detectar duplicados.
+
+Pasos:
+    1. Agrega la columna huella si no existe
+    2. Calcula la huella de los registros existentes (clave natural: persona,
+       fecha, cliente, servicio, tarea, horas y notas)
+    3. Registros idénticos a otro anterior quedan sin huella y se informan;
+       con --eliminar-duplicados se eliminan
+    4. Crea el índice único ux_registros_horas_huella
+    5. Reconstruye resumen_horas_mensual si se eliminaron duplicados
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python agregar_huella_registros.py                                  # Simulación
+    python agregar_huella_registros.py --ejecutar                       # Aplica los cambios
+    python agregar_huella_registros.py --ejecutar --eliminar-duplicados
+"""
+
+import sys
+import time
+
+from sqlalchemy import text, inspect, update
+
+from app import app, db, RegistroHora
+from motor_importacion import huella_registro
+
+TAMAÑO_LOTE = 5000
+
+
+def columna_existe():
+    columnas = inspect(db.engine).get_columns('registros_horas')
+    return any(c['name'] == 'huella' for c in columnas)
+
+
+def calcular_huellas(con_columna):
+    """
+    Huellas de los registros sin huella, en orden de id.
+
+    Returns:
+        tuple: (cambios [{'id', 'huella'}], duplicados [(id, id_original)])
+    """
+    vistas = {}
+    if con_columna:
+        vistas = dict(
+            db.session.query(RegistroHora.huella, RegistroHora.id)
+            .filter(RegistroHora.huella.isnot(None)).all()
+        )
+
+    query = db.session.query(
+        RegistroHora.id, RegistroHora.persona_id, RegistroHora.fecha, RegistroHora.cliente_id,
+        RegistroHora.servicio_id, RegistroHora.tarea_id, RegistroHora.horas, RegistroHora.descripcion
+    ).order_by(RegistroHora.id)
+    if con_columna:
+        query = query.filter(RegistroHora.huella.is_(None))
+
+    cambios = []
+    duplicados = []
+    for registro_id, *clave in query.yield_per(TAMAÑO_LOTE):
+        huella = huella_registro(*clave)
+        if huella in vistas:
+            duplicados.append((registro_id, vistas[huella]))
+        else:
+            vistas[huella] = registro_id
+            cambios.append({'id': registro_id, 'huella': huella})
+
+    return cambios, duplicados
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+    eliminar_duplicados = '--eliminar-duplicados' in sys.argv
+
+    print("=" * 80)
+    print("AGREGAR huella A registros_horas")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        existe = columna_existe()
+        print(f"Columna huella: {'ya existe' if existe else 'no existe'}")
+
+        inicio = time.time()
+        cambios, duplicados = calcular_huellas(existe)
+        print(f"Registros sin huella: {len(cambios) + len(duplicados):,} ({time.time() - inicio:.1f}s)")
+        print(f"Registros duplicados (idénticos a uno anterior): {len(duplicados):,}")
+        for registro_id, original_id in duplicados[:20]:
+            print(f"  - Registro {registro_id} = registro {original_id}")
+        if len(duplicados) > 20:
+            print(f"  ... y {len(duplicados) - 20} más")
+
+        if not ejecutar:
+            print()
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print("SQL que se ejecutará:")
+            if not existe:
+                print("  ALTER TABLE registros_horas ADD COLUMN huella VARCHAR(64);")
+            print("  CREATE UNIQUE INDEX IF NOT EXISTS ux_registros_horas_huella ON registros_horas (huella);")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python agregar_huella_registros.py --ejecutar [--eliminar-duplicados]")
+            return
+
+        if not existe:
+            with db.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE registros_horas ADD COLUMN huella VARCHAR(64)"))
+            print("✓ Columna huella agregada")
+
+        for i in range(0, len(cambios), TAMAÑO_LOTE):
+            db.session.execute(update(RegistroHora), cambios[i:i + TAMAÑO_LOTE])
+        db.session.commit()
+        print(f"✓ {len(cambios):,} registros con huella")
+
+        if duplicados and eliminar_duplicados:
+            ids = [registro_id for registro_id, _ in duplicados]
+            for i in range(0, len(ids), TAMAÑO_LOTE):
+                RegistroHora.query.filter(
+                    RegistroHora.id.in_(ids[i:i + TAMAÑO_LOTE])
+                ).delete(synchronize_session=False)
+            db.session.commit()
+            print(f"✓ {len(ids):,} registros duplicados eliminados")
+
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ux_registros_horas_huella ON registros_horas (huella)"
+            ))
+        print("✓ Índice único ux_registros_horas_huella creado")
+
+        if duplicados and eliminar_duplicados:
+            from resumen_horas import reconstruir_resumen
+
+            filas = reconstruir_resumen()
+            print(f"✓ {filas:,} filas escritas en resumen_horas_mensual")
+
+    print()
+    print("✅ Huellas de registros completadas")
+
+
+if __name__ == '__main__':
+    main()
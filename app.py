@@ -1,13 +1,25 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, extract
+from sqlalchemy import Float, Numeric, case, cast, event, func, select
+from sqlalchemy.ext.hybrid import hybrid_property
 from functools import wraps
+from collections import defaultdict
 import hashlib
 import os
+import sys
+
+from periodos import filtro_periodo, rango_ultimos_meses
+from calendario import horas_disponibles_mes, dias_habiles_mes
+from cache_resultados import resultado_en_cache, respuesta_condicional
+from instrumentacion import instrumentar
 
 app = Flask(__name__)
 
+# Al ejecutar `python app.py` este módulo se llama __main__; se registra también
+# como `app` para que los módulos auxiliares (from app import ...) usen la misma instancia
+sys.modules.setdefault('app', sys.modules[__name__])
+
 # Usar PostgreSQL en producción (Render) y SQLite en desarrollo
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
@@ -25,6 +37,9 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'comsulting-secret-key-2
 
 db = SQLAlchemy(app)
 
+# Consultas SQL y tiempos por request: encabezado Server-Timing, log y /admin/perf
+instrumentar(app)
+
 # Agregar funciones min y max a Jinja2
 app.jinja_env.globals.update(min=min, max=max)
 
@@ -47,81 +62,77 @@ def formato_numero_filter(valor, decimales=1):
 HORAS_EFECTIVAS_MES = 156
 VALOR_UF_ACTUAL = 38000  # Actualizar según valor real
 
+
+def calcular_costo_hora_uf(costo_mensual_empresa, valor_uf=None):
+    """
+    Convierte un costo mensual empresa (pesos) a costo por hora en UF.
+    Sin valor_uf usa VALOR_UF_ACTUAL (ver costos.py para el valor UF vigente por fecha)
+    """
+    if not costo_mensual_empresa or costo_mensual_empresa <= 0:
+        return 0
+    costo_hora_pesos = costo_mensual_empresa / HORAS_EFECTIVAS_MES
+    return round(costo_hora_pesos / (valor_uf or VALOR_UF_ACTUAL), 4)
+
+
 def calcular_horas_disponibles_mes(año, mes):
     """
     Calcula las horas disponibles en un mes según días hábiles
     L-J: 9 horas/día
     V: 8 horas/día
     """
-    import calendar
-    from datetime import date
+    return horas_disponibles_mes(año, mes, 'completa')
 
-    # Obtener todos los días del mes
-    _, ultimo_dia = calendar.monthrange(año, mes)
 
-    horas_totales = 0
-    for dia in range(1, ultimo_dia + 1):
-        fecha = date(año, mes, dia)
-        dia_semana = fecha.weekday()  # 0=Lunes, 6=Domingo
-
-        if dia_semana < 4:  # Lunes a Jueves (0-3)
-            horas_totales += 9
-        elif dia_semana == 4:  # Viernes (4)
-            horas_totales += 8
-        # Sábado y Domingo no se cuentan (5-6)
-
-    return horas_totales
-
-
-def proyeccion_anual_servicio_ajustada(servicio, año):
+def calcular_horas_no_imputadas(año, mes=None):
     """
-    Calcula la proyección anual de un servicio considerando cambios históricos.
+    Calcula las horas no imputadas (gap) de las personas activas y su costo en UF.
 
-    Si el servicio tuvo cambios de valor durante el año, la proyección se ajusta:
-    - Ene-Sep con valor 100 UF = 900 UF
-    - Oct-Dic con valor 200 UF = 600 UF
-    - Proyección total = 1,500 UF (no 100×12 = 1,200 UF)
-
-    Args:
-        servicio: Objeto ServicioCliente
-        año: Año para calcular la proyección
+    Gap de cada persona y mes = max(0, horas disponibles del mes - horas registradas).
+    Las horas registradas salen de una sola consulta agrupada (persona, mes) y el
+    gap se calcula en una pasada sobre la matriz personas × meses. Cada mes de gap
+    se valoriza con la tarifa y el valor UF vigentes en ese mes (ver costos.py).
 
     Returns:
-        float: Proyección anual ajustada en UF
+        tuple: (horas_no_imputadas, costo_no_imputadas_uf)
     """
-    from sqlalchemy import extract
+    from costos import costos_mensuales_uf
 
-    # Obtener cambios históricos del año ordenados por fecha
-    cambios = HistoricoServicio.query.filter_by(
-        servicio_cliente_id=servicio.id
-    ).filter(
-        extract('year', HistoricoServicio.fecha_cambio) == año
-    ).order_by(HistoricoServicio.fecha_cambio).all()
-
-    if not cambios:
-        # No hay cambios, usar valor actual × 12 meses
-        return servicio.valor_mensual_uf * 12
-
-    proyeccion = 0
-    mes_inicio = 1
-    valor_actual = cambios[0].valor_anterior_uf  # Comenzar con el primer valor del año
+    personas_activas = Persona.query.filter_by(activo=True).all()
 
-    for cambio in cambios:
-        mes_cambio = cambio.fecha_cambio.month
+    meses = [mes] if mes else list(range(1, 13))
+    horas_disponibles = [horas_disponibles_mes(año, m) for m in meses]
 
-        # Proyectar con valor anterior hasta el mes del cambio
-        meses_con_valor_anterior = mes_cambio - mes_inicio
-        proyeccion += valor_actual * meses_con_valor_anterior
+    query = db.session.query(
+        ResumenHorasMensual.persona_id,
+        ResumenHorasMensual.mes,
+        func.sum(ResumenHorasMensual.horas)
+    ).filter(ResumenHorasMensual.año == año)
+    if mes:
+        query = query.filter(ResumenHorasMensual.mes == mes)
 
-        # Actualizar para siguiente iteración
-        mes_inicio = mes_cambio
-        valor_actual = cambio.valor_nuevo_uf
+    horas_registradas = {
+        (persona_id, int(mes_val)): horas or 0
+        for persona_id, mes_val, horas in query.group_by(
+            ResumenHorasMensual.persona_id, ResumenHorasMensual.mes
+        ).all()
+    }
 
-    # Proyectar resto del año con valor actual
-    meses_restantes = 13 - mes_inicio  # 13 porque queremos de mes_inicio hasta diciembre inclusive
-    proyeccion += valor_actual * meses_restantes
+    # Filas: personas, columnas: meses
+    gaps = [
+        [max(0, disponibles - horas_registradas.get((persona.id, m), 0))
+         for m, disponibles in zip(meses, horas_disponibles)]
+        for persona in personas_activas
+    ]
+
+    costos_mes = costos_mensuales_uf([persona.id for persona in personas_activas], año, mes)
+    horas_total = sum(sum(fila) for fila in gaps)
+    costo_total = sum(
+        horas * costos_mes[(persona.id, m)] / HORAS_EFECTIVAS_MES
+        for fila, persona in zip(gaps, personas_activas)
+        for horas, m in zip(fila, meses)
+    )
 
-    return proyeccion
+    return horas_total, costo_total
 
 
 def calcular_overhead_distribuido(año, mes=None):
@@ -143,7 +154,8 @@ def calcular_overhead_distribuido(año, mes=None):
             'overhead_total_uf': float,
             'overhead_operacional_pesos': float,
             'overhead_horas_no_imputadas_uf': float,
-            'total_horas_asignadas': float,
+            'horas_no_imputadas': float,
+            'total_ingresos': float,
             'distribucion_por_cliente': {cliente_id: overhead_uf}
         }
     """
@@ -156,47 +168,8 @@ def calcular_overhead_distribuido(año, mes=None):
     total_overhead_pesos = sum(g.monto_pesos for g in gastos_overhead)
     overhead_operacional_uf = total_overhead_pesos / VALOR_UF_ACTUAL
 
-    # 2. Calcular costo de horas no imputadas (OPTIMIZADO: 1 query en lugar de 456)
-    personas_activas = Persona.query.filter_by(activo=True).all()
-    personas_dict = {p.id: p for p in personas_activas}
-
-    # Query agregada: obtener suma de horas por persona y mes en UNA SOLA CONSULTA
-    query_horas_agregadas = db.session.query(
-        RegistroHora.persona_id,
-        extract('month', RegistroHora.fecha).label('mes'),
-        func.sum(RegistroHora.horas).label('total_horas')
-    ).filter(
-        extract('year', RegistroHora.fecha) == año
-    )
-
-    if mes:
-        query_horas_agregadas = query_horas_agregadas.filter(extract('month', RegistroHora.fecha) == mes)
-
-    query_horas_agregadas = query_horas_agregadas.group_by(
-        RegistroHora.persona_id,
-        extract('month', RegistroHora.fecha)
-    )
-
-    # Diccionario: {persona_id: {mes: horas}}
-    horas_por_persona_mes = {}
-    for persona_id, mes_val, total_horas in query_horas_agregadas.all():
-        if persona_id not in horas_por_persona_mes:
-            horas_por_persona_mes[persona_id] = {}
-        horas_por_persona_mes[persona_id][int(mes_val)] = total_horas
-
-    # Calcular gaps
-    costo_horas_no_imputadas_uf = 0
-    meses_a_calcular = [mes] if mes else range(1, 13)
-
-    for mes_iter in meses_a_calcular:
-        horas_disponibles_mes = calcular_horas_disponibles_mes(año, mes_iter)
-
-        for persona in personas_activas:
-            horas_registradas = horas_por_persona_mes.get(persona.id, {}).get(mes_iter, 0)
-            horas_gap = max(0, horas_disponibles_mes - horas_registradas)
-
-            if horas_gap > 0:
-                costo_horas_no_imputadas_uf += horas_gap * persona.costo_hora_uf
+    # 2. Calcular costo de horas no imputadas (gap de cada persona)
+    horas_no_imputadas, costo_horas_no_imputadas_uf = calcular_horas_no_imputadas(año, mes)
 
     # 3. Overhead total
     overhead_total_uf = overhead_operacional_uf + costo_horas_no_imputadas_uf
@@ -207,7 +180,7 @@ def calcular_overhead_distribuido(año, mes=None):
         ServicioCliente.cliente_id,
         func.sum(IngresoMensual.ingreso_uf).label('total_ingresos')
     ).join(
-        IngresoMensual, ServicioCliente.id == IngresoMensual.servicio_cliente_id
+        IngresoMensual, ServicioCliente.id == IngresoMensual.servicio_id
     ).filter(
         IngresoMensual.año == año
     )
@@ -248,11 +221,27 @@ def calcular_overhead_distribuido(año, mes=None):
         'overhead_operacional_pesos': round(total_overhead_pesos, 2),
         'overhead_operacional_uf': round(overhead_operacional_uf, 2),
         'overhead_horas_no_imputadas_uf': round(costo_horas_no_imputadas_uf, 2),
+        'horas_no_imputadas': round(horas_no_imputadas, 2),
         'total_ingresos': round(total_ingresos, 2),  # Cambio: era total_horas_asignadas
         'distribucion_por_cliente': distribucion_por_cliente
     }
 
 
+# ============= CACHÉ DE RESULTADOS =============
+# Tablas que alimentan el overhead y los reportes de rentabilidad: el resultado
+# en caché se invalida cuando cambia la versión de alguna (ver cache_resultados.py)
+TABLAS_RENTABILIDAD = (
+    'registros_horas', 'resumen_horas_mensual', 'ingresos_mensuales', 'gastos_overhead',
+    'personas', 'tarifas_personas', 'valores_uf', 'clientes', 'servicios_cliente'
+)
+
+
+@resultado_en_cache(*TABLAS_RENTABILIDAD)
+def obtener_overhead_distribuido(año, mes=None):
+    """calcular_overhead_distribuido() en caché por (año, mes)"""
+    return calcular_overhead_distribuido(año, mes)
+
+
 # ============= MODELOS SIMPLIFICADOS =============
 
 class Persona(db.Model):
@@ -288,10 +277,7 @@ class Persona(db.Model):
     @property
     def costo_hora_uf(self):
         """Calcula costo por hora en UF"""
-        if self.costo_mensual_empresa <= 0:
-            return 0
-        costo_hora_pesos = self.costo_mensual_empresa / HORAS_EFECTIVAS_MES
-        return round(costo_hora_pesos / VALOR_UF_ACTUAL, 4)
+        return calcular_costo_hora_uf(self.costo_mensual_empresa)
 
     def verificar_password(self, password):
         """Verifica la contraseña"""
@@ -303,7 +289,8 @@ class Persona(db.Model):
 
         Reglas:
         1. Admin (es_admin=True) → Ve TODO
-        2. Socios/Directores → Solo ven a sus reportes DIRECTOS
+        2. Socios/Directores → Ven a todas las personas bajo ellos en el
+           organigrama, a cualquier profundidad (ver jerarquia.py)
         3. Resto → Solo ven su propia información
         """
         # Admin ve todo
@@ -314,29 +301,30 @@ class Persona(db.Model):
         if self.id == otra_persona_id:
             return True
 
-        # Puede ver a sus subordinados directos
-        subordinado_ids = [s.id for s in self.subordinados]
-        if otra_persona_id in subordinado_ids:
-            return True
-
-        return False
+        from jerarquia import personas_visibles
+        return otra_persona_id in personas_visibles(self)
 
     def obtener_personas_visibles(self):
         """
         Retorna lista de IDs de personas que este usuario puede ver
 
         Returns:
-            list: IDs de personas visibles para este usuario
+            list: IDs de personas visibles para este usuario (ella + personas activas bajo ella)
         """
-        if self.es_admin:
-            # Admin ve a todos
-            return [p.id for p in Persona.query.filter_by(activo=True).all()]
+        from jerarquia import personas_visibles
+        return [
+            persona_id for persona_id, activo in personas_visibles(self).items()
+            if activo or persona_id == self.id
+        ]
 
-        # Ve a sí mismo + subordinados directos
-        ids_visibles = [self.id]
-        ids_visibles.extend([s.id for s in self.subordinados if s.activo])
+    def filtro_personas_visibles(self, columna):
+        """
+        Condición SQL para filtrar por las personas visibles de este usuario
 
-        return ids_visibles
+        Ej: RegistroHora.query.filter(persona.filtro_personas_visibles(RegistroHora.persona_id))
+        """
+        from jerarquia import filtro_visibles
+        return filtro_visibles(self, columna)
 
     def __repr__(self):
         return f'<Persona {self.nombre}>'
@@ -455,6 +443,30 @@ class IngresoMensual(db.Model):
         return f'<IngresoMensual {self.año}-{self.mes:02d} - {self.ingreso_uf} UF>'
 
 
+class IngresoProyectadoArea(db.Model):
+    """
+    Ingreso mensual proyectado por área (facturación por área, desde Excel).
+
+    Cada fila rige desde su año hasta el siguiente año cargado del área; el
+    primer año cargado rige también para los años anteriores
+    """
+    __tablename__ = 'ingresos_proyectados_area'
+    __table_args__ = (
+        db.UniqueConstraint('area_id', 'año', name='uq_ingreso_proyectado_area_año'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    area_id = db.Column(db.Integer, db.ForeignKey('areas.id'), nullable=False)
+    año = db.Column(db.Integer, nullable=False)
+    ingreso_mensual_uf = db.Column(db.Float, nullable=False, default=0)
+
+    # Relaciones
+    area = db.relationship('Area')
+
+    def __repr__(self):
+        return f'<IngresoProyectadoArea area={self.area_id} {self.año}: {self.ingreso_mensual_uf} UF/mes>'
+
+
 class HistoricoServicio(db.Model):
     """Histórico de cambios en el valor de los servicios"""
     __tablename__ = 'historico_servicios'
@@ -482,6 +494,17 @@ class HistoricoServicio(db.Model):
 class RegistroHora(db.Model):
     """Registro de horas trabajadas por persona"""
     __tablename__ = 'registros_horas'
+    __table_args__ = (
+        # Índices compuestos para filtros por rango de fecha (ver periodos.py)
+        db.Index('ix_registros_horas_persona_fecha', 'persona_id', 'fecha'),
+        db.Index('ix_registros_horas_cliente_fecha', 'cliente_id', 'fecha'),
+        db.Index('ix_registros_horas_servicio_fecha', 'servicio_id', 'fecha'),
+        db.Index('ix_registros_horas_area_fecha', 'area_id', 'fecha'),
+        # Listado paginado de mis horas (ORDER BY fecha DESC, id DESC, ver paginacion.py)
+        db.Index('ix_registros_horas_fecha_id', 'fecha', 'id'),
+        # Huella de origen única: las importaciones usan ON CONFLICT DO NOTHING
+        db.Index('ux_registros_horas_huella', 'huella', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     persona_id = db.Column(db.Integer, db.ForeignKey('personas.id'), nullable=False)
@@ -499,6 +522,15 @@ class RegistroHora(db.Model):
     horas = db.Column(db.Float, nullable=False)
     descripcion = db.Column(db.Text)  # Opcional
 
+    # Costo hora (UF) vigente a la fecha del registro (tarifa de la persona y valor UF):
+    # se fija en el flush (ver resumen_horas.py y costos.py) para que los costos
+    # se sumen en SQL sin cargar Persona
+    costo_hora_uf = db.Column(db.Float)
+
+    # Huella del registro importado (ver motor_importacion.huella_registro);
+    # NULL en los registros ingresados desde la aplicación
+    huella = db.Column(db.String(64))
+
     # Relaciones
     persona = db.relationship('Persona', back_populates='registros_horas')
     area = db.relationship('Area', back_populates='registros_horas')
@@ -507,10 +539,39 @@ class RegistroHora(db.Model):
     cliente = db.relationship('Cliente', back_populates='registros_horas')
     servicio_cliente = db.relationship('ServicioCliente', backref='registros_horas')
 
-    @property
+    @hybrid_property
     def costo_uf(self):
-        """Calcula el costo en UF de este registro"""
-        return round(self.horas * self.persona.costo_hora_uf, 4)
+        """
+        Calcula el costo en UF de este registro.
+
+        Sin costo_hora_uf fijado (registros cargados con SQL directo o COPY que
+        aún no pasan por asignar_costos_hora) usa el costo hora actual de la
+        persona, igual que la expresión SQL.
+        """
+        costo_hora = self.costo_hora_uf if self.costo_hora_uf is not None else self.persona.costo_hora_uf
+        return round(self.horas * costo_hora, 4)
+
+    @costo_uf.expression
+    def costo_uf(cls):
+        """
+        Costo en UF calculable en SQL: func.sum(RegistroHora.costo_uf)
+
+        Sin costo_hora_uf usa Persona.costo_hora_uf (subconsulta correlacionada,
+        solo se evalúa en esas filas), así las sumas y el costo de cada registro coinciden.
+        """
+        persona = Persona.__table__.alias('persona_costo')
+        costo_persona = (
+            select(case(
+                (persona.c.costo_mensual_empresa > 0,
+                 cast(func.round(cast(persona.c.costo_mensual_empresa / HORAS_EFECTIVAS_MES / VALOR_UF_ACTUAL,
+                                      Numeric), 4), Float)),
+                else_=0.0
+            ))
+            .where(persona.c.id == cls.persona_id)
+            .correlate_except(persona)
+            .scalar_subquery()
+        )
+        return cls.horas * func.coalesce(cls.costo_hora_uf, costo_persona)
 
     def __repr__(self):
         return f'<RegistroHora {self.persona.nombre} - {self.horas}h>'
@@ -567,6 +628,197 @@ class GastoOverhead(db.Model):
         return f'<GastoOverhead {self.año}/{self.mes} - {self.concepto}>'
 
 
+class TarifaPersona(db.Model):
+    """
+    Costo mensual empresa de una persona con fecha de vigencia.
+
+    Cada tarifa rige desde vigente_desde hasta la siguiente tarifa de la persona;
+    la primera tarifa rige también para las fechas anteriores (ver costos.py)
+    """
+    __tablename__ = 'tarifas_personas'
+    __table_args__ = (
+        db.UniqueConstraint('persona_id', 'vigente_desde', name='uq_tarifa_persona_vigencia'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    persona_id = db.Column(db.Integer, db.ForeignKey('personas.id'), nullable=False)
+    vigente_desde = db.Column(db.Date, nullable=False)
+    costo_mensual_empresa = db.Column(db.Float, nullable=False)  # Pesos
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+    # Relaciones
+    persona = db.relationship('Persona', backref=db.backref('tarifas', order_by='TarifaPersona.vigente_desde'))
+
+    def __repr__(self):
+        return f'<TarifaPersona persona={self.persona_id} desde {self.vigente_desde}: ${self.costo_mensual_empresa:,.0f}>'
+
+
+class ValorUF(db.Model):
+    """Valor de la UF en pesos (diario o mensual); rige hasta el siguiente valor registrado"""
+    __tablename__ = 'valores_uf'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False, unique=True)
+    valor = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<ValorUF {self.fecha}: ${self.valor:,.2f}>'
+
+
+class VersionTabla(db.Model):
+    """
+    Contador de cambios por tabla. Se incrementa en la misma transacción que
+    cada escritura (ver versiones.py) y se usa para invalidar cachés de reportes
+    """
+    __tablename__ = 'versiones_tablas'
+
+    tabla = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    actualizado = db.Column(db.DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f'<VersionTabla {self.tabla} v{self.version}>'
+
+
+class ConsultaLenta(db.Model):
+    """
+    Consulta SQL lenta capturada con su plan (ver consultas_lentas.py). Se
+    guardan solo las últimas CONSULTAS_LENTAS_GUARDADAS (buffer circular)
+    """
+    __tablename__ = 'consultas_lentas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    duracion_ms = db.Column(db.Float, nullable=False)
+    sentencia = db.Column(db.Text, nullable=False)
+    parametros = db.Column(db.Text)
+    metodo = db.Column(db.String(10))
+    ruta = db.Column(db.String(500))
+    endpoint = db.Column(db.String(100))
+    plan = db.Column(db.Text)  # EXPLAIN (ANALYZE, BUFFERS) o EXPLAIN QUERY PLAN
+
+    def __repr__(self):
+        return f'<ConsultaLenta {self.endpoint} {self.duracion_ms:.0f} ms>'
+
+
+class ResumenHorasMensual(db.Model):
+    """
+    Resumen mensual pre-agregado de registros_horas
+    (persona × cliente × servicio × área × mes).
+
+    Se mantiene incrementalmente en cada flush que toca RegistroHora
+    (ver resumen_horas.py) y se puede reconstruir con reconstruir_resumen_horas.py
+    """
+    __tablename__ = 'resumen_horas_mensual'
+    __table_args__ = (
+        db.UniqueConstraint('persona_id', 'cliente_id', 'servicio_id', 'area_id', 'año', 'mes',
+                            name='uq_resumen_horas_mensual'),
+        db.Index('ix_resumen_horas_mensual_periodo', 'año', 'mes'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    persona_id = db.Column(db.Integer, db.ForeignKey('personas.id'), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=True)
+    servicio_id = db.Column(db.Integer, db.ForeignKey('servicios.id'), nullable=False)
+    area_id = db.Column(db.Integer, db.ForeignKey('areas.id'), nullable=False)
+
+    año = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)  # 1-12
+
+    horas = db.Column(db.Float, nullable=False, default=0)
+    costo_uf = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumenHorasMensual {self.año}-{self.mes:02d} persona={self.persona_id} - {self.horas}h>'
+
+
+class EstadisticaDashboard(db.Model):
+    """
+    Indicadores del dashboard precalculados (ver estadisticas_dashboard.py).
+
+    Clave (persona_id, año, mes):
+        - persona_id = 0: toda la empresa (ingresos)
+        - mes = 0: total del año
+        - (0, 0, 0): dotación vigente (personas activas y su costo mensual)
+
+    Se mantiene en el mismo flush que las horas, ingresos y personas.
+    """
+    __tablename__ = 'estadisticas_dashboard'
+
+    persona_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    año = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    mes = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    horas = db.Column(db.Float, nullable=False, default=0)
+    ingresos_uf = db.Column(db.Float, nullable=False, default=0)
+    personas_activas = db.Column(db.Integer, nullable=False, default=0)
+    costo_mensual_pesos = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<EstadisticaDashboard persona={self.persona_id} {self.año}-{self.mes:02d}>'
+
+
+class JerarquiaPersona(db.Model):
+    """
+    Tabla de clausura del organigrama (ver jerarquia.py): una fila por cada
+    persona y cada una de las personas sobre ella, incluida ella misma
+    (profundidad 0). Se mantiene en el flush que cambia reporte_a_id
+    """
+    __tablename__ = 'jerarquia_personas'
+    __table_args__ = (
+        db.Index('ix_jerarquia_personas_descendiente', 'descendiente_id'),
+    )
+
+    # ON DELETE CASCADE: el DELETE de la persona ocurre antes del after_flush que limpia la tabla
+    ancestro_id = db.Column(db.Integer, db.ForeignKey('personas.id', ondelete='CASCADE'),
+                            primary_key=True, autoincrement=False)
+    descendiente_id = db.Column(db.Integer, db.ForeignKey('personas.id', ondelete='CASCADE'),
+                                primary_key=True, autoincrement=False)
+    profundidad = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<JerarquiaPersona {self.ancestro_id} → {self.descendiente_id} ({self.profundidad})>'
+
+
+@event.listens_for(db.session, 'before_flush')
+def actualizar_resumen_horas(session, flush_context, instances):
+    """Propaga altas, cambios y bajas de horas al resumen mensual y al dashboard"""
+    from resumen_horas import aplicar_cambios_sesion
+    from estadisticas_dashboard import aplicar_cambios_dashboard
+    deltas_horas = aplicar_cambios_sesion(session)
+    aplicar_cambios_dashboard(session, deltas_horas)
+
+
+@event.listens_for(db.session, 'after_flush')
+def actualizar_jerarquia(session, flush_context):
+    """Propaga altas, bajas y cambios de jefe de personas a la tabla de clausura"""
+    from jerarquia import aplicar_cambios_jerarquia
+    aplicar_cambios_jerarquia(session)
+
+
+@event.listens_for(db.session, 'after_flush')
+def registrar_versiones_tablas(session, flush_context):
+    """Incrementa la versión de las tablas escritas en el flush (misma transacción)"""
+    from versiones import tablas_modificadas, incrementar_versiones
+    from usuario_actual import claves_permisos_modificadas
+    tablas = tablas_modificadas(session) | claves_permisos_modificadas(session)
+    if tablas:
+        incrementar_versiones(session.connection(), tablas)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def registrar_versiones_masivas(estado):
+    """Incrementa la versión en INSERT/UPDATE/DELETE masivos (query.delete(), update(Modelo)...)"""
+    if (estado.is_insert or estado.is_update or estado.is_delete) and estado.bind_mapper is not None:
+        from versiones import incrementar_versiones
+        tablas = {estado.bind_mapper.local_table.name}
+        if estado.bind_mapper.class_ is Persona:
+            # Persona.query.update({...}) puede cambiar roles de cualquiera (ver usuario_actual.py)
+            from usuario_actual import CLAVE_PERMISOS
+            tablas.add(CLAVE_PERMISOS)
+        incrementar_versiones(estado.session.connection(), tablas)
+
+
 # ============= DECORADORES DE AUTENTICACIÓN =============
 
 def login_required(f):
@@ -586,8 +838,9 @@ def admin_required(f):
         if 'user_id' not in session:
             return redirect(url_for('login', next=request.url))
 
-        persona = Persona.query.get(session['user_id'])
-        if not persona or not persona.es_admin:
+        from usuario_actual import permisos_actuales
+        permisos = permisos_actuales()
+        if not permisos or not permisos['es_admin']:
             flash('Acceso denegado. Solo administradores pueden ver esta información.', 'error')
             return redirect(url_for('dashboard'))
 
@@ -602,8 +855,9 @@ def socia_required(f):
         if 'user_id' not in session:
             return redirect(url_for('login', next=request.url))
 
-        persona = Persona.query.get(session['user_id'])
-        if not persona or not persona.es_socia:
+        from usuario_actual import permisos_actuales
+        permisos = permisos_actuales()
+        if not permisos or not permisos['es_socia']:
             flash('Acceso denegado. Solo socias pueden ver esta información.', 'error')
             return redirect(url_for('dashboard'))
 
@@ -611,6 +865,24 @@ def socia_required(f):
     return decorated_function
 
 
+def api_socia_required(f):
+    """
+    Requiere socia o admin en una API JSON: 403 en JSON en lugar de redirigir.
+
+    Va antes de @respuesta_condicional, así quien perdió el rol recibe 403 y no
+    un 304 con un ETag que guardó antes.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from usuario_actual import permisos_actuales
+        permisos = permisos_actuales()
+        if not permisos or not (permisos['es_socia'] or permisos['es_admin']):
+            return jsonify({'error': 'No autorizado'}), 403
+
+        return f(*args, **kwargs)
+    return decorated_function
+
+
 def puede_ver_persona_required(persona_id_param='persona_id'):
     """
     Verifica que el usuario tenga permisos para ver a otra persona
@@ -624,10 +896,11 @@ def puede_ver_persona_required(persona_id_param='persona_id'):
             if 'user_id' not in session:
                 return redirect(url_for('login', next=request.url))
 
-            persona_actual = Persona.query.get(session['user_id'])
-            if not persona_actual:
+            from usuario_actual import permisos_actuales, puede_ver
+            permisos = permisos_actuales()
+            if not permisos:
                 flash('Usuario no encontrado', 'error')
-                return redirect(url_for('dashboard'))
+                return redirect(url_for('login'))
 
             # Obtener el ID de la persona que se quiere ver
             persona_objetivo_id = kwargs.get(persona_id_param) or request.args.get(persona_id_param) or request.form.get(persona_id_param)
@@ -635,7 +908,7 @@ def puede_ver_persona_required(persona_id_param='persona_id'):
             if persona_objetivo_id:
                 try:
                     persona_objetivo_id = int(persona_objetivo_id)
-                    if not persona_actual.puede_ver_persona(persona_objetivo_id):
+                    if not puede_ver(permisos, persona_objetivo_id):
                         flash('No tienes permisos para ver esta información', 'error')
                         return redirect(url_for('dashboard'))
                 except ValueError:
@@ -659,10 +932,8 @@ def login():
         persona = Persona.query.filter_by(email=email, activo=True).first()
 
         if persona and persona.verificar_password(password):
-            session['user_id'] = persona.id
-            session['user_name'] = persona.nombre
-            session['es_socia'] = persona.es_socia
-            session['es_admin'] = persona.es_admin
+            from usuario_actual import iniciar_sesion
+            iniciar_sesion(persona)
 
             flash(f'¡Bienvenida {persona.nombre}!', 'success')
             next_page = request.args.get('next')
@@ -685,8 +956,8 @@ def logout():
 @login_required
 def cambiar_password():
     """Cambiar contraseña del usuario actual"""
-    persona_id = session.get('user_id')
-    persona = Persona.query.get(persona_id)
+    from usuario_actual import usuario_actual
+    persona = usuario_actual()
 
     if request.method == 'POST':
         password_actual = request.form.get('password_actual')
@@ -734,46 +1005,29 @@ def index():
 @login_required
 def dashboard():
     """Dashboard principal - todos pueden ver su información"""
-    persona_id = session.get('user_id')
-    es_socia = session.get('es_socia', False)
+    from usuario_actual import usuario_actual
+    persona = usuario_actual()
+    persona_id = persona.id
+    es_socia = persona.es_socia
 
-    persona = Persona.query.get(persona_id)
+    # Indicadores precalculados (ver estadisticas_dashboard.py): una lectura por clave primaria
+    from estadisticas_dashboard import leer_estadisticas
 
-    # Obtener estadísticas personales (todos pueden ver)
     año_actual = datetime.now().year
     mes_actual = datetime.now().month
+    estadisticas = leer_estadisticas(persona_id, año_actual, mes_actual, empresa=es_socia)
 
-    # Horas del mes actual
-    horas_mes = db.session.query(func.sum(RegistroHora.horas)).filter(
-        RegistroHora.persona_id == persona_id,
-        extract('year', RegistroHora.fecha) == año_actual,
-        extract('month', RegistroHora.fecha) == mes_actual
-    ).scalar() or 0
-
-    # Horas del año
-    horas_año = db.session.query(func.sum(RegistroHora.horas)).filter(
-        RegistroHora.persona_id == persona_id,
-        extract('year', RegistroHora.fecha) == año_actual
-    ).scalar() or 0
+    horas_mes = estadisticas['horas_mes']
+    horas_año = estadisticas['horas_año']
 
     # Si es socia, mostrar información completa
     stats_empresa = None
     if es_socia:
-        # Ingresos totales del mes actual
-        ingresos_mes = db.session.query(func.sum(IngresoMensual.ingreso_uf)).filter(
-            IngresoMensual.año == año_actual,
-            IngresoMensual.mes == mes_actual
-        ).scalar() or 0
-
-        # Ingresos totales del año
-        ingresos_año = db.session.query(func.sum(IngresoMensual.ingreso_uf)).filter(
-            IngresoMensual.año == año_actual
-        ).scalar() or 0
+        ingresos_mes = estadisticas['ingresos_mes']
+        ingresos_año = estadisticas['ingresos_año']
 
         # Costos totales del mes (todas las personas activas)
-        personas_activas = Persona.query.filter_by(activo=True).all()
-        costo_mensual_total_pesos = sum(p.costo_mensual_empresa for p in personas_activas)
-        costo_mensual_total_uf = costo_mensual_total_pesos / VALOR_UF_ACTUAL
+        costo_mensual_total_uf = estadisticas['costo_mensual_pesos'] / VALOR_UF_ACTUAL
 
         # Costos del año (costo mensual × meses transcurridos)
         costo_año_uf = costo_mensual_total_uf * mes_actual
@@ -795,7 +1049,7 @@ def dashboard():
             'margen_porcentaje': round(margen_mes_porcentaje, 2),
             'margen_año_uf': round(margen_año_uf, 2),
             'margen_año_porcentaje': round(margen_año_porcentaje, 2),
-            'personal_activo': len(personas_activas)
+            'personal_activo': estadisticas['personas_activas']
         }
 
     return render_template('dashboard_simplified.html',
@@ -866,6 +1120,7 @@ def registrar_horas():
 
 @app.route('/api/cliente/<int:cliente_id>/servicios')
 @login_required
+@respuesta_condicional('servicios_cliente')
 def api_servicios_cliente(cliente_id):
     """API para obtener servicios de un cliente (para select dinámico)"""
     servicios = ServicioCliente.query.filter_by(cliente_id=cliente_id, activo=True).all()
@@ -879,6 +1134,7 @@ def api_servicios_cliente(cliente_id):
 
 @app.route('/api/area/<int:area_id>/servicios')
 @login_required
+@respuesta_condicional('servicios')
 def api_servicios_por_area(area_id):
     """API para obtener servicios de un área"""
     servicios = Servicio.query.filter_by(area_id=area_id, activo=True).order_by(Servicio.nombre).all()
@@ -890,6 +1146,7 @@ def api_servicios_por_area(area_id):
 
 @app.route('/api/servicio/<int:servicio_id>/tareas')
 @login_required
+@respuesta_condicional('tareas')
 def api_tareas_por_servicio(servicio_id):
     """API para obtener tareas de un servicio"""
     tareas = Tarea.query.filter_by(servicio_id=servicio_id, activo=True).order_by(Tarea.nombre).all()
@@ -899,50 +1156,175 @@ def api_tareas_por_servicio(servicio_id):
     } for t in tareas])
 
 
-@app.route('/mis-horas')
-@login_required
-def mis_horas():
-    """Ver registros de horas según permisos jerárquicos"""
-    persona_actual = Persona.query.get(session.get('user_id'))
+REGISTROS_POR_PAGINA = 100
 
-    # Obtener IDs de personas que este usuario puede ver (respeta jerarquía)
-    ids_visibles = persona_actual.obtener_personas_visibles()
 
-    # Filtros opcionales
+def _periodo_del_request(mes_por_defecto=None):
+    """
+    (año, mes) de los parámetros del request; sin año usa el actual.
+
+    Raises:
+        ValueError: Si el mes no está entre 1 y 12 o el año no es una fecha posible
+    """
     año = request.args.get('año', datetime.now().year, type=int)
-    mes = request.args.get('mes', type=int)
-    persona_filtro = request.args.get('persona_id', type=int)
+    mes = request.args.get('mes', mes_por_defecto, type=int)
+    if not date.min.year <= año < date.max.year:
+        raise ValueError(f'Año inválido: {año}')
+    if mes is not None and not 1 <= mes <= 12:
+        raise ValueError(f'Mes inválido: {mes} (debe estar entre 1 y 12)')
+    return año, mes
 
-    # Query base: solo personas visibles según permisos
-    query = RegistroHora.query.filter(RegistroHora.persona_id.in_(ids_visibles))
-    query = query.filter(extract('year', RegistroHora.fecha) == año)
 
-    if mes:
-        query = query.filter(extract('month', RegistroHora.fecha) == mes)
+def _consulta_mis_horas(persona_actual):
+    """
+    Registros visibles para persona_actual con los filtros del request
+    (año y mes o rango desde/hasta, persona, cliente, área y servicio)
 
-    # Filtro adicional por persona (si se selecciona)
-    if persona_filtro and persona_filtro in ids_visibles:
-        query = query.filter_by(persona_id=persona_filtro)
+    Returns:
+        tuple: (query sin orden, dict de filtros aplicados)
+
+    Raises:
+        ValueError: Si el año o el mes no son válidos
+    """
+    año, mes = _periodo_del_request()
+    filtros = {
+        'año': año,
+        'mes': mes,
+        # Rango de fechas (inclusive) en lugar de año/mes, ej. exportaciones de varios años
+        'desde': request.args.get('desde', type=date.fromisoformat),
+        'hasta': request.args.get('hasta', type=date.fromisoformat),
+        'persona_id': request.args.get('persona_id', type=int),
+        'cliente_id': request.args.get('cliente_id', type=int),
+        'area_id': request.args.get('area_id', type=int),
+        'servicio_id': request.args.get('servicio_id', type=int),
+    }
+
+    # Solo personas visibles según permisos (jerarquía a cualquier profundidad, en SQL)
+    query = RegistroHora.query.filter(persona_actual.filtro_personas_visibles(RegistroHora.persona_id))
+    if filtros['desde'] or filtros['hasta']:
+        if filtros['desde']:
+            query = query.filter(RegistroHora.fecha >= filtros['desde'])
+        if filtros['hasta']:
+            query = query.filter(RegistroHora.fecha <= filtros['hasta'])
+    else:
+        query = query.filter(filtro_periodo(RegistroHora.fecha, filtros['año'], filtros['mes']))
 
-    registros = query.order_by(RegistroHora.fecha.desc()).all()
+    # Filtros adicionales; una persona no visible deja el listado vacío
+    for columna in ('persona_id', 'cliente_id', 'area_id', 'servicio_id'):
+        if filtros[columna]:
+            query = query.filter(getattr(RegistroHora, columna) == filtros[columna])
 
-    total_horas = sum(r.horas for r in registros)
-    total_costo_uf = sum(r.costo_uf for r in registros)
+    return query, filtros
 
-    # Lista de personas visibles para el filtro
-    personas_visibles = Persona.query.filter(Persona.id.in_(ids_visibles)).order_by(Persona.nombre).all()
+
+def _pagina_mis_horas(query):
+    """
+    Página de registros según el cursor del request (parámetro "despues")
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    from sqlalchemy.orm import joinedload
+    from paginacion import pagina_por_fecha
+
+    query = query.options(
+        joinedload(RegistroHora.persona),
+        joinedload(RegistroHora.area),
+        joinedload(RegistroHora.servicio),
+        joinedload(RegistroHora.tarea),
+    )
+    return pagina_por_fecha(query, RegistroHora.fecha, RegistroHora.id,
+                            cursor=request.args.get('despues'), por_pagina=REGISTROS_POR_PAGINA)
+
+
+@app.route('/mis-horas')
+@login_required
+def mis_horas():
+    """Ver registros de horas según permisos jerárquicos (paginado por fecha, ver paginacion.py)"""
+    from usuario_actual import usuario_actual
+    persona_actual = usuario_actual()
+
+    try:
+        query, filtros = _consulta_mis_horas(persona_actual)
+    except ValueError as error:
+        flash(str(error), 'error')
+        return redirect(url_for('mis_horas'))
+
+    try:
+        registros, siguiente = _pagina_mis_horas(query)
+    except ValueError:
+        flash('Página inválida, mostrando desde el inicio', 'error')
+        return redirect(url_for('mis_horas', **{k: v for k, v in filtros.items() if v}))
+
+    # Totales de todo el filtro (no solo de la página) calculados en la base de datos
+    total_horas, total_costo_uf, total_registros = query.with_entities(
+        func.sum(RegistroHora.horas),
+        func.sum(RegistroHora.costo_uf),
+        func.count(RegistroHora.id)
+    ).one()
+    total_horas = total_horas or 0
+    total_costo_uf = total_costo_uf or 0
+
+    # Opciones de los filtros
+    personas_visibles = Persona.query.filter(
+        persona_actual.filtro_personas_visibles(Persona.id)
+    ).order_by(Persona.nombre).all()
+    areas = Area.query.filter_by(activo=True).order_by(Area.nombre).all()
+    servicios = Servicio.query.filter_by(activo=True).order_by(Servicio.nombre).all()
+    clientes = Cliente.query.filter_by(activo=True).order_by(Cliente.nombre).all()
 
     return render_template('mis_horas.html',
                           registros=registros,
+                          siguiente=siguiente,
                           total_horas=round(total_horas, 2),
                           total_costo_uf=round(total_costo_uf, 2),
-                          año=año,
-                          mes=mes,
-                          persona_filtro=persona_filtro,
+                          total_registros=total_registros,
+                          filtros=filtros,
+                          año=filtros['año'],
+                          mes=filtros['mes'],
+                          persona_filtro=filtros['persona_id'],
                           personas_visibles=personas_visibles,
+                          areas=areas,
+                          servicios=servicios,
+                          clientes=clientes,
+                          persona_actual=persona_actual,
                           es_admin=persona_actual.es_admin)
 
 
+@app.route('/api/mis-horas')
+@login_required
+def api_mis_horas():
+    """Página de /mis-horas en JSON (scroll infinito): mismos filtros y cursor "despues" """
+    from usuario_actual import usuario_actual
+    persona_actual = usuario_actual()
+
+    try:
+        query, _ = _consulta_mis_horas(persona_actual)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+
+    try:
+        registros, siguiente = _pagina_mis_horas(query)
+    except ValueError:
+        return jsonify({'error': 'Cursor inválido'}), 400
+
+    return jsonify({
+        'registros': [{
+            'id': r.id,
+            'fecha': r.fecha.isoformat(),
+            'persona': r.persona.nombre,
+            'area': r.area.nombre if r.area else None,
+            'servicio': r.servicio.nombre if r.servicio else None,
+            'tarea': r.tarea.nombre if r.tarea else None,
+            'horas': r.horas,
+            'costo_uf': r.costo_uf,
+            'descripcion': r.descripcion,
+            'editable': r.persona_id == persona_actual.id,
+        } for r in registros],
+        'siguiente': siguiente,
+    })
+
+
 @app.route('/horas/<int:registro_id>/editar', methods=['GET', 'POST'])
 @login_required
 def editar_horas(registro_id):
@@ -1020,88 +1402,49 @@ def eliminar_horas(registro_id):
 @socia_required
 def ver_clientes():
     """Ver todos los clientes (solo socias)"""
+    from proyeccion_ingresos import ingresos_por_cliente
+
     # Año y mes actual
     hoy = date.today()
     año_actual = hoy.year
     mes_actual = hoy.month
 
-    # CORRECCIÓN: Obtener TODOS los clientes activos y separar por es_spot de SERVICIOS
-    # (no por tipo de cliente, ya que un cliente puede tener servicios permanentes y spot)
-    todos_clientes = Cliente.query.filter_by(activo=True).order_by(Cliente.nombre).all()
-
-    # Calcular ingresos para servicios permanentes (promedio mensual del año)
+    # Un cliente puede tener servicios permanentes y spot: se separa por es_spot
+    # de cada servicio, no por tipo de cliente
     permanentes_data = []
-    total_mensual_permanentes = 0
-
-    for cliente in todos_clientes:
-        if cliente.nombre == 'CLIENTES PERMANENTES':
-            continue
-
-        # Filtrar solo servicios PERMANENTES (es_spot=False)
-        servicios_permanentes = cliente.servicios.filter_by(activo=True, es_spot=False).all()
-
-        if not servicios_permanentes:
-            continue  # Este cliente no tiene servicios permanentes
-
-        # Calcular ingreso mensual ACTUAL (mes en curso) basado en IngresoMensual
-        ingreso_mensual = 0
-        for servicio in servicios_permanentes:
-            # Obtener ingreso del mes actual
-            ingreso_mes_actual = IngresoMensual.query.filter_by(
-                servicio_id=servicio.id,
-                año=año_actual,
-                mes=mes_actual
-            ).first()
-
-            if ingreso_mes_actual:
-                ingreso_mensual += ingreso_mes_actual.ingreso_uf
-            else:
-                # Si no hay ingreso registrado para este mes, usar el valor del servicio
-                if servicio.valor_mensual_uf:
-                    ingreso_mensual += servicio.valor_mensual_uf
-
-        total_mensual_permanentes += ingreso_mensual
-
-        permanentes_data.append({
-            'cliente': cliente,
-            'servicios': servicios_permanentes,
-            'ingreso_mensual': round(ingreso_mensual, 2),
-            'num_servicios': len(servicios_permanentes)
-        })
-
-    # Calcular ingresos para servicios SPOT (suma total del año)
     spot_data = []
+    total_mensual_permanentes = 0
+    total_anual_permanentes = 0
     total_anual_spot = 0
 
-    for cliente in todos_clientes:
-        # Filtrar solo servicios SPOT (es_spot=True)
-        servicios_spot = cliente.servicios.filter_by(activo=True, es_spot=True).all()
-
-        if not servicios_spot:
-            continue  # Este cliente no tiene servicios spot
-
-        # Sumar todos los ingresos del año para servicios spot
-        ingreso_anual = 0
-        for servicio in servicios_spot:
-            ingresos_año = db.session.query(func.sum(IngresoMensual.ingreso_uf)).filter(
-                IngresoMensual.servicio_id == servicio.id,
-                IngresoMensual.año == año_actual
-            ).scalar() or 0
-            ingreso_anual += ingresos_año
-
-        total_anual_spot += ingreso_anual
-
-        spot_data.append({
-            'cliente': cliente,
-            'servicios': servicios_spot,
-            'ingreso_anual': round(ingreso_anual, 2),
-            'num_servicios': len(servicios_spot)
-        })
+    for datos in ingresos_por_cliente(año_actual, mes_actual):
+        # Permanentes: ingreso del mes en curso (real, o el valor vigente del servicio)
+        if datos['servicios_permanentes'] and datos['cliente'].nombre != 'CLIENTES PERMANENTES':
+            total_mensual_permanentes += datos['ingreso_mensual']
+            total_anual_permanentes += datos['proyeccion_anual']
+            permanentes_data.append({
+                'cliente': datos['cliente'],
+                'servicios': datos['servicios_permanentes'],
+                'ingreso_mensual': round(datos['ingreso_mensual'], 2),
+                'proyeccion_anual': round(datos['proyeccion_anual'], 2),
+                'num_servicios': len(datos['servicios_permanentes'])
+            })
+
+        # SPOT: suma de los ingresos registrados del año
+        if datos['servicios_spot']:
+            total_anual_spot += datos['ingreso_anual_spot']
+            spot_data.append({
+                'cliente': datos['cliente'],
+                'servicios': datos['servicios_spot'],
+                'ingreso_anual': round(datos['ingreso_anual_spot'], 2),
+                'num_servicios': len(datos['servicios_spot'])
+            })
 
     return render_template('clientes.html',
                           permanentes_data=permanentes_data,
                           spot_data=spot_data,
                           total_mensual_permanentes=round(total_mensual_permanentes, 2),
+                          total_anual_permanentes=round(total_anual_permanentes, 2),
                           total_anual_spot=round(total_anual_spot, 2))
 
 
@@ -1148,6 +1491,10 @@ def nuevo_personal():
                 activo=True,
                 fecha_ingreso=fecha_ingreso
             )
+            persona.tarifas.append(TarifaPersona(
+                vigente_desde=fecha_ingreso or date.today(),
+                costo_mensual_empresa=costo_mensual
+            ))
             db.session.add(persona)
             db.session.commit()
 
@@ -1172,7 +1519,7 @@ def editar_personal(persona_id):
         persona.email = request.form.get('email')
         persona.cargo = request.form.get('cargo')
         persona.es_socia = request.form.get('es_socia') == 'on'
-        persona.costo_mensual_empresa = float(request.form.get('costo_mensual', 0))
+        costo_mensual = float(request.form.get('costo_mensual', 0))
         persona.activo = request.form.get('activo') == 'on'
 
         fecha_ingreso_str = request.form.get('fecha_ingreso')
@@ -1180,6 +1527,18 @@ def editar_personal(persona_id):
             persona.fecha_ingreso = datetime.strptime(fecha_ingreso_str, '%Y-%m-%d').date()
 
         try:
+            # El nuevo costo rige desde la fecha indicada (por defecto hoy);
+            # las horas anteriores mantienen el costo con que se registraron
+            if costo_mensual != persona.costo_mensual_empresa:
+                from costos import registrar_tarifa
+
+                vigente_desde_str = request.form.get('costo_vigente_desde')
+                vigente_desde = datetime.strptime(vigente_desde_str, '%Y-%m-%d').date() if vigente_desde_str else None
+
+                registrar_tarifa(persona, costo_mensual, vigente_desde)
+                if not vigente_desde or vigente_desde <= date.today():
+                    persona.costo_mensual_empresa = costo_mensual
+
             db.session.commit()
             flash(f'Datos de {persona.nombre} actualizados exitosamente', 'success')
             return redirect(url_for('ver_personal'))
@@ -1211,26 +1570,50 @@ def desactivar_personal(persona_id):
 @socia_required
 def capacidad():
     """Análisis de capacidad y carga de trabajo del personal"""
-    año = request.args.get('año', datetime.now().year, type=int)
-    mes = request.args.get('mes', datetime.now().month, type=int)
+    try:
+        año, mes = _periodo_del_request(datetime.now().month)
+    except ValueError as error:
+        flash(str(error), 'error')
+        return redirect(url_for('capacidad'))
 
-    # Calcular días hábiles del mes (aproximado: 22 días hábiles al mes)
-    DIAS_HABILES_MES = 22
-    HORAS_DIA = 8
-    HORAS_ESPERADAS_MES = DIAS_HABILES_MES * HORAS_DIA  # 176 horas
+    # Días hábiles y horas esperadas según el calendario laboral del mes (L-J 9h, V 8h)
+    DIAS_HABILES_MES = dias_habiles_mes(año, mes)
+    HORAS_ESPERADAS_MES = horas_disponibles_mes(año, mes)
 
     personas_analisis = []
     personas = Persona.query.filter_by(activo=True).order_by(Persona.nombre).all()
 
+    # Horas del mes por (persona, cliente, servicio) desde el resumen mensual
+    horas_detalle = defaultdict(list)
+    for persona_id, cliente_id, servicio_id, horas in db.session.query(
+        ResumenHorasMensual.persona_id,
+        ResumenHorasMensual.cliente_id,
+        ResumenHorasMensual.servicio_id,
+        func.sum(ResumenHorasMensual.horas)
+    ).filter(
+        ResumenHorasMensual.año == año,
+        ResumenHorasMensual.mes == mes
+    ).group_by(
+        ResumenHorasMensual.persona_id, ResumenHorasMensual.cliente_id, ResumenHorasMensual.servicio_id
+    ).all():
+        horas_detalle[persona_id].append((cliente_id, servicio_id, horas or 0))
+
+    # Días únicos con registro por persona
+    dias_por_persona = dict(db.session.query(
+        RegistroHora.persona_id,
+        func.count(func.distinct(RegistroHora.fecha))
+    ).filter(
+        filtro_periodo(RegistroHora.fecha, año, mes)
+    ).group_by(RegistroHora.persona_id).all())
+
+    nombres_clientes = dict(db.session.query(Cliente.id, Cliente.nombre).all())
+    nombres_servicios = dict(db.session.query(Servicio.id, Servicio.nombre).all())
+
     for persona in personas:
-        # Obtener registros de horas del mes/año
-        registros = RegistroHora.query.filter_by(persona_id=persona.id).filter(
-            extract('year', RegistroHora.fecha) == año,
-            extract('month', RegistroHora.fecha) == mes
-        ).all()
+        detalle = horas_detalle.get(persona.id, [])
 
-        total_horas = sum(r.horas for r in registros)
-        total_dias_registrados = len(set(r.fecha for r in registros))  # Días únicos con registro
+        total_horas = sum(horas for _, _, horas in detalle)
+        total_dias_registrados = dias_por_persona.get(persona.id, 0)
 
         # Calcular utilización
         utilizacion = (total_horas / HORAS_ESPERADAS_MES * 100) if HORAS_ESPERADAS_MES > 0 else 0
@@ -1254,23 +1637,23 @@ def capacidad():
 
         # Análisis por cliente
         clientes_trabajados = {}
-        for registro in registros:
-            cliente_nombre = registro.cliente.nombre
+        for cliente_id, servicio_id, horas in detalle:
+            cliente_nombre = nombres_clientes.get(cliente_id, 'Sin cliente')
             if cliente_nombre not in clientes_trabajados:
                 clientes_trabajados[cliente_nombre] = {
                     'horas': 0,
                     'servicios': set()
                 }
-            clientes_trabajados[cliente_nombre]['horas'] += registro.horas
-            if registro.servicio:
-                clientes_trabajados[cliente_nombre]['servicios'].add(registro.servicio.nombre)
+            clientes_trabajados[cliente_nombre]['horas'] += horas
+            if servicio_id in nombres_servicios:
+                clientes_trabajados[cliente_nombre]['servicios'].add(nombres_servicios[servicio_id])
 
         # Convertir a lista ordenada por horas
         clientes_detalle = [
             {
                 'nombre': nombre,
                 'horas': datos['horas'],
-                'servicios': list(datos['servicios']),
+                'servicios': sorted(datos['servicios']),
                 'porcentaje': round(datos['horas'] / total_horas * 100, 1) if total_horas > 0 else 0
             }
             for nombre, datos in clientes_trabajados.items()
@@ -1461,12 +1844,14 @@ def editar_servicio(servicio_id):
             # (solo desde el mes actual en adelante)
             if not servicio.es_spot:
                 hoy = datetime.now()
-                # Actualizar ingresos desde este mes en adelante
-                IngresoMensual.query.filter(
+                # Actualizar ingresos desde este mes en adelante (con el ORM, así el
+                # flush actualiza también las estadísticas del dashboard)
+                for ingreso in IngresoMensual.query.filter(
                     IngresoMensual.servicio_id == servicio.id,
                     IngresoMensual.año >= hoy.year,
                     IngresoMensual.mes >= hoy.month
-                ).update({'ingreso_uf': nuevo_valor})
+                ):
+                    ingreso.ingreso_uf = nuevo_valor
 
         # Actualizar valor del servicio
         servicio.valor_mensual_uf = nuevo_valor
@@ -1485,8 +1870,9 @@ def eliminar_servicio(servicio_id):
     servicio = ServicioCliente.query.get_or_404(servicio_id)
     cliente_id = servicio.cliente_id
 
-    # Eliminar ingresos mensuales asociados
-    IngresoMensual.query.filter_by(servicio_id=servicio.id).delete()
+    # Eliminar ingresos mensuales asociados (con el ORM: ver estadisticas_dashboard.py)
+    for ingreso in IngresoMensual.query.filter_by(servicio_id=servicio.id):
+        db.session.delete(ingreso)
 
     db.session.delete(servicio)
     db.session.commit()
@@ -1530,264 +1916,21 @@ def nuevo_cliente():
 @socia_required
 def rentabilidad():
     """Análisis de rentabilidad por cliente y servicio (solo socias)"""
-    año = request.args.get('año', datetime.now().year, type=int)
-    mes = request.args.get('mes', type=int)
-
-    # Ingresos mensuales
-    query_ingresos = IngresoMensual.query.filter_by(año=año)
-    if mes:
-        query_ingresos = query_ingresos.filter_by(mes=mes)
-
-    ingresos = query_ingresos.all()
-    total_ingresos = sum(i.ingreso_uf for i in ingresos)
-
-    # Costos mensuales (todas las personas activas)
-    personas_activas = Persona.query.filter_by(activo=True).all()
-    costo_total_pesos = sum(p.costo_mensual_empresa for p in personas_activas)
-    costo_total_uf = costo_total_pesos / VALOR_UF_ACTUAL
-
-    # Si es un mes específico, usar ese costo
-    if mes:
-        costos_mes = costo_total_uf
-    else:
-        # Si es el año completo, multiplicar por 12
-        costos_mes = costo_total_uf * 12
-
-    # Margen
-    margen_uf = total_ingresos - costos_mes
-    margen_porcentaje = (margen_uf / total_ingresos * 100) if total_ingresos > 0 else 0
-
-    stats = {
-        'total_ingresos': round(total_ingresos, 2),
-        'total_costos': round(costos_mes, 2),
-        'margen_uf': round(margen_uf, 2),
-        'margen_porcentaje': round(margen_porcentaje, 2),
-        'personal_activo': len(personas_activas)
-    }
-
-    # ===== CALCULAR HORAS NO IMPUTADAS (para COMSULTING) =====
-    cliente_comsulting = Cliente.query.filter_by(nombre='COMSULTING').first()
-    horas_no_imputadas_total = 0
-    costo_no_imputadas_total = 0
-
-    if mes:
-        # Calcular para un mes específico
-        horas_disponibles_mes = calcular_horas_disponibles_mes(año, mes)
-
-        for persona in personas_activas:
-            # Horas registradas por esta persona en el mes
-            horas_registradas = db.session.query(func.sum(RegistroHora.horas)).filter(
-                RegistroHora.persona_id == persona.id,
-                extract('year', RegistroHora.fecha) == año,
-                extract('month', RegistroHora.fecha) == mes
-            ).scalar() or 0
-
-            # Horas no imputadas = disponibles - registradas
-            horas_gap = max(0, horas_disponibles_mes - horas_registradas)
-
-            if horas_gap > 0:
-                horas_no_imputadas_total += horas_gap
-                costo_no_imputadas_total += horas_gap * persona.costo_hora_uf
-    else:
-        # Para el año completo, calcular mes por mes
-        for mes_iter in range(1, 13):
-            horas_disponibles_mes = calcular_horas_disponibles_mes(año, mes_iter)
-
-            for persona in personas_activas:
-                horas_registradas = db.session.query(func.sum(RegistroHora.horas)).filter(
-                    RegistroHora.persona_id == persona.id,
-                    extract('year', RegistroHora.fecha) == año,
-                    extract('month', RegistroHora.fecha) == mes_iter
-                ).scalar() or 0
-
-                horas_gap = max(0, horas_disponibles_mes - horas_registradas)
-
-                if horas_gap > 0:
-                    horas_no_imputadas_total += horas_gap
-                    costo_no_imputadas_total += horas_gap * persona.costo_hora_uf
-
-    # ===== CALCULAR Y DISTRIBUIR OVERHEAD =====
-    overhead_info = calcular_overhead_distribuido(año, mes)
-    distribucion_overhead = overhead_info['distribucion_por_cliente']
-
-    # ===== ANÁLISIS POR CLIENTE =====
-    clientes_analisis = []
-    clientes = Cliente.query.filter_by(activo=True).all()
-
-    for cliente in clientes:
-        if cliente.nombre == 'CLIENTES PERMANENTES':
-            continue
-
-        # Calcular ingresos del cliente
-        ingresos_cliente = IngresoMensual.query.join(ServicioCliente).filter(
-            ServicioCliente.cliente_id == cliente.id,
-            IngresoMensual.año == año
-        )
-        if mes:
-            ingresos_cliente = ingresos_cliente.filter(IngresoMensual.mes == mes)
-
-        ingresos_cliente = ingresos_cliente.all()
-        total_ingresos_cliente = sum(i.ingreso_uf for i in ingresos_cliente)
-
-        # Calcular costos (horas trabajadas en este cliente)
-        registros_horas = RegistroHora.query.filter_by(cliente_id=cliente.id).filter(
-            extract('year', RegistroHora.fecha) == año
-        )
-        if mes:
-            registros_horas = registros_horas.filter(extract('month', RegistroHora.fecha) == mes)
-
-        registros_horas = registros_horas.all()
-        total_horas_cliente = sum(r.horas for r in registros_horas)
-        total_costos_directos_cliente = sum(r.costo_uf for r in registros_horas)
-
-        # Obtener overhead asignado a este cliente
-        overhead_cliente = distribucion_overhead.get(cliente.id, 0)
-
-        # Calcular margen CON overhead
-        total_costos_cliente = total_costos_directos_cliente + overhead_cliente
-        margen_cliente = total_ingresos_cliente - total_costos_cliente
-        margen_porcentaje_cliente = (margen_cliente / total_ingresos_cliente * 100) if total_ingresos_cliente > 0 else 0
-
-        # Análisis por servicio
-        servicios_analisis = []
-        for servicio in cliente.servicios.filter_by(activo=True).all():
-            # Ingresos del servicio
-            ingresos_servicio = IngresoMensual.query.filter_by(
-                servicio_id=servicio.id,
-                año=año
-            )
-            if mes:
-                ingresos_servicio = ingresos_servicio.filter_by(mes=mes)
-
-            ingresos_servicio = ingresos_servicio.all()
-            total_ingresos_servicio = sum(i.ingreso_uf for i in ingresos_servicio)
-
-            # Costos del servicio (horas trabajadas en este servicio)
-            registros_servicio = RegistroHora.query.filter_by(servicio_id=servicio.id).filter(
-                extract('year', RegistroHora.fecha) == año
-            )
-            if mes:
-                registros_servicio = registros_servicio.filter(extract('month', RegistroHora.fecha) == mes)
-
-            registros_servicio = registros_servicio.all()
-            total_horas_servicio = sum(r.horas for r in registros_servicio)
-            total_costos_servicio = sum(r.costo_uf for r in registros_servicio)
-
-            margen_servicio = total_ingresos_servicio - total_costos_servicio
-            margen_porcentaje_servicio = (margen_servicio / total_ingresos_servicio * 100) if total_ingresos_servicio > 0 else 0
-
-            if total_ingresos_servicio > 0 or total_costos_servicio > 0:
-                servicios_analisis.append({
-                    'servicio': servicio,
-                    'ingresos': round(total_ingresos_servicio, 2),
-                    'horas': round(total_horas_servicio, 2),
-                    'costos': round(total_costos_servicio, 2),
-                    'margen': round(margen_servicio, 2),
-                    'margen_porcentaje': round(margen_porcentaje_servicio, 2)
-                })
+    from motor_rentabilidad import calcular_rentabilidad
 
-        # Incluir cliente si tiene ingresos, costos, o es COMSULTING (siempre mostrar)
-        if total_ingresos_cliente > 0 or total_costos_cliente > 0 or cliente.nombre == 'COMSULTING':
-            # Si es COMSULTING, agregar las horas no imputadas
-            if cliente.nombre == 'COMSULTING':
-                horas_imputadas = total_horas_cliente
-                costos_imputados = total_costos_cliente
-
-                # Sumar horas no imputadas (gap)
-                total_horas_cliente += horas_no_imputadas_total
-                total_costos_cliente += costo_no_imputadas_total
-                margen_cliente = total_ingresos_cliente - total_costos_cliente
-
-                # Agregar desglose en servicios
-                servicios_analisis.insert(0, {
-                    'servicio': type('obj', (object,), {'nombre': '📊 HORAS NO IMPUTADAS (Gap)'})(),
-                    'ingresos': 0,
-                    'horas': round(horas_no_imputadas_total, 2),
-                    'costos': round(costo_no_imputadas_total, 2),
-                    'margen': round(-costo_no_imputadas_total, 2),
-                    'margen_porcentaje': 0,
-                    'es_gap': True
-                })
-
-                if horas_imputadas > 0:
-                    servicios_analisis.insert(1, {
-                        'servicio': type('obj', (object,), {'nombre': '✏️ HORAS IMPUTADAS (Registradas)'})(),
-                        'ingresos': 0,
-                        'horas': round(horas_imputadas, 2),
-                        'costos': round(costos_imputados, 2),
-                        'margen': round(-costos_imputados, 2),
-                        'margen_porcentaje': 0,
-                        'es_gap': False
-                    })
-
-            clientes_analisis.append({
-                'cliente': cliente,
-                'ingresos': round(total_ingresos_cliente, 2),
-                'horas': round(total_horas_cliente, 2),
-                'costos_directos': round(total_costos_directos_cliente, 2),
-                'overhead': round(overhead_cliente, 2),
-                'costos': round(total_costos_cliente, 2),  # Total = directos + overhead
-                'margen': round(margen_cliente, 2),
-                'margen_porcentaje': round(margen_porcentaje_cliente, 2) if total_ingresos_cliente > 0 else 0,
-                'servicios': servicios_analisis,
-                'es_comsulting': cliente.nombre == 'COMSULTING'
-            })
-
-    # Ordenar: COMSULTING al final, resto por margen descendente
-    clientes_analisis.sort(key=lambda x: (x['es_comsulting'], -x['margen']))
-
-    # ===== ANÁLISIS POR ÁREA =====
-    areas_analisis = []
-    areas = Area.query.filter_by(activo=True).all()
-
-    for area in areas:
-        # Calcular costos por área (horas trabajadas en esta área)
-        registros_area = RegistroHora.query.filter_by(area_id=area.id).filter(
-            extract('year', RegistroHora.fecha) == año
-        )
-        if mes:
-            registros_area = registros_area.filter(extract('month', RegistroHora.fecha) == mes)
-
-        registros_area = registros_area.all()
-        total_horas_area = sum(r.horas for r in registros_area)
-        total_costos_area = sum(r.costo_uf for r in registros_area)
-
-        # Calcular ingresos por área (sumando ingresos de servicios en esta área)
-        servicios_area = Servicio.query.filter_by(area_id=area.id, activo=True).all()
-        total_ingresos_area = 0
-
-        for servicio in servicios_area:
-            ingresos_servicio = IngresoMensual.query.filter_by(
-                servicio_id=servicio.id,
-                año=año
-            )
-            if mes:
-                ingresos_servicio = ingresos_servicio.filter_by(mes=mes)
-
-            total_ingresos_area += sum(i.ingreso_uf for i in ingresos_servicio.all())
-
-        # Calcular margen por área
-        margen_area = total_ingresos_area - total_costos_area
-        margen_porcentaje_area = (margen_area / total_ingresos_area * 100) if total_ingresos_area > 0 else 0
-
-        if total_ingresos_area > 0 or total_costos_area > 0:
-            areas_analisis.append({
-                'area': area,
-                'ingresos': round(total_ingresos_area, 2),
-                'horas': round(total_horas_area, 2),
-                'costos': round(total_costos_area, 2),
-                'margen': round(margen_area, 2),
-                'margen_porcentaje': round(margen_porcentaje_area, 2)
-            })
+    try:
+        año, mes = _periodo_del_request()
+    except ValueError as error:
+        flash(str(error), 'error')
+        return redirect(url_for('rentabilidad'))
 
-    # Ordenar por margen descendente
-    areas_analisis.sort(key=lambda x: -x['margen'])
+    resultado = calcular_rentabilidad(año, mes)
 
     return render_template('rentabilidad.html',
-                          stats=stats,
-                          clientes_analisis=clientes_analisis,
-                          areas_analisis=areas_analisis,
-                          overhead_info=overhead_info,
+                          stats=resultado['stats'],
+                          clientes_analisis=resultado['clientes_analisis'],
+                          areas_analisis=resultado['areas_analisis'],
+                          overhead_info=resultado['overhead_info'],
                           año=año,
                           mes=mes)
 
@@ -1800,46 +1943,83 @@ def rentabilidad_areas():
     return render_template('rentabilidad_areas.html', año_actual=año_actual)
 
 
+MESES_MAXIMOS_PRODUCTIVIDAD = 36  # Ventana máxima de ?meses= (3 años)
+
+
 @app.route('/productividad')
 @socia_required
 def productividad():
     """Vista de productividad y rentabilidad completa (solo socias)"""
-    meses = request.args.get('meses', 12, type=int)
+    from motor_rentabilidad import ingresos_agrupados
+    from resumen_horas import filtrar_rango, horas_agrupadas
+
+    meses = min(max(request.args.get('meses', 12, type=int), 1), MESES_MAXIMOS_PRODUCTIVIDAD)
+
+    # Últimos N meses calendario (incluye el mes actual)
+    fecha_inicio, fecha_fin = rango_ultimos_meses(meses)
+    año_actual = datetime.now().year
+
+    # Horas y costos del período: una consulta por (cliente, área) y otra por servicio
+    horas_cliente_area = filtrar_rango(
+        horas_agrupadas(ResumenHorasMensual.cliente_id, ResumenHorasMensual.area_id),
+        fecha_inicio, fecha_fin
+    ).all()
+    horas_servicio = {
+        servicio_id: (horas or 0, costos or 0)
+        for servicio_id, horas, costos in filtrar_rango(
+            horas_agrupadas(ResumenHorasMensual.servicio_id),
+            fecha_inicio, fecha_fin
+        ).all()
+    }
+
+    ingresos_por_cliente = ingresos_agrupados(ServicioCliente.cliente_id, año_actual)
+    ingresos_por_servicio = ingresos_agrupados(IngresoMensual.servicio_id, año_actual)
+
+    nombres_areas = {a.id: a.nombre for a in Area.query.filter_by(activo=True).all()}
+
+    horas_por_cliente = {}
+    area_principal_cliente = {}
+    areas = {}
+    for cliente_id, area_id, horas, costos in horas_cliente_area:
+        horas = horas or 0
+        costos = costos or 0
+
+        acumulado = horas_por_cliente.setdefault(cliente_id, [0, 0])
+        acumulado[0] += horas
+        acumulado[1] += costos
+
+        # Área principal del cliente = la con más horas en el período
+        if area_id in nombres_areas and horas > area_principal_cliente.get(cliente_id, (None, 0))[1]:
+            area_principal_cliente[cliente_id] = (nombres_areas[area_id], horas)
+
+        if area_id in nombres_areas:
+            area_data = areas.setdefault(nombres_areas[area_id], {
+                'horas': 0,
+                'costos_uf': 0,
+                'ingresos_uf': 0,  # Se calculará después
+                'margen_uf': 0,
+                'margen_porcentaje': 0
+            })
+            area_data['horas'] += horas
+            area_data['costos_uf'] += costos
+
+    areas = {nombre: data for nombre, data in areas.items() if data['horas'] > 0}
 
-    # Calcular fecha de inicio
-    fecha_fin = datetime.now().date()
-    fecha_inicio = fecha_fin - timedelta(days=meses * 30)
+    servicios_por_cliente = {}
+    for servicio in ServicioCliente.query.filter_by(activo=True).all():
+        servicios_por_cliente.setdefault(servicio.cliente_id, []).append(servicio)
 
     # Obtener clientes con análisis
     clientes = []
     servicios = []
-    areas = {}
-
-    todos_clientes = Cliente.query.filter_by(activo=True).all()
 
-    for cliente in todos_clientes:
+    for cliente in Cliente.query.filter_by(activo=True).all():
         if cliente.nombre == 'CLIENTES PERMANENTES':
             continue
 
-        # Calcular horas
-        horas_query = db.session.query(func.sum(RegistroHora.horas)).filter(
-            RegistroHora.cliente_id == cliente.id,
-            RegistroHora.fecha >= fecha_inicio
-        ).scalar() or 0
-
-        # Calcular costos
-        costos_query = db.session.query(func.sum(RegistroHora.costo_uf)).filter(
-            RegistroHora.cliente_id == cliente.id,
-            RegistroHora.fecha >= fecha_inicio
-        ).scalar() or 0
-
-        # Calcular ingresos
-        ingresos_query = db.session.query(func.sum(IngresoMensual.ingreso_uf)).join(
-            ServicioCliente
-        ).filter(
-            ServicioCliente.cliente_id == cliente.id,
-            IngresoMensual.año == datetime.now().year
-        ).scalar() or 0
+        horas_query, costos_query = horas_por_cliente.get(cliente.id, (0, 0))
+        ingresos_query = ingresos_por_cliente.get(cliente.id, 0)
+        area_cliente = area_principal_cliente.get(cliente.id, ('-', 0))[0]
 
         if horas_query > 0 or ingresos_query > 0:
             margen_uf = ingresos_query - costos_query
@@ -1848,7 +2028,7 @@ def productividad():
             clientes.append({
                 'id': cliente.id,
                 'nombre': cliente.nombre,
-                'area': cliente.area,
+                'area': area_cliente,
                 'tipo': cliente.tipo,
                 'horas': horas_query,
                 'ingresos_uf': ingresos_query,
@@ -1858,58 +2038,24 @@ def productividad():
             })
 
         # Procesar servicios del cliente
-        for servicio in cliente.servicios.filter_by(activo=True).all():
-            horas_servicio = db.session.query(func.sum(RegistroHora.horas)).filter(
-                RegistroHora.servicio_id == servicio.id,
-                RegistroHora.fecha >= fecha_inicio
-            ).scalar() or 0
-
-            costos_servicio = db.session.query(func.sum(RegistroHora.costo_uf)).filter(
-                RegistroHora.servicio_id == servicio.id,
-                RegistroHora.fecha >= fecha_inicio
-            ).scalar() or 0
-
-            ingresos_servicio = db.session.query(func.sum(IngresoMensual.ingreso_uf)).filter(
-                IngresoMensual.servicio_id == servicio.id,
-                IngresoMensual.año == datetime.now().year
-            ).scalar() or 0
-
-            if horas_servicio > 0 or ingresos_servicio > 0:
+        for servicio in servicios_por_cliente.get(cliente.id, []):
+            horas_serv, costos_servicio = horas_servicio.get(servicio.id, (0, 0))
+            ingresos_servicio = ingresos_por_servicio.get(servicio.id, 0)
+
+            if horas_serv > 0 or ingresos_servicio > 0:
                 margen_servicio = ingresos_servicio - costos_servicio
                 margen_porcentaje_servicio = (margen_servicio / ingresos_servicio * 100) if ingresos_servicio > 0 else 0
 
                 servicios.append({
                     'nombre': f"{cliente.nombre} - {servicio.nombre}",
-                    'area': cliente.area,
-                    'horas': horas_servicio,
+                    'area': area_cliente,
+                    'horas': horas_serv,
                     'ingresos_uf': ingresos_servicio,
                     'costos_uf': costos_servicio,
                     'margen_uf': margen_servicio,
                     'margen_porcentaje': margen_porcentaje_servicio
                 })
 
-    # Procesar áreas
-    todas_areas = Area.query.filter_by(activo=True).all()
-    for area in todas_areas:
-        horas_area = db.session.query(func.sum(RegistroHora.horas)).filter(
-            RegistroHora.area_id == area.id,
-            RegistroHora.fecha >= fecha_inicio
-        ).scalar() or 0
-
-        costos_area = db.session.query(func.sum(RegistroHora.costo_uf)).filter(
-            RegistroHora.area_id == area.id,
-            RegistroHora.fecha >= fecha_inicio
-        ).scalar() or 0
-
-        if horas_area > 0:
-            areas[area.nombre] = {
-                'horas': horas_area,
-                'costos_uf': costos_area,
-                'ingresos_uf': 0,  # Se calculará después
-                'margen_uf': 0,
-                'margen_porcentaje': 0
-            }
-
     # Totales
     total_horas = sum(c['horas'] for c in clientes)
     total_ingresos = sum(c['ingresos_uf'] for c in clientes)
@@ -1940,21 +2086,7 @@ def calcular_horas_disponibles_7h(año, mes):
     Calcula las horas disponibles en un mes según días hábiles
     Asume 7 horas/día para todos los días hábiles (L-V)
     """
-    import calendar
-    from datetime import date
-
-    # Obtener todos los días del mes
-    _, ultimo_dia = calendar.monthrange(año, mes)
-
-    horas_totales = 0
-    for dia in range(1, ultimo_dia + 1):
-        fecha = date(año, mes, dia)
-        dia_semana = fecha.weekday()  # 0=Lunes, 6=Domingo
-
-        if dia_semana < 5:  # Lunes a Viernes (0-4)
-            horas_totales += 7
-
-    return horas_totales
+    return horas_disponibles_mes(año, mes, '7h')
 
 
 @app.route('/productividad/personas')
@@ -1962,71 +2094,14 @@ def calcular_horas_disponibles_7h(año, mes):
 def productividad_personas():
     """Panel de productividad por persona (% tiempo asignado vs disponible)"""
     try:
-        print("[DEBUG] Iniciando productividad_personas()")
-        año = request.args.get('año', datetime.now().year, type=int)
-        mes = request.args.get('mes', datetime.now().month, type=int)
-        print(f"[DEBUG] Año: {año}, Mes: {mes}")
-
-        # Calcular horas disponibles en el mes (7h/día)
-        horas_disponibles_mes = calcular_horas_disponibles_7h(año, mes)
-        print(f"[DEBUG] Horas disponibles en el mes: {horas_disponibles_mes}")
-
-        # Obtener todas las personas activas
-        personas_activas = Persona.query.filter_by(activo=True).order_by(Persona.nombre).all()
-        print(f"[DEBUG] Personas activas encontradas: {len(personas_activas)}")
-
-        productividad_data = []
-
-        for persona in personas_activas:
-            print(f"[DEBUG] Procesando persona: {persona.nombre} (ID: {persona.id})")
-            # Calcular horas asignadas (registradas en el mes)
-            horas_asignadas = db.session.query(func.sum(RegistroHora.horas)).filter(
-                RegistroHora.persona_id == persona.id,
-                extract('year', RegistroHora.fecha) == año,
-                extract('month', RegistroHora.fecha) == mes
-            ).scalar() or 0
-            print(f"[DEBUG]   Horas asignadas: {horas_asignadas}")
-
-            # Calcular porcentaje de ocupación
-            porcentaje_ocupacion = (horas_asignadas / horas_disponibles_mes * 100) if horas_disponibles_mes > 0 else 0
-
-            # Calcular horas disponibles restantes
-            horas_disponibles_restantes = max(0, horas_disponibles_mes - horas_asignadas)
-
-            # Determinar estado (para colorear en UI)
-            if porcentaje_ocupacion >= 90:
-                estado = 'alto'  # Verde
-            elif porcentaje_ocupacion >= 70:
-                estado = 'medio'  # Amarillo
-            elif porcentaje_ocupacion >= 50:
-                estado = 'bajo'  # Naranja
-            else:
-                estado = 'muy_bajo'  # Rojo
-
-            productividad_data.append({
-                'persona': persona,
-                'horas_disponibles': horas_disponibles_mes,
-                'horas_asignadas': round(horas_asignadas, 1),
-                'porcentaje_ocupacion': round(porcentaje_ocupacion, 1),
-                'horas_disponibles_restantes': round(horas_disponibles_restantes, 1),
-                'estado': estado
-            })
+        año, mes = _periodo_del_request(datetime.now().month)
+    except ValueError as error:
+        flash(str(error), 'error')
+        return redirect(url_for('productividad_personas'))
 
-        # Calcular totales
-        total_horas_disponibles = len(personas_activas) * horas_disponibles_mes
-        total_horas_asignadas = sum(p['horas_asignadas'] for p in productividad_data)
-        total_porcentaje = (total_horas_asignadas / total_horas_disponibles * 100) if total_horas_disponibles > 0 else 0
-
-        stats = {
-            'total_personas': len(personas_activas),
-            'horas_disponibles_por_persona': horas_disponibles_mes,
-            'total_horas_disponibles': total_horas_disponibles,
-            'total_horas_asignadas': round(total_horas_asignadas, 1),
-            'total_porcentaje': round(total_porcentaje, 1),
-            'total_horas_restantes': round(total_horas_disponibles - total_horas_asignadas, 1)
-        }
+    try:
+        productividad_data, stats = calcular_productividad_personas(año, mes)
 
-        print("[DEBUG] Renderizando template productividad_personas.html")
         return render_template('productividad_personas.html',
                               productividad_data=productividad_data,
                               stats=stats,
@@ -2039,6 +2114,75 @@ def productividad_personas():
         return f"Error interno: {str(e)}", 500
 
 
+def calcular_productividad_personas(año, mes):
+    """
+    Ocupación de cada persona activa en el mes (horas registradas vs disponibles a 7h/día)
+
+    Returns:
+        tuple: (lista por persona, stats totales)
+    """
+    # Calcular horas disponibles en el mes (7h/día)
+    horas_disponibles_mes = calcular_horas_disponibles_7h(año, mes)
+
+    # Obtener todas las personas activas
+    personas_activas = Persona.query.filter_by(activo=True).order_by(Persona.nombre).all()
+
+    # Horas asignadas (registradas en el mes) de todas las personas en una consulta
+    horas_por_persona = dict(db.session.query(
+        ResumenHorasMensual.persona_id,
+        func.sum(ResumenHorasMensual.horas)
+    ).filter(
+        ResumenHorasMensual.año == año,
+        ResumenHorasMensual.mes == mes
+    ).group_by(ResumenHorasMensual.persona_id).all())
+
+    productividad_data = []
+
+    for persona in personas_activas:
+        horas_asignadas = horas_por_persona.get(persona.id) or 0
+
+        # Calcular porcentaje de ocupación
+        porcentaje_ocupacion = (horas_asignadas / horas_disponibles_mes * 100) if horas_disponibles_mes > 0 else 0
+
+        # Calcular horas disponibles restantes
+        horas_disponibles_restantes = max(0, horas_disponibles_mes - horas_asignadas)
+
+        # Determinar estado (para colorear en UI)
+        if porcentaje_ocupacion >= 90:
+            estado = 'alto'  # Verde
+        elif porcentaje_ocupacion >= 70:
+            estado = 'medio'  # Amarillo
+        elif porcentaje_ocupacion >= 50:
+            estado = 'bajo'  # Naranja
+        else:
+            estado = 'muy_bajo'  # Rojo
+
+        productividad_data.append({
+            'persona': persona,
+            'horas_disponibles': horas_disponibles_mes,
+            'horas_asignadas': round(horas_asignadas, 1),
+            'porcentaje_ocupacion': round(porcentaje_ocupacion, 1),
+            'horas_disponibles_restantes': round(horas_disponibles_restantes, 1),
+            'estado': estado
+        })
+
+    # Calcular totales
+    total_horas_disponibles = len(personas_activas) * horas_disponibles_mes
+    total_horas_asignadas = sum(p['horas_asignadas'] for p in productividad_data)
+    total_porcentaje = (total_horas_asignadas / total_horas_disponibles * 100) if total_horas_disponibles > 0 else 0
+
+    stats = {
+        'total_personas': len(personas_activas),
+        'horas_disponibles_por_persona': horas_disponibles_mes,
+        'total_horas_disponibles': total_horas_disponibles,
+        'total_horas_asignadas': round(total_horas_asignadas, 1),
+        'total_porcentaje': round(total_porcentaje, 1),
+        'total_horas_restantes': round(total_horas_disponibles - total_horas_asignadas, 1)
+    }
+
+    return productividad_data, stats
+
+
 # ============= VALORIZACIÓN DE PROYECTOS =============
 
 @app.route('/valorizacion')
@@ -2230,36 +2374,103 @@ def guardar_valorizacion():
 
 @app.route('/api/rentabilidad-por-area')
 @login_required
+@api_socia_required
+@respuesta_condicional(*TABLAS_RENTABILIDAD, 'areas', 'ingresos_proyectados_area')
 def api_rentabilidad_por_area():
     """API: Rentabilidad por área (solo para socias/admin)"""
-    es_socia = session.get('es_socia', False)
-    es_admin = session.get('es_admin', False)
+    try:
+        año, mes = _periodo_del_request()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
 
-    if not (es_socia or es_admin):
-        return jsonify({'error': 'No autorizado'}), 403
+    return jsonify(calcular_rentabilidad_por_area(año, mes))
 
-    año = request.args.get('año', datetime.now().year, type=int)
-    mes = request.args.get('mes', type=int)
+
+def ingresos_proyectados_por_area(año):
+    """
+    Ingreso mensual proyectado vigente en el año, por área (1 query).
+
+    Returns:
+        dict: {area_id: ingreso_mensual_uf}
+    """
+    ingresos = {}
+    filas = db.session.query(
+        IngresoProyectadoArea.area_id, IngresoProyectadoArea.año, IngresoProyectadoArea.ingreso_mensual_uf
+    ).order_by(IngresoProyectadoArea.area_id, IngresoProyectadoArea.año).all()
+
+    for area_id, año_fila, ingreso_mensual in filas:
+        # Primer año cargado, o el último año cargado que no supera el pedido
+        if area_id not in ingresos or año_fila <= año:
+            ingresos[area_id] = ingreso_mensual
+    return ingresos
+
+
+@resultado_en_cache(*TABLAS_RENTABILIDAD, 'areas', 'ingresos_proyectados_area')
+def calcular_rentabilidad_por_area(año, mes=None):
+    """
+    Rentabilidad por área del período (mismo resultado para todas las socias/admin).
+    En caché por (año, mes) y versión de los datos.
+
+    Totales, detalle por cliente y detalle por persona salen de una consulta
+    agrupada cada uno sobre el resumen mensual.
+
+    Para el año completo el ingreso del área es el mensual proyectado por los
+    meses del año con horas registradas, el mismo período que cubren los costos.
+    """
+    from resumen_horas import filtrar_periodo, horas_agrupadas
 
     # Calcular overhead total del período
-    overhead_data = calcular_overhead_distribuido(año, mes)
+    overhead_data = obtener_overhead_distribuido(año, mes)
     overhead_total_uf = overhead_data['overhead_total_uf']
-    total_horas_periodo = overhead_data['total_horas_asignadas']
 
-    areas_rentabilidad = []
-    areas = Area.query.filter_by(activo=True).all()
+    # Horas y costos directos por área, y meses del período con horas registradas
+    horas_por_area = defaultdict(lambda: (0, 0))
+    meses_con_datos = set()
+    for area_id, mes_fila, horas, costos in filtrar_periodo(
+        horas_agrupadas(ResumenHorasMensual.area_id, ResumenHorasMensual.mes), año, mes
+    ).all():
+        horas_area, costos_area = horas_por_area[area_id]
+        horas_por_area[area_id] = (horas_area + (horas or 0), costos_area + (costos or 0))
+        meses_con_datos.add(mes_fila)
+    total_horas_periodo = sum(horas for horas, _ in horas_por_area.values())
+
+    # Horas por área y cliente
+    clientes_por_area = defaultdict(list)
+    for area_id, _, nombre_cliente, horas_cliente, _ in filtrar_periodo(
+        horas_agrupadas(ResumenHorasMensual.area_id, ResumenHorasMensual.cliente_id, Cliente.nombre)
+        .join(Cliente, Cliente.id == ResumenHorasMensual.cliente_id), año, mes
+    ).order_by(ResumenHorasMensual.area_id, ResumenHorasMensual.cliente_id).all():
+        if horas_cliente > 0:
+            clientes_por_area[area_id].append({
+                'nombre': nombre_cliente,
+                'horas': round(horas_cliente, 1)
+            })
 
-    for area in areas:
-        # Calcular costos directos (horas trabajadas en esta área)
-        query_horas = RegistroHora.query.filter_by(area_id=area.id).filter(
-            extract('year', RegistroHora.fecha) == año
-        )
-        if mes:
-            query_horas = query_horas.filter(extract('month', RegistroHora.fecha) == mes)
+    # Horas y costo por área y persona
+    personas_por_area = defaultdict(dict)
+    for area_id, persona_id, nombre_persona, horas_persona, costo_persona in filtrar_periodo(
+        horas_agrupadas(ResumenHorasMensual.area_id, ResumenHorasMensual.persona_id, Persona.nombre)
+        .join(Persona, Persona.id == ResumenHorasMensual.persona_id), año, mes
+    ).order_by(ResumenHorasMensual.area_id, ResumenHorasMensual.persona_id).all():
+        personas_por_area[area_id][persona_id] = {
+            'nombre': nombre_persona,
+            'horas': horas_persona or 0,
+            'costo_uf': costo_persona or 0
+        }
 
-        registros_horas = query_horas.all()
-        total_horas = sum(r.horas for r in registros_horas)
-        costos_directos = sum(r.costo_uf for r in registros_horas)
+    # Personas asignadas a cada área (según area_principal_id)
+    asignadas_por_area = defaultdict(list)
+    for persona_id, nombre_persona, area_id in db.session.query(
+        Persona.id, Persona.nombre, Persona.area_principal_id
+    ).filter(Persona.activo == True, Persona.area_principal_id.isnot(None)).order_by(Persona.id).all():
+        asignadas_por_area[area_id].append((persona_id, nombre_persona))
+
+    ingresos_mensuales_por_area = ingresos_proyectados_por_area(año)
+
+    areas_rentabilidad = []
+    for area in Area.query.filter_by(activo=True).all():
+        # Costos directos (horas trabajadas en esta área)
+        total_horas, costos_directos = horas_por_area.get(area.id, (0, 0))
 
         # Calcular overhead proporcional del área
         overhead_area = 0
@@ -2270,79 +2481,22 @@ def api_rentabilidad_por_area():
         # Costo total = costos directos + overhead
         total_costos = costos_directos + overhead_area
 
-        # Calcular ingresos por área: basado en Facturación por área 2025
-        # Ingresos mensuales proyectados fijos por área (desde Excel)
-        # Total: 5,586.9 UF/mes (67,043 UF/año)
-        INGRESOS_MENSUALES_POR_AREA = {
-            'Externas': 3604.9,           # Comunicaciones externas
-            'Asuntos Públicos': 270.0,     # AAPP
-            'Redes Sociales': 874.4,       # Redes sociales
-            'Diseño': 292.6,               # Diseño
-            'Internas': 545.0              # Comunicaciones internas
-        }
-
-        # Ingresos base mensuales del área
-        ingreso_mensual_area = INGRESOS_MENSUALES_POR_AREA.get(area.nombre, 0)
+        # Ingresos base mensuales del área (tabla ingresos_proyectados_area)
+        ingreso_mensual_area = ingresos_mensuales_por_area.get(area.id, 0)
 
         # Si se pide un mes específico, usar el valor mensual
-        # Si se pide todo el año, multiplicar por meses transcurridos o 12
+        # Si se pide todo el año, multiplicar por los meses con horas registradas
         if mes:
             total_ingresos = ingreso_mensual_area
         else:
-            # Para el año completo: asumir proyección anual (12 meses)
-            # O calcular solo meses con datos reales
-            meses_con_datos = 10 if año == 2025 else 12  # ENE-OCT 2025
-            total_ingresos = ingreso_mensual_area * meses_con_datos
-
-        # Obtener clientes que trabajaron en esta área (para el detalle)
-        clientes_en_area = db.session.query(RegistroHora.cliente_id).filter(
-            RegistroHora.area_id == area.id,
-            extract('year', RegistroHora.fecha) == año
-        )
-        if mes:
-            clientes_en_area = clientes_en_area.filter(extract('month', RegistroHora.fecha) == mes)
-
-        clientes_ids = [c[0] for c in clientes_en_area.distinct().all()]
+            total_ingresos = ingreso_mensual_area * len(meses_con_datos)
 
         # Calcular margen
         utilidad = total_ingresos - total_costos
         margen_porcentaje = (utilidad / total_ingresos * 100) if total_ingresos > 0 else 0
 
-        # Obtener clientes que trabajaron en esta área
-        clientes_area = []
-        for cliente_id in clientes_ids:
-            cliente = Cliente.query.get(cliente_id)
-            if cliente:
-                horas_cliente_area_query = RegistroHora.query.filter_by(cliente_id=cliente_id, area_id=area.id).filter(
-                    extract('year', RegistroHora.fecha) == año
-                )
-                if mes:
-                    horas_cliente_area_query = horas_cliente_area_query.filter(extract('month', RegistroHora.fecha) == mes)
-
-                horas_cliente = sum(r.horas for r in horas_cliente_area_query.all())
-
-                if horas_cliente > 0:
-                    clientes_area.append({
-                        'nombre': cliente.nombre,
-                        'horas': round(horas_cliente, 1)
-                    })
-
-        # Obtener personas que trabajaron en esta área
-        personas_area = {}
-        for registro in registros_horas:
-            persona_id = registro.persona_id
-            if persona_id not in personas_area:
-                persona = Persona.query.get(persona_id)
-                if persona:
-                    personas_area[persona_id] = {
-                        'nombre': persona.nombre,
-                        'horas': 0,
-                        'costo_uf': 0
-                    }
-            personas_area[persona_id]['horas'] += registro.horas
-            personas_area[persona_id]['costo_uf'] += registro.costo_uf
-
-        # Convertir a lista y ordenar por horas
+        # Personas que trabajaron en esta área, ordenadas por horas
+        personas_area = personas_por_area.get(area.id, {})
         personas_lista = sorted(
             [{'nombre': p['nombre'], 'horas': round(p['horas'], 1), 'costo_uf': round(p['costo_uf'], 1)}
              for p in personas_area.values()],
@@ -2350,13 +2504,11 @@ def api_rentabilidad_por_area():
             reverse=True
         )
 
-        # Agregar personas asignadas a esta área (según area_principal_id) aunque no hayan registrado horas
-        personas_asignadas = Persona.query.filter_by(area_principal_id=area.id, activo=True).all()
-        for persona in personas_asignadas:
-            # Si no está en la lista de personas que trabajaron, agregarla con 0 horas
-            if persona.id not in personas_area:
+        # Agregar personas asignadas a esta área aunque no hayan registrado horas
+        for persona_id, nombre_persona in asignadas_por_area.get(area.id, []):
+            if persona_id not in personas_area:
                 personas_lista.append({
-                    'nombre': persona.nombre,
+                    'nombre': nombre_persona,
                     'horas': 0,
                     'costo_uf': 0
                 })
@@ -2371,95 +2523,277 @@ def api_rentabilidad_por_area():
             'utilidad_uf': round(utilidad, 1),
             'margen': round(margen_porcentaje, 1),
             'horas': round(total_horas, 1),
-            'clientes': clientes_area,
+            'clientes': clientes_por_area.get(area.id, []),
             'personas': personas_lista
         })
 
     # Ordenar por margen descendente
     areas_rentabilidad.sort(key=lambda x: x['margen'], reverse=True)
 
-    # Debug logging
-    print(f"[DEBUG] Rentabilidad áreas - Total áreas activas: {len(areas)}")
-    print(f"[DEBUG] Total áreas en resultado: {len(areas_rentabilidad)}")
-    print(f"[DEBUG] Áreas en resultado:")
-    for area in areas_rentabilidad:
-        print(f"  - {area['area']}: {area['horas']} horas, {area['ingresos_uf']} UF ingresos, {area['costos_uf']} UF costos")
-
-    return jsonify(areas_rentabilidad)
+    return areas_rentabilidad
 
 
 @app.route('/api/top-clientes-rentables')
 @login_required
+@api_socia_required
+@respuesta_condicional(*TABLAS_RENTABILIDAD)
 def api_top_clientes_rentables():
-    """API: Top clientes más rentables con separación de costos variables y fijos"""
-    es_socia = session.get('es_socia', False)
-    es_admin = session.get('es_admin', False)
-
-    if not (es_socia or es_admin):
-        return jsonify({'error': 'No autorizado'}), 403
+    """
+    API: Top clientes más rentables con separación de costos variables y fijos
 
+    Parámetros: año, top (0 = todos, default 5) u offset/limit para paginar
+    (limit entre 1 y MAXIMO_RANKING_CLIENTES),
+    orden (utilidad, margen o ingresos; descendente). El total de clientes va
+    en el encabezado X-Total-Count.
+    """
     año = request.args.get('año', datetime.now().year, type=int)
     top = request.args.get('top', 5, type=int)
+    limit = request.args.get('limit', top or None, type=int)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    orden = request.args.get('orden', 'utilidad')
 
+    # LIMIT negativo: en SQLite significa "sin límite", en PostgreSQL es un error
+    if top < 0 or (limit is not None and not 1 <= limit <= MAXIMO_RANKING_CLIENTES):
+        return jsonify({'error': f'top/limit debe estar entre 1 y {MAXIMO_RANKING_CLIENTES} (top=0 para todos)'}), 400
+    if orden not in ORDENES_RANKING_CLIENTES:
+        return jsonify({'error': f"orden debe ser uno de: {', '.join(ORDENES_RANKING_CLIENTES)}"}), 400
+
+    ranking = calcular_clientes_rentables(año, orden, offset, limit)
+    return jsonify(ranking['clientes']), 200, {'X-Total-Count': str(ranking['total'])}
+
+
+# Clientes que no son clientes reales (agrupadores del Excel, la propia empresa)
+CLIENTES_EXCLUIDOS_RANKING = ('CLIENTES PERMANENTES', 'COMSULTING')
+
+ORDENES_RANKING_CLIENTES = ('utilidad', 'margen', 'ingresos')
+MAXIMO_RANKING_CLIENTES = 500  # Filas por página con limit/top
+
+
+@resultado_en_cache(*TABLAS_RENTABILIDAD)
+def calcular_clientes_rentables(año, orden='utilidad', offset=0, limit=None):
+    """
+    Ranking de clientes con ingresos del año (descendente por `orden`).
+    En caché por argumentos y versión de los datos.
+
+    Ingresos, costos directos y overhead asignado (proporcional a ingresos, ver
+    calcular_overhead_distribuido) se calculan y ordenan en una sola consulta
+    agrupada con ORDER BY ... LIMIT/OFFSET, así el top 5 y la lista completa
+    cuestan las mismas consultas.
+
+    Returns:
+        dict: {'total': clientes con ingresos, 'clientes': [página del ranking]}
+    """
     # Calcular overhead distribuido
-    overhead_info = calcular_overhead_distribuido(año, mes=None)
+    overhead_info = obtener_overhead_distribuido(año, mes=None)
     distribucion_overhead = overhead_info['distribucion_por_cliente']
+    total_ingresos_año = overhead_info['total_ingresos']
+    factor_overhead = overhead_info['overhead_total_uf'] / total_ingresos_año if total_ingresos_año > 0 else 0
 
-    clientes_analisis = []
-    clientes = Cliente.query.filter_by(activo=True).all()
+    ingresos_sq = db.session.query(
+        ServicioCliente.cliente_id.label('cliente_id'),
+        func.sum(IngresoMensual.ingreso_uf).label('ingresos')
+    ).join(
+        IngresoMensual, ServicioCliente.id == IngresoMensual.servicio_id
+    ).filter(
+        IngresoMensual.año == año
+    ).group_by(ServicioCliente.cliente_id).subquery()
 
-    for cliente in clientes:
-        if cliente.nombre in ['CLIENTES PERMANENTES', 'COMSULTING']:
-            continue
+    costos_sq = db.session.query(
+        ResumenHorasMensual.cliente_id.label('cliente_id'),
+        func.sum(ResumenHorasMensual.costo_uf).label('costos')
+    ).filter(
+        ResumenHorasMensual.año == año
+    ).group_by(ResumenHorasMensual.cliente_id).subquery()
+
+    ingresos = ingresos_sq.c.ingresos
+    costos_directos = func.coalesce(costos_sq.c.costos, 0)
+    utilidad = ingresos - costos_directos - ingresos * factor_overhead
+    criterios = {
+        'utilidad': utilidad,
+        'margen': utilidad / ingresos,
+        'ingresos': ingresos,
+    }
 
-        # Calcular ingresos del cliente
-        ingresos_cliente_query = IngresoMensual.query.join(ServicioCliente).filter(
-            ServicioCliente.cliente_id == cliente.id,
-            IngresoMensual.año == año
-        )
-        ingresos_cliente = ingresos_cliente_query.all()
-        total_ingresos = sum(i.ingreso_uf for i in ingresos_cliente)
+    query = db.session.query(
+        Cliente.id, Cliente.nombre, ingresos, costos_directos,
+        func.count().over().label('total')
+    ).join(
+        ingresos_sq, ingresos_sq.c.cliente_id == Cliente.id
+    ).outerjoin(
+        costos_sq, costos_sq.c.cliente_id == Cliente.id
+    ).filter(
+        Cliente.activo == True,
+        Cliente.nombre.notin_(CLIENTES_EXCLUIDOS_RANKING),
+        ingresos > 0
+    )
+    filas = query.order_by(criterios[orden].desc(), Cliente.id).offset(offset).limit(limit).all()
 
-        # Calcular costos directos (horas trabajadas en este cliente)
-        registros_horas = RegistroHora.query.filter_by(cliente_id=cliente.id).filter(
-            extract('year', RegistroHora.fecha) == año
-        ).all()
-        costos_directos = sum(r.costo_uf for r in registros_horas)
+    # Página fuera de rango: el total no viene en ninguna fila
+    total = filas[0].total if filas else (query.count() if offset else 0)
+
+    clientes_analisis = []
+    for cliente_id, nombre, total_ingresos, costos_cliente, _ in filas:
+        costos_cliente = costos_cliente or 0
 
         # Obtener overhead asignado
-        overhead_cliente = distribucion_overhead.get(cliente.id, 0)
+        overhead_cliente = distribucion_overhead.get(cliente_id, 0)
 
         # Costos totales = directos + overhead
-        total_costos = costos_directos + overhead_cliente
+        total_costos = costos_cliente + overhead_cliente
 
         # Calcular margen CON overhead
         utilidad_neta = total_ingresos - total_costos
-        margen_porcentaje = (utilidad_neta / total_ingresos * 100) if total_ingresos > 0 else 0
+        margen_porcentaje = utilidad_neta / total_ingresos * 100
 
-        if total_ingresos > 0:
-            clientes_analisis.append({
-                'cliente': cliente.nombre,
-                'ingresos_uf': round(total_ingresos, 1),
-                'costos_directos_uf': round(costos_directos, 1),  # Costo Variable (Horas)
-                'overhead_uf': round(overhead_cliente, 1),  # Costo Fijo (Overhead)
-                'costos_uf': round(total_costos, 1),  # Total
-                'utilidad_neta_uf': round(utilidad_neta, 1),
-                'margen': round(margen_porcentaje, 1)
-            })
+        clientes_analisis.append({
+            'cliente': nombre,
+            'ingresos_uf': round(total_ingresos, 1),
+            'costos_directos_uf': round(costos_cliente, 1),  # Costo Variable (Horas)
+            'overhead_uf': round(overhead_cliente, 1),  # Costo Fijo (Overhead)
+            'costos_uf': round(total_costos, 1),  # Total
+            'utilidad_neta_uf': round(utilidad_neta, 1),
+            'margen': round(margen_porcentaje, 1)
+        })
 
-    # Ordenar por utilidad neta descendente
-    clientes_analisis.sort(key=lambda x: x['utilidad_neta_uf'], reverse=True)
+    return {'total': total, 'clientes': clientes_analisis}
 
-    # Debug logging
-    print(f"[DEBUG] Top clientes - Total clientes analizados: {len(clientes)}, Con ingresos: {len(clientes_analisis)}")
 
-    # Si top=0, devolver todos; si no, devolver solo el top
-    if top == 0:
-        print(f"[DEBUG] Devolviendo TODOS los clientes ({len(clientes_analisis)})")
-        return jsonify(clientes_analisis)
+# ============= EXPORTACIONES =============
+# CSV y Excel escritos en streaming (ver exportaciones.py)
+
+@app.route('/exportar/horas.<any(csv, xlsx):formato>')
+@login_required
+def exportar_horas(formato):
+    """Registros de horas visibles para el usuario, con los mismos filtros que /mis-horas"""
+    from sqlalchemy.orm import aliased
+    from exportaciones import respuesta_exportacion
+    from usuario_actual import usuario_actual
+
+    try:
+        query, filtros = _consulta_mis_horas(usuario_actual())
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+
+    # Alias: Persona ya aparece en la subconsulta de visibilidad
+    persona, cliente, area, servicio, tarea = (aliased(Persona), aliased(Cliente), aliased(Area),
+                                               aliased(Servicio), aliased(Tarea))
+    filas = (
+        query.with_entities(
+            RegistroHora.fecha, persona.nombre, persona.email, cliente.nombre, area.nombre,
+            servicio.nombre, tarea.nombre, RegistroHora.horas, RegistroHora.costo_uf,
+            RegistroHora.descripcion
+        )
+        .outerjoin(persona, persona.id == RegistroHora.persona_id)
+        .outerjoin(cliente, cliente.id == RegistroHora.cliente_id)
+        .outerjoin(area, area.id == RegistroHora.area_id)
+        .outerjoin(servicio, servicio.id == RegistroHora.servicio_id)
+        .outerjoin(tarea, tarea.id == RegistroHora.tarea_id)
+        .order_by(RegistroHora.fecha, RegistroHora.id)
+        .yield_per(2000)  # PostgreSQL: cursor del lado del servidor
+    )
+
+    if filtros['desde'] or filtros['hasta']:
+        nombre = f"horas_{filtros['desde'] or 'inicio'}_{filtros['hasta'] or 'hoy'}"
+    else:
+        nombre = f"horas_{filtros['año']}" + (f"_{filtros['mes']:02d}" if filtros['mes'] else '')
+
+    return respuesta_exportacion(
+        nombre, formato,
+        ['Fecha', 'Persona', 'Email', 'Cliente', 'Área', 'Servicio', 'Tarea', 'Horas', 'Costo UF', 'Descripción'],
+        filas
+    )
+
+
+@app.route('/exportar/rentabilidad-<any(clientes, servicios, areas):tabla>.<any(csv, xlsx):formato>')
+@socia_required
+def exportar_rentabilidad(tabla, formato):
+    """Tablas de /rentabilidad (clientes, servicios o áreas) del período"""
+    from exportaciones import respuesta_exportacion
+    from motor_rentabilidad import calcular_rentabilidad
+
+    try:
+        año, mes = _periodo_del_request()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    resultado = calcular_rentabilidad(año, mes)
+    nombre = f'rentabilidad_{tabla}_{año}' + (f'_{mes:02d}' if mes else '')
+
+    if tabla == 'clientes':
+        encabezados = ['Cliente', 'Ingresos UF', 'Horas', 'Costos directos UF', 'Overhead UF',
+                       'Costos UF', 'Margen UF', 'Margen %']
+        filas = (
+            (c['cliente'].nombre, c['ingresos'], c['horas'], c['costos_directos'], c['overhead'],
+             c['costos'], c['margen'], c['margen_porcentaje'])
+            for c in resultado['clientes_analisis']
+        )
+    elif tabla == 'servicios':
+        encabezados = ['Cliente', 'Servicio', 'Ingresos UF', 'Horas', 'Costos UF', 'Margen UF', 'Margen %']
+        filas = (
+            (c['cliente'].nombre, s['servicio'].nombre, s['ingresos'], s['horas'], s['costos'],
+             s['margen'], s['margen_porcentaje'])
+            for c in resultado['clientes_analisis'] for s in c['servicios']
+        )
     else:
-        print(f"[DEBUG] Top {top} clientes: {clientes_analisis[:top]}")
-        return jsonify(clientes_analisis[:top])
+        encabezados = ['Área', 'Ingresos UF', 'Horas', 'Costos UF', 'Margen UF', 'Margen %']
+        filas = (
+            (a['area'].nombre, a['ingresos'], a['horas'], a['costos'], a['margen'], a['margen_porcentaje'])
+            for a in resultado['areas_analisis']
+        )
+
+    return respuesta_exportacion(nombre, formato, encabezados, filas)
+
+
+@app.route('/exportar/productividad-personas.<any(csv, xlsx):formato>')
+@socia_required
+def exportar_productividad_personas(formato):
+    """Tabla de /productividad/personas del mes"""
+    from exportaciones import respuesta_exportacion
+
+    try:
+        año, mes = _periodo_del_request(datetime.now().month)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    productividad_data, _ = calcular_productividad_personas(año, mes)
+
+    return respuesta_exportacion(
+        f'productividad_personas_{año}_{mes:02d}', formato,
+        ['Persona', 'Cargo', 'Horas disponibles', 'Horas asignadas', 'Ocupación %', 'Horas restantes'],
+        (
+            (p['persona'].nombre, p['persona'].cargo, p['horas_disponibles'], p['horas_asignadas'],
+             p['porcentaje_ocupacion'], p['horas_disponibles_restantes'])
+            for p in productividad_data
+        )
+    )
+
+
+# ============= RENDIMIENTO =============
+
+@app.route('/admin/perf')
+@admin_required
+def admin_perf():
+    """Requests recientes de este proceso: consultas SQL, tiempos e histograma por endpoint"""
+    from instrumentacion import ACTIVA, requests_recientes, resumen_por_endpoint
+    from cache_resultados import estadisticas_cache
+
+    return render_template('admin_perf.html',
+                          activa=ACTIVA,
+                          endpoints=resumen_por_endpoint(),
+                          recientes=requests_recientes(50),
+                          cache=estadisticas_cache())
+
+
+@app.route('/admin/consultas-lentas')
+@admin_required
+def admin_consultas_lentas():
+    """Consultas lentas guardadas con su plan de ejecución (CONSULTAS_LENTAS_MS)"""
+    from consultas_lentas import UMBRAL_MS, GUARDADAS, consultas_guardadas, resumen_por_sentencia
+
+    consultas = consultas_guardadas()
+    return render_template('admin_consultas_lentas.html',
+                          umbral_ms=UMBRAL_MS,
+                          guardadas=GUARDADAS,
+                          consultas=consultas[:100],
+                          sentencias=resumen_por_sentencia(consultas))
 
 
 # ============= INICIALIZACIÓN =============
@@ -0,0 +1,19 @@
+"""
+Benchmark de rutas y APIs con datos sintéticos
+
+    datos_sinteticos.py  Genera una base completa (personas con jerarquía, áreas,
+                         servicios, tareas, clientes permanentes y spot, ingresos,
+                         overhead y años de horas) con semilla fija y escala
+                         configurable (1 = tamaño real aproximado, 10 = 10×)
+    ejecutar.py          Mide cada ruta GET con el test client de Flask y escribe
+                         p50/p95 de latencia y número de consultas SQL en JSON
+
+Ambos usan DATABASE_URL como app.py (SQLite o PostgreSQL local). Nunca apuntar
+a producción: el generador borra y recrea todas las tablas.
+
+Uso:
+    export DATABASE_URL=sqlite:////tmp/benchmark.db
+    python -m benchmark.datos_sinteticos --ejecutar --escala 10
+    python -m benchmark.ejecutar --salida resultados.json
+    python -m benchmark.ejecutar --comparar resultados.json   # Falla si hay regresiones
+"""
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para el benchmark
+
+Reemplaza a generar_datos_prueba.py (usaba modelos que ya no existen). Crea una
+base completa con el esquema actual:
+
+    - Áreas, servicios y tareas (catálogo de crear_areas_iniciales.py)
+    - Personas con jerarquía: socias → directores → consultores, área principal,
+      tarifas con reajuste anual (tarifas_personas) y un usuario admin para el
+      benchmark (benchmark@comsulting.cl / benchmark)
+    - Clientes permanentes y spot con sus ServicioCliente (mensuales y spot con
+      fechas), cambios de valor (historico_servicios) e ingresos mensuales
+    - Gastos overhead, valores UF e ingresos proyectados por área y año
+    - Registros de horas de cada día hábil del período, con costo hora y huella,
+      y el resumen mensual reconstruido al final
+
+La semilla es fija, así que la misma escala produce siempre los mismos datos y
+los resultados del benchmark son comparables entre ejecuciones.
+
+Escala 1 ≈ tamaño real (40 personas, 120 clientes, ~40.000 registros por año);
+escala 10 multiplica personas, clientes y horas.
+
+BORRA Y RECREA TODAS LAS TABLAS de la base de DATABASE_URL.
+
+Uso:
+    python -m benchmark.datos_sinteticos                                # Simulación
+    python -m benchmark.datos_sinteticos --ejecutar
+    python -m benchmark.datos_sinteticos --ejecutar --escala 10 --años 3
+    python -m benchmark.datos_sinteticos --ejecutar --reemplazar        # Base con datos
+"""
+
+import hashlib
+import random
+import sys
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import (
+    app, db, Area, Servicio, Tarea, Persona, Cliente, ServicioCliente, IngresoMensual,
+    IngresoProyectadoArea, HistoricoServicio, RegistroHora, GastoOverhead, TarifaPersona,
+    ValorUF, calcular_costo_hora_uf
+)
+
+SEMILLA = 42
+TAMAÑO_LOTE = 5000
+
+EMAIL_BENCHMARK = 'benchmark@comsulting.cl'
+PASSWORD_BENCHMARK = 'benchmark'
+
+# ============= TAMAÑO A ESCALA 1 =============
+PERSONAS = 40
+CLIENTES = 120
+PROPORCION_SPOT = 0.3             # Clientes spot sobre el total
+REGISTROS_POR_DIA = (2, 6)        # Registros por persona por día hábil
+PROPORCION_INTERNAS = 0.1         # Horas sin cliente (gestión interna)
+
+AREAS_SERVICIOS = {
+    'Externas': ['Comunicaciones externas', 'Gestión de Crisis', 'Talleres de vocería', 'Monitoreo'],
+    'Internas': ['Comunicaciones internas'],
+    'Asuntos Públicos': ['Asuntos Públicos'],
+    'Redes Sociales': ['Estrategia y gestión de redes', 'Monitoreo digital'],
+    'Diseño': ['Diseño', 'Memorias', 'Desarrollo web'],
+}
+
+# Peso de cada área en la dotación y en los ingresos proyectados (UF/mes a escala 1)
+PESO_AREAS = {'Externas': 0.45, 'Internas': 0.15, 'Asuntos Públicos': 0.1, 'Redes Sociales': 0.18, 'Diseño': 0.12}
+INGRESO_PROYECTADO_AREAS = {
+    'Externas': 3604.9, 'Asuntos Públicos': 270.0, 'Redes Sociales': 874.4, 'Diseño': 292.6, 'Internas': 545.0
+}
+
+TAREAS = [
+    'Reunión con cliente', 'Redacción de contenidos', 'Reporte mensual',
+    'Coordinación interna', 'Preparación de presentación', 'Seguimiento de prensa',
+]
+
+DESCRIPCIONES = ['', '', '', 'Reunión semanal', 'Ajustes solicitados por el cliente', 'Revisión de borrador']
+
+NOMBRES = ['Ana', 'Camila', 'Carolina', 'Francisca', 'Javiera', 'María José', 'Valentina', 'Daniela',
+           'Tomás', 'Felipe', 'Sebastián', 'Matías', 'Cristóbal', 'Nicolás', 'Ignacio', 'Diego']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva',
+             'Martínez', 'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres']
+RUBROS = ['Minera', 'Banco', 'Retail', 'Isapre', 'Forestal', 'Energía', 'Inmobiliaria', 'Viña',
+          'Salmonera', 'Telecomunicaciones', 'Fundación', 'Universidad', 'AFP', 'Clínica']
+
+# (concepto, categoría, pesos mensuales a escala 1)
+GASTOS_OVERHEAD = [
+    ('Arriendo oficina', 'Oficina', 9_500_000),
+    ('Gastos comunes', 'Oficina', 1_200_000),
+    ('Sueldos administración', 'Administrativo', 12_000_000),
+    ('Contabilidad y auditoría', 'Administrativo', 1_800_000),
+    ('Licencias de software', 'Servicios', 2_300_000),
+    ('Telefonía e internet', 'Servicios', 650_000),
+    ('Suscripciones de prensa', 'Servicios', 900_000),
+    ('Capacitación', 'Personas', 1_100_000),
+]
+
+# (cargo, costo mensual empresa en pesos a escala 1)
+CARGOS = {
+    'socia': ('Socia', 9_000_000),
+    'director': ('Director', 5_500_000),
+    'consultor': ('Consultor', 2_400_000),
+}
+
+
+# ============= FECHAS =============
+
+def meses_entre(desde, hasta):
+    """(año, mes) desde el mes de `desde` hasta el mes de `hasta`, inclusive"""
+    año, mes = desde.year, desde.month
+    while (año, mes) <= (hasta.year, hasta.month):
+        yield año, mes
+        año, mes = (año + 1, 1) if mes == 12 else (año, mes + 1)
+
+
+def dias_habiles(desde, hasta):
+    """Días de lunes a viernes entre desde y hasta, inclusive"""
+    dia = desde
+    while dia <= hasta:
+        if dia.weekday() < 5:
+            yield dia
+        dia += timedelta(days=1)
+
+
+def fecha_al_azar(rng, desde, hasta):
+    return desde + timedelta(days=rng.randrange((hasta - desde).days + 1))
+
+
+def vigente(vigencias, fecha):
+    """Valor vigente a la fecha en [(desde, valor)] ordenado (el primero rige hacia atrás)"""
+    indice = max(bisect_right(vigencias, (fecha, float('inf'))) - 1, 0)
+    return vigencias[indice][1]
+
+
+# ============= GENERADOR =============
+
+class GeneradorDatos:
+    """Crea todos los datos de una escala con un random.Random de semilla fija"""
+
+    def __init__(self, escala=1, años=2, semilla=SEMILLA, hasta=None):
+        self.rng = random.Random(semilla)
+        self.escala = escala
+        self.hasta = hasta or date.today()
+        self.desde = date(self.hasta.year - años + 1, 1, 1)
+
+        self.areas = {}             # nombre -> Area
+        self.servicios = {}         # area_id -> [Servicio]
+        self.tareas = {}            # servicio_id -> [tarea_id]
+        self.personas = []          # [Persona]
+        self.tarifas = {}           # persona_id -> [(desde, costo mensual)]
+        self.valores_uf = []        # [(fecha, valor)]
+        self.cartera = {}           # persona_id -> [(cliente_id, servicio_cliente_id)]
+        self.servicios_cliente = []  # [(Cliente, ServicioCliente)]
+
+    def cantidad(self, base, minimo=1):
+        return max(minimo, round(base * self.escala))
+
+    def catalogo(self):
+        servicios_area = {}
+        for nombre, servicios in AREAS_SERVICIOS.items():
+            area = Area(nombre=nombre, activo=True)
+            self.areas[nombre] = area
+            servicios_area[nombre] = [Servicio(area=area, nombre=s, activo=True) for s in servicios]
+            db.session.add(area)
+            db.session.add_all(servicios_area[nombre])
+        db.session.flush()
+
+        for nombre, area in self.areas.items():
+            self.servicios[area.id] = servicios_area[nombre]
+            for servicio in self.servicios[area.id]:
+                tareas = [Tarea(servicio_id=servicio.id, nombre=tarea, activo=True) for tarea in TAREAS]
+                db.session.add_all(tareas)
+                db.session.flush()
+                self.tareas[servicio.id] = [tarea.id for tarea in tareas]
+
+    def uf(self):
+        valor = 37_000.0
+        for año, mes in meses_entre(self.desde, self.hasta):
+            self.valores_uf.append((date(año, mes, 1), round(valor, 2)))
+            valor *= 1 + self.rng.uniform(0.001, 0.006)
+        db.session.execute(insert(ValorUF), [{'fecha': f, 'valor': v} for f, v in self.valores_uf])
+
+    def _persona(self, indice, rol, area, supervisor=None, email=None):
+        cargo, costo_base = CARGOS[rol]
+        nombre = f"{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)}"
+        persona = Persona(
+            nombre=nombre,
+            email=email or f"persona{indice:04d}@comsulting.cl",
+            password_hash=hashlib.sha256(PASSWORD_BENCHMARK.encode()).hexdigest(),
+            cargo=cargo,
+            es_socia=rol == 'socia',
+            activo=True,
+            fecha_ingreso=fecha_al_azar(self.rng, self.desde - timedelta(days=3 * 365), self.desde),
+            supervisor=supervisor,
+            area_principal=area,
+            costo_mensual_empresa=round(costo_base * self.rng.uniform(0.8, 1.25), -3),
+        )
+        db.session.add(persona)
+        self.personas.append(persona)
+        return persona
+
+    def personal(self):
+        """Socias → directores (uno o más por área) → consultores del área del director"""
+        total = self.cantidad(PERSONAS, minimo=len(AREAS_SERVICIOS) * 2)
+        n_socias = max(2, total // 12)
+        areas = list(self.areas.values())
+        pesos = [PESO_AREAS[area.nombre] for area in areas]
+
+        socias = [self._persona(i, 'socia', areas[i % len(areas)]) for i in range(n_socias)]
+        directores = [
+            self._persona(n_socias + i, 'director', areas[i % len(areas)], socias[i % n_socias])
+            for i in range(max(len(areas), total // 6))
+        ]
+        for i in range(n_socias + len(directores), total):
+            area = self.rng.choices(areas, pesos)[0]
+            supervisor = self.rng.choice([d for d in directores if d.area_principal is area])
+            self._persona(i, 'consultor', area, supervisor)
+
+        # Usuario del benchmark: admin y socia, ve todas las rutas
+        admin = socias[0]
+        admin.email = EMAIL_BENCHMARK
+        admin.es_admin = True
+        db.session.flush()
+
+        # Tarifa inicial y reajuste cada enero para la mitad del equipo
+        filas = []
+        for persona in self.personas:
+            costo = persona.costo_mensual_empresa
+            vigencias = [(self.desde, costo)]
+            for año in range(self.desde.year + 1, self.hasta.year + 1):
+                if self.rng.random() < 0.5:
+                    costo = round(costo * self.rng.uniform(1.03, 1.08), -3)
+                    vigencias.append((date(año, 1, 1), costo))
+            persona.costo_mensual_empresa = costo
+            self.tarifas[persona.id] = vigencias
+            filas.extend(
+                {'persona_id': persona.id, 'vigente_desde': desde, 'costo_mensual_empresa': valor}
+                for desde, valor in vigencias
+            )
+        db.session.execute(insert(TarifaPersona), filas)
+
+    def clientes(self):
+        total = self.cantidad(CLIENTES)
+        ingresos = []
+        historicos = []
+
+        for i in range(total):
+            spot = self.rng.random() < PROPORCION_SPOT
+            cliente = Cliente(
+                nombre=f"{self.rng.choice(RUBROS)} {i + 1:04d}",
+                tipo='spot' if spot else 'permanente',
+                activo=True,
+            )
+            db.session.add(cliente)
+
+            servicios = []
+            if not spot:
+                for _ in range(self.rng.randint(1, 3)):
+                    servicios.append(ServicioCliente(
+                        cliente=cliente,
+                        nombre=self.rng.choice(['Asesoría Comunicacional', 'Gestión de Redes', 'Monitoreo', 'Asuntos Públicos']),
+                        valor_mensual_uf=round(self.rng.uniform(30, 350), 1),
+                        es_spot=False,
+                        fecha_inicio=fecha_al_azar(self.rng, self.desde - timedelta(days=365), self.hasta),
+                        activo=True,
+                    ))
+            if spot or self.rng.random() < 0.2:
+                for _ in range(self.rng.randint(1, 2)):
+                    inicio = fecha_al_azar(self.rng, self.desde, self.hasta)
+                    servicios.append(ServicioCliente(
+                        cliente=cliente,
+                        nombre=self.rng.choice(['Taller de vocería', 'Memoria anual', 'Manejo de crisis', 'Evento']),
+                        valor_mensual_uf=round(self.rng.uniform(50, 600), 1),
+                        es_spot=True,
+                        fecha_inicio=inicio,
+                        fecha_fin=min(inicio + timedelta(days=self.rng.randint(20, 120)), self.hasta),
+                        activo=True,
+                    ))
+            db.session.add_all(servicios)
+            self.servicios_cliente.extend((cliente, servicio) for servicio in servicios)
+        db.session.flush()
+
+        for cliente, servicio in self.servicios_cliente:
+            inicio = max(servicio.fecha_inicio, self.desde)
+            if servicio.es_spot:
+                meses = list(meses_entre(inicio, servicio.fecha_fin))
+                for año, mes in meses:
+                    ingresos.append({
+                        'servicio_id': servicio.id, 'año': año, 'mes': mes,
+                        'ingreso_uf': round(servicio.valor_mensual_uf / len(meses), 2),
+                    })
+                continue
+
+            # Un 15% de los servicios mensuales cambia de valor una vez en el período
+            cambio = None
+            if self.rng.random() < 0.15 and inicio < self.hasta:
+                cambio = fecha_al_azar(self.rng, inicio, self.hasta)
+                valor_nuevo = round(servicio.valor_mensual_uf * self.rng.uniform(0.7, 1.5), 1)
+                historicos.append(HistoricoServicio(
+                    servicio_cliente_id=servicio.id,
+                    valor_anterior_uf=servicio.valor_mensual_uf,
+                    valor_nuevo_uf=valor_nuevo,
+                    fecha_cambio=cambio,
+                    motivo='Renegociación anual',
+                ))
+            for año, mes in meses_entre(inicio, self.hasta):
+                valor = servicio.valor_mensual_uf
+                if cambio and (año, mes) >= (cambio.year, cambio.month):
+                    valor = historicos[-1].valor_nuevo_uf
+                ingresos.append({'servicio_id': servicio.id, 'año': año, 'mes': mes, 'ingreso_uf': valor})
+            if cambio:
+                servicio.valor_mensual_uf = historicos[-1].valor_nuevo_uf
+
+        db.session.add_all(historicos)
+        for i in range(0, len(ingresos), TAMAÑO_LOTE):
+            db.session.execute(insert(IngresoMensual), ingresos[i:i + TAMAÑO_LOTE])
+
+        # Cartera de cada persona: clientes (y su servicio) en los que registra horas
+        asignables = [(cliente.id, servicio.id) for cliente, servicio in self.servicios_cliente]
+        for persona in self.personas:
+            self.cartera[persona.id] = self.rng.sample(asignables, min(len(asignables), self.rng.randint(3, 8)))
+
+    def overhead(self):
+        filas = []
+        proyectados = []
+        for año, mes in meses_entre(self.desde, self.hasta):
+            for concepto, categoria, monto in GASTOS_OVERHEAD:
+                filas.append({
+                    'año': año, 'mes': mes, 'concepto': concepto, 'categoria': categoria,
+                    'monto_pesos': round(monto * self.escala * self.rng.uniform(0.9, 1.1), -3),
+                })
+        for año in range(self.desde.year, self.hasta.year + 1):
+            for nombre, area in self.areas.items():
+                proyectados.append({
+                    'area_id': area.id, 'año': año,
+                    'ingreso_mensual_uf': round(INGRESO_PROYECTADO_AREAS[nombre] * self.escala, 1),
+                })
+        db.session.execute(insert(GastoOverhead), filas)
+        db.session.execute(insert(IngresoProyectadoArea), proyectados)
+
+    def registros_horas(self):
+        """Registros de cada persona en cada día hábil, insertados por lotes"""
+        from motor_importacion import huella_registro
+
+        servicios_area = {area_id: servicios for area_id, servicios in self.servicios.items()}
+        todos_servicios = [servicio for servicios in servicios_area.values() for servicio in servicios]
+        horas_posibles = [0.25, 0.5, 0.75, 1, 1, 1.5, 2, 2, 3, 4]
+
+        total = 0
+        lote = []
+        for dia in dias_habiles(self.desde, self.hasta):
+            for persona in self.personas:
+                costo_hora = calcular_costo_hora_uf(
+                    vigente(self.tarifas[persona.id], dia), vigente(self.valores_uf, dia)
+                )
+                for _ in range(self.rng.randint(*REGISTROS_POR_DIA)):
+                    if self.rng.random() < 0.85:
+                        servicio = self.rng.choice(servicios_area[persona.area_principal_id])
+                    else:
+                        servicio = self.rng.choice(todos_servicios)
+                    tarea_id = self.rng.choice(self.tareas[servicio.id])
+
+                    cliente_id = servicio_cliente_id = None
+                    if self.rng.random() >= PROPORCION_INTERNAS:
+                        cliente_id, servicio_cliente_id = self.rng.choice(self.cartera[persona.id])
+
+                    horas = self.rng.choice(horas_posibles)
+                    descripcion = self.rng.choice(DESCRIPCIONES)
+                    lote.append({
+                        'persona_id': persona.id,
+                        'area_id': servicio.area_id,
+                        'servicio_id': servicio.id,
+                        'tarea_id': tarea_id,
+                        'cliente_id': cliente_id,
+                        'servicio_cliente_id': servicio_cliente_id,
+                        'fecha': dia,
+                        'horas': horas,
+                        'descripcion': descripcion,
+                        'costo_hora_uf': costo_hora,
+                        'huella': huella_registro(
+                            persona.id, dia, cliente_id, servicio.id, tarea_id, horas, descripcion,
+                            origen='benchmark', id_origen=total + len(lote)
+                        ),
+                    })
+
+            if len(lote) >= TAMAÑO_LOTE:
+                db.session.execute(insert(RegistroHora), lote)
+                total += len(lote)
+                lote = []
+
+        if lote:
+            db.session.execute(insert(RegistroHora), lote)
+            total += len(lote)
+        return total
+
+    def generar(self):
+        """Genera todo y retorna {etapa: (filas, segundos)}"""
+        from resumen_horas import reconstruir_resumen
+
+        tiempos = {}
+
+        def etapa(nombre, funcion, contar):
+            inicio = time.time()
+            resultado = funcion()
+            db.session.commit()
+            filas = resultado if contar is None else contar()
+            tiempos[nombre] = (filas, time.time() - inicio)
+            print(f"  ✓ {nombre:<22} {filas:>10,} filas  {time.time() - inicio:>7.1f}s")
+
+        etapa('areas y servicios', self.catalogo, lambda: Servicio.query.count())
+        etapa('valores UF', self.uf, lambda: ValorUF.query.count())
+        etapa('personas', self.personal, lambda: len(self.personas))
+        etapa('servicios cliente', self.clientes, lambda: len(self.servicios_cliente))
+        etapa('gastos overhead', self.overhead, lambda: GastoOverhead.query.count())
+        etapa('registros horas', self.registros_horas, None)
+        etapa('resumen mensual', reconstruir_resumen, None)
+        return tiempos
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+    reemplazar = '--reemplazar' in sys.argv
+    escala = float(sys.argv[sys.argv.index('--escala') + 1]) if '--escala' in sys.argv else 1
+    años = int(sys.argv[sys.argv.index('--años') + 1]) if '--años' in sys.argv else 2
+    semilla = int(sys.argv[sys.argv.index('--semilla') + 1]) if '--semilla' in sys.argv else SEMILLA
+
+    print("=" * 80)
+    print("GENERAR DATOS SINTÉTICOS PARA BENCHMARK")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        print(f"Base de datos: {db.engine.url.render_as_string(hide_password=True)}")
+        print(f"Escala: {escala:g}  Años: {años}  Semilla: {semilla}")
+        print(f"  Personas: ~{max(10, round(PERSONAS * escala))}")
+        print(f"  Clientes: ~{max(1, round(CLIENTES * escala))}")
+        print(f"  Registros de horas: ~{round(PERSONAS * escala * sum(REGISTROS_POR_DIA) / 2 * 250 * años):,}")
+        print()
+
+        try:
+            personas_existentes = Persona.query.count()
+        except Exception:
+            db.session.rollback()
+            personas_existentes = 0
+        if personas_existentes and not reemplazar:
+            print(f"❌ La base ya tiene {personas_existentes} personas. El generador borra TODAS las tablas;")
+            print("   usa una base nueva o agrega --reemplazar si estás seguro.")
+            sys.exit(1)
+
+        if not ejecutar:
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print()
+            print("Para generar los datos (borra y recrea todas las tablas), ejecuta:")
+            print("  python -m benchmark.datos_sinteticos --ejecutar [--escala 10]")
+            return
+
+        inicio = time.time()
+        db.drop_all()
+        db.create_all()
+        print("✓ Tablas recreadas")
+
+        GeneradorDatos(escala, años, semilla).generar()
+
+    print()
+    print(f"✅ Datos sintéticos generados en {time.time() - inicio:.1f}s")
+    print(f"   Usuario: {EMAIL_BENCHMARK} / {PASSWORD_BENCHMARK}")
+
+
+if __name__ == '__main__':
+    main()
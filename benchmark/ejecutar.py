@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Benchmark de rutas y APIs con el test client de Flask
+
+Recorre todas las rutas GET de app.url_map (más variantes con parámetros de los
+reportes pesados y la API de solo lectura /api/calcular-valorizacion), las pide
+varias veces con la sesión del usuario del benchmark y mide por URL:
+
+    - p50 / p95 / máximo de latencia en milisegundos
+    - número de consultas SQL por request
+    - código de respuesta y tamaño
+
+Por defecto se limpia la caché de resultados (cache_resultados.py) antes de
+cada request, así se mide el cálculo completo y no el acierto de caché; con
+--con-cache se mide el caso caliente.
+
+Los resultados se escriben en JSON. El script termina con código 1 si alguna
+URL responde con error del servidor (5xx) o hace más consultas SQL que su
+presupuesto (PRESUPUESTO_CONSULTAS, sin depender de una ejecución anterior). Con --comparar se contrastan con una
+ejecución anterior y también termina con código 1 si alguna URL empeoró
+(p95 sobre la tolerancia o más consultas), para detectar regresiones antes
+de un deploy.
+
+La base es la de DATABASE_URL (SQLite o PostgreSQL local), normalmente generada
+con benchmark/datos_sinteticos.py. Las rutas POST que escriben no se miden.
+
+Uso:
+    python -m benchmark.ejecutar
+    python -m benchmark.ejecutar --repeticiones 50 --salida sqlite_x10.json
+    python -m benchmark.ejecutar --rutas rentabilidad,productividad
+    python -m benchmark.ejecutar --comparar anterior.json --tolerancia 0.2
+    python -m benchmark.ejecutar --email socia@comsulting.cl --password secreta
+"""
+
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+from sqlalchemy import event, func
+
+from app import (
+    app, db, Area, Cliente, Persona, RegistroHora, ResumenHorasMensual, Servicio,
+    ServicioCliente
+)
+from cache_resultados import limpiar_cache
+from benchmark.datos_sinteticos import EMAIL_BENCHMARK, PASSWORD_BENCHMARK
+
+REPETICIONES = 20
+CALENTAMIENTO = 2
+TOLERANCIA = 0.25         # p95 hasta 25% más lento no se considera regresión
+MARGEN_MS = 5             # ...ni diferencias menores a 5 ms (ruido)
+SALIDA = 'resultados_benchmark.json'
+
+ENDPOINTS_EXCLUIDOS = {'static', 'logout'}
+
+# Modelo del que se toma el id de cada argumento de URL
+ARGUMENTOS = {
+    'area_id': Area,
+    'cliente_id': Cliente,
+    'persona_id': Persona,
+    'registro_id': RegistroHora,
+    'servicio_id': ServicioCliente,
+}
+# Endpoints donde el nombre del argumento apunta a otro modelo
+ARGUMENTOS_POR_ENDPOINT = {
+    'api_tareas_por_servicio': {'servicio_id': Servicio},
+}
+# Argumentos de URL que no son ids (convertidores any(...) de las exportaciones)
+VALORES_FIJOS = {
+    'formato': 'csv',
+    'tabla': 'clientes',
+}
+
+# Variantes con parámetros de los reportes pesados (además de la URL sin parámetros).
+# Las de parámetros inválidos deben responder redirección o 400, nunca 5xx
+VARIANTES = {
+    'mis_horas': ['?año={año_anterior}', '?año={año}&mes={mes}'],
+    'capacidad': ['?año={año_anterior}&mes={mes}', '?mes=13'],
+    'rentabilidad': ['?año={año_anterior}', '?año={año}&mes={mes}', '?mes=13'],
+    'productividad': ['?meses=24', '?meses=100000'],
+    'productividad_personas': ['?año={año_anterior}&mes={mes}', '?mes=0'],
+    'api_rentabilidad_por_area': ['?año={año_anterior}', '?año={año}&mes={mes}', '?mes=13'],
+    'api_top_clientes_rentables': ['?top=0', '?orden=margen&limit=20&offset=20'],
+}
+
+# Máximo de consultas SQL por request (sin caché, incluye sesión y versiones).
+# Estos endpoints hacen un número fijo de consultas agrupadas, independiente
+# del volumen de datos; superarlo indica consultas por fila (N+1)
+PRESUPUESTO_CONSULTAS = {
+    'api_rentabilidad_por_area': 18,
+}
+
+TABLAS_CONTADAS = {
+    'personas': Persona,
+    'clientes': Cliente,
+    'servicios_cliente': ServicioCliente,
+    'registros_horas': RegistroHora,
+    'resumen_horas_mensual': ResumenHorasMensual,
+}
+
+
+# ============= URLS =============
+
+def urls_a_medir(filtros=None):
+    """
+    Lista de (endpoint, método, url, cuerpo JSON) a medir.
+
+    Args:
+        filtros: Textos; solo se miden las URLs o endpoints que contengan alguno
+    """
+    hoy = date.today()
+    parametros = {'año': hoy.year, 'año_anterior': hoy.year - 1, 'mes': hoy.month}
+    primer_id = {}
+
+    def id_de(modelo):
+        if modelo not in primer_id:
+            primer_id[modelo] = db.session.query(func.min(modelo.id)).scalar()
+        return primer_id[modelo]
+
+    reglas = [
+        regla for regla in sorted(app.url_map.iter_rules(), key=lambda regla: regla.rule)
+        if regla.endpoint not in ENDPOINTS_EXCLUIDOS and 'GET' in regla.methods
+    ]
+
+    # Todos los argumentos deben tener valor antes de medir nada
+    sin_valor = sorted(
+        f"{regla.rule} ({argumento})"
+        for regla in reglas
+        for argumento in regla.arguments
+        if argumento not in VALORES_FIJOS
+        and argumento not in ARGUMENTOS
+        and argumento not in ARGUMENTOS_POR_ENDPOINT.get(regla.endpoint, {})
+    )
+    if sin_valor:
+        print("❌ Argumentos de URL sin valor para el benchmark (agregarlos a ARGUMENTOS,")
+        print("   ARGUMENTOS_POR_ENDPOINT, VALORES_FIJOS o ENDPOINTS_EXCLUIDOS):")
+        for faltante in sin_valor:
+            print(f"   - {faltante}")
+        sys.exit(1)
+
+    urls = []
+    for regla in reglas:
+        modelos = dict(ARGUMENTOS, **ARGUMENTOS_POR_ENDPOINT.get(regla.endpoint, {}))
+        valores = {
+            argumento: VALORES_FIJOS[argumento] if argumento in VALORES_FIJOS else id_de(modelos[argumento])
+            for argumento in regla.arguments
+        }
+        if any(valor is None for valor in valores.values()):
+            print(f"  ⚠️  Sin datos para {regla.rule}, se omite")
+            continue
+
+        with app.test_request_context():
+            from flask import url_for
+            base = url_for(regla.endpoint, **valores)
+
+        urls.append((regla.endpoint, 'GET', base, None))
+        for variante in VARIANTES.get(regla.endpoint, []):
+            urls.append((regla.endpoint, 'GET', base + variante.format(**parametros), None))
+
+    personas = [persona_id for (persona_id,) in db.session.query(Persona.id).order_by(Persona.id).limit(5)]
+    urls.append(('calcular_valorizacion', 'POST', '/api/calcular-valorizacion', {
+        'recursos': [{'persona_id': persona_id, 'horas': 20} for persona_id in personas],
+        'overhead': 30,
+        'margen': 20,
+    }))
+
+    if filtros:
+        urls = [u for u in urls if any(filtro in u[0] or filtro in u[2] for filtro in filtros)]
+    return urls
+
+
+# ============= MEDICIÓN =============
+
+def percentil(valores, p):
+    """Percentil p (0-100) con interpolación lineal"""
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+class ContadorConsultas:
+    """Cuenta las consultas SQL que ejecuta el engine"""
+
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *args, **kwargs):
+        self.total += 1
+
+
+def medir(cliente, contador, metodo, url, cuerpo, repeticiones, calentamiento, con_cache):
+    """Pide la URL calentamiento + repeticiones veces; retorna las métricas"""
+    tiempos = []
+    consultas = []
+    for i in range(calentamiento + repeticiones):
+        if not con_cache:
+            limpiar_cache()
+        contador.total = 0
+
+        # Los prints de depuración de las vistas van a /dev/null (siguen contando en el tiempo)
+        with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            inicio = time.perf_counter()
+            respuesta = cliente.open(url, method=metodo, json=cuerpo)
+            # Leer el cuerpo dentro de la medición: las exportaciones se generan en streaming
+            cuerpo_respuesta = respuesta.get_data()
+            duracion = (time.perf_counter() - inicio) * 1000
+
+        if respuesta.status_code >= 500:
+            break
+        if i >= calentamiento:
+            tiempos.append(duracion)
+            consultas.append(contador.total)
+
+    resultado = {'estado': respuesta.status_code, 'bytes': len(cuerpo_respuesta)}
+    if tiempos:
+        resultado.update({
+            'consultas': max(consultas),
+            'p50_ms': round(percentil(tiempos, 50), 2),
+            'p95_ms': round(percentil(tiempos, 95), 2),
+            'max_ms': round(max(tiempos), 2),
+        })
+    return resultado
+
+
+def iniciar_sesion(cliente, email, password):
+    respuesta = cliente.post('/login', data={'email': email, 'password': password})
+    if respuesta.status_code != 302:
+        print(f"❌ No se pudo iniciar sesión como {email}")
+        print("   ¿La base se generó con python -m benchmark.datos_sinteticos --ejecutar?")
+        sys.exit(1)
+
+
+# ============= COMPARACIÓN =============
+
+def excesos_de_presupuesto(resultados):
+    """URLs con más consultas que el presupuesto de su endpoint: [(url, motivo)]"""
+    return [
+        (ruta['url'], f"consultas {ruta['consultas']} > presupuesto {PRESUPUESTO_CONSULTAS[ruta['endpoint']]}")
+        for ruta in resultados['rutas']
+        if ruta['endpoint'] in PRESUPUESTO_CONSULTAS and 'consultas' in ruta
+        and ruta['consultas'] > PRESUPUESTO_CONSULTAS[ruta['endpoint']]
+    ]
+
+
+def regresiones(resultados, anterior, tolerancia):
+    """URLs más lentas o con más consultas que en `anterior`: [(url, motivo)]"""
+    previas = {(r['metodo'], r['url']): r for r in anterior['rutas']}
+    encontradas = []
+    for ruta in resultados['rutas']:
+        previa = previas.get((ruta['metodo'], ruta['url']))
+        if not previa or 'p95_ms' not in previa:
+            continue
+        if 'p95_ms' not in ruta:
+            encontradas.append((ruta['url'], f"error {ruta['estado']}"))
+            continue
+        if ruta['consultas'] > previa['consultas']:
+            encontradas.append((ruta['url'], f"consultas {previa['consultas']} → {ruta['consultas']}"))
+        limite = previa['p95_ms'] * (1 + tolerancia)
+        if ruta['p95_ms'] > limite and ruta['p95_ms'] - previa['p95_ms'] > MARGEN_MS:
+            encontradas.append((ruta['url'], f"p95 {previa['p95_ms']:.1f} → {ruta['p95_ms']:.1f} ms"))
+    return encontradas
+
+
+def main():
+    def opcion(nombre, defecto=None):
+        return sys.argv[sys.argv.index(nombre) + 1] if nombre in sys.argv else defecto
+
+    repeticiones = int(opcion('--repeticiones', REPETICIONES))
+    calentamiento = int(opcion('--calentamiento', CALENTAMIENTO))
+    salida = opcion('--salida', SALIDA)
+    comparar = opcion('--comparar')
+    tolerancia = float(opcion('--tolerancia', TOLERANCIA))
+    filtros = opcion('--rutas', '').split(',') if '--rutas' in sys.argv else None
+    email = opcion('--email', EMAIL_BENCHMARK)
+    password = opcion('--password', PASSWORD_BENCHMARK)
+    con_cache = '--con-cache' in sys.argv
+
+    print("=" * 80)
+    print("BENCHMARK DE RUTAS")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        contador = ContadorConsultas(db.engine)
+        resultados = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'base': db.engine.dialect.name,
+            'url_base': db.engine.url.render_as_string(hide_password=True),
+            'usuario': email,
+            'repeticiones': repeticiones,
+            'calentamiento': calentamiento,
+            'con_cache': con_cache,
+            'datos': {tabla: modelo.query.count() for tabla, modelo in TABLAS_CONTADAS.items()},
+            'rutas': [],
+        }
+        urls = urls_a_medir(filtros)
+        db.session.remove()
+
+    print(f"Base de datos: {resultados['url_base']}")
+    print("Datos: " + ", ".join(f"{tabla} {filas:,}" for tabla, filas in resultados['datos'].items()))
+    print(f"URLs: {len(urls)}  Repeticiones: {repeticiones} (+{calentamiento} de calentamiento)"
+          f"  Caché: {'sí' if con_cache else 'no'}")
+    print()
+
+    cliente = app.test_client()
+    iniciar_sesion(cliente, email, password)
+
+    print(f"  {'URL':<58} {'Estado':>6} {'Consultas':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    inicio = time.time()
+    for endpoint, metodo, url, cuerpo in urls:
+        resultado = medir(cliente, contador, metodo, url, cuerpo, repeticiones, calentamiento, con_cache)
+        resultados['rutas'].append(dict(endpoint=endpoint, metodo=metodo, url=url, **resultado))
+        if 'p95_ms' in resultado:
+            print(f"  {metodo + ' ' + url:<58} {resultado['estado']:>6} {resultado['consultas']:>9}"
+                  f" {resultado['p50_ms']:>9.1f} {resultado['p95_ms']:>9.1f}")
+        else:
+            print(f"  {metodo + ' ' + url:<58} {resultado['estado']:>6}  ❌ error")
+
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultados, archivo, ensure_ascii=False, indent=2)
+
+    print()
+    print(f"✓ {len(urls)} URLs medidas en {time.time() - inicio:.1f}s")
+    print(f"✓ Resultados en {salida}")
+
+    errores = [r for r in resultados['rutas'] if r['estado'] >= 500]
+    for ruta in errores:
+        print(f"  ❌ {ruta['metodo']} {ruta['url']}: {ruta['estado']}")
+    if errores:
+        print(f"❌ {len(errores)} URLs con error del servidor")
+
+    excesos = excesos_de_presupuesto(resultados)
+    for url, motivo in excesos:
+        print(f"  ❌ {url}: {motivo}")
+    if excesos:
+        print(f"❌ {len(excesos)} URLs sobre su presupuesto de consultas")
+
+    if comparar:
+        with open(comparar, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+        encontradas = regresiones(resultados, anterior, tolerancia)
+        print()
+        print("=" * 80)
+        print(f"COMPARACIÓN CON {comparar} (tolerancia p95 {tolerancia:.0%})")
+        print("=" * 80)
+        if anterior.get('datos') != resultados['datos']:
+            print("⚠️  Las bases tienen distinta cantidad de datos; la comparación es referencial")
+        for url, motivo in encontradas:
+            print(f"  ❌ {url}: {motivo}")
+        if encontradas:
+            print(f"\n❌ {len(encontradas)} regresiones")
+            sys.exit(1)
+        print("✅ Sin regresiones")
+
+    if errores or excesos:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
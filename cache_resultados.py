@@ -0,0 +1,242 @@
+"""
+Caché de resultados de reportes analíticos
+
+Los reportes de rentabilidad (overhead, rentabilidad por área, top clientes) se
+calculan una vez por combinación de argumentos (año, mes, alcance...) y versión
+de los datos. La clave incluye las versiones de las tablas de las que depende el
+reporte (ver versiones.py): cualquier escritura en esas tablas cambia la clave,
+así que no hay que borrar entradas para invalidarlas.
+
+Niveles:
+    1. Memoria del proceso (LRU)
+    2. Archivo SQLite compartido por los workers de gunicorn (opcional)
+
+Configuración (variables de entorno):
+    CACHE_RESULTADOS_TAMAÑO    Entradas en memoria por proceso (default 256)
+    CACHE_RESULTADOS_ARCHIVO   Ruta del archivo SQLite compartido (sin definir = solo memoria)
+    CACHE_RESULTADOS_SEGUNDOS  Antigüedad máxima de las entradas en el archivo (default 86400)
+
+Uso:
+    @resultado_en_cache('resumen_horas_mensual', 'ingresos_mensuales')
+    def calcular_reporte(año, mes=None):
+        ...
+
+El resultado debe poder serializarse con pickle (dicts, listas, números), no
+objetos del ORM. Cada llamada recibe una copia, así que se puede modificar.
+
+Para las APIs JSON, respuesta_condicional() agrega ETag y Last-Modified a partir
+de las mismas versiones y responde 304 a If-None-Match / If-Modified-Since sin
+ejecutar la vista.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+
+class CacheMemoria:
+    """LRU en memoria del proceso"""
+
+    def __init__(self, tamaño):
+        self.tamaño = tamaño
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave not in self._entradas:
+                return None
+            self._entradas.move_to_end(clave)
+            return self._entradas[clave]
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamaño:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+class CacheArchivo:
+    """Caché en un archivo SQLite compartido entre procesos"""
+
+    def __init__(self, ruta, max_segundos):
+        self.ruta = ruta
+        self.max_segundos = max_segundos
+        self._local = threading.local()
+        with self._conexion() as conexion:
+            conexion.execute(
+                'CREATE TABLE IF NOT EXISTS resultados '
+                '(clave TEXT PRIMARY KEY, valor BLOB NOT NULL, creado REAL NOT NULL)'
+            )
+
+    def _conexion(self):
+        # Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)
+        if not hasattr(self._local, 'conexion'):
+            self._local.conexion = sqlite3.connect(self.ruta, timeout=5)
+        return self._local.conexion
+
+    def obtener(self, clave):
+        fila = self._conexion().execute(
+            'SELECT valor FROM resultados WHERE clave = ? AND creado > ?',
+            (clave, time.time() - self.max_segundos)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def guardar(self, clave, valor):
+        with self._conexion() as conexion:
+            conexion.execute(
+                'INSERT OR REPLACE INTO resultados (clave, valor, creado) VALUES (?, ?, ?)',
+                (clave, valor, time.time())
+            )
+            conexion.execute('DELETE FROM resultados WHERE creado <= ?', (time.time() - self.max_segundos,))
+
+    def limpiar(self):
+        with self._conexion() as conexion:
+            conexion.execute('DELETE FROM resultados')
+
+
+_memoria = CacheMemoria(int(os.environ.get('CACHE_RESULTADOS_TAMAÑO', 256)))
+_archivo = None
+_estadisticas = {'aciertos_memoria': 0, 'aciertos_archivo': 0, 'calculos': 0}
+
+
+def _cache_archivo():
+    """Caché en archivo, creada al primer uso si CACHE_RESULTADOS_ARCHIVO está definida"""
+    global _archivo
+    ruta = os.environ.get('CACHE_RESULTADOS_ARCHIVO')
+    if ruta and _archivo is None:
+        _archivo = CacheArchivo(ruta, int(os.environ.get('CACHE_RESULTADOS_SEGUNDOS', 86400)))
+    return _archivo if ruta else None
+
+
+def _clave(nombre, args, kwargs, versiones):
+    """Clave estable de la llamada: función + argumentos + versiones de datos"""
+    partes = (
+        nombre,
+        args,
+        tuple(sorted(kwargs.items())),
+        tuple(sorted((tabla, version) for tabla, (version, _) in versiones.items()))
+    )
+    return hashlib.sha256(repr(partes).encode()).hexdigest()
+
+
+def resultado_en_cache(*tablas):
+    """
+    Decorador: guarda el resultado de la función por argumentos y versión de `tablas`.
+
+    La función original queda disponible como funcion.sin_cache.
+    """
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            from versiones import obtener_versiones
+
+            clave = _clave(funcion.__qualname__, args, kwargs, obtener_versiones(tablas))
+
+            datos = _memoria.obtener(clave)
+            if datos is not None:
+                _estadisticas['aciertos_memoria'] += 1
+                return pickle.loads(datos)
+
+            archivo = _cache_archivo()
+            datos = archivo.obtener(clave) if archivo else None
+            if datos is not None:
+                _estadisticas['aciertos_archivo'] += 1
+            else:
+                _estadisticas['calculos'] += 1
+                datos = pickle.dumps(funcion(*args, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+                if archivo:
+                    archivo.guardar(clave, datos)
+
+            _memoria.guardar(clave, datos)
+            return pickle.loads(datos)
+
+        envoltura.sin_cache = funcion
+        return envoltura
+
+    return decorador
+
+
+def respuesta_condicional(*tablas):
+    """
+    Decorador de vistas JSON: ETag fuerte y Last-Modified según la versión de `tablas`.
+
+    El ETag depende de la URL, del rol del usuario (socia/admin, de
+    permisos_actuales) y de las versiones; si el navegador envía un ETag (o
+    fecha) vigente se responde 304 sin ejecutar la vista. Va después de
+    @login_required y de los decoradores de permisos (ej. @api_socia_required):
+    la autorización se evalúa antes del 304, así quien perdió el acceso recibe
+    403 y no un 304 con un ETag guardado.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            from flask import request, make_response
+            from usuario_actual import permisos_actuales
+            from versiones import obtener_versiones
+
+            permisos = permisos_actuales() or {}
+            versiones = obtener_versiones(tablas)
+            etag = _clave(
+                request.full_path,
+                (permisos.get('es_socia', False), permisos.get('es_admin', False)),
+                {},
+                versiones
+            )
+            fechas = [actualizado for _, actualizado in versiones.values() if actualizado]
+            ultima_modificacion = max(fechas).replace(microsecond=0) if fechas else None
+
+            def con_encabezados(respuesta):
+                respuesta.set_etag(etag)
+                if ultima_modificacion:
+                    respuesta.last_modified = ultima_modificacion
+                # El navegador guarda la respuesta pero la revalida siempre
+                respuesta.cache_control.private = True
+                respuesta.cache_control.no_cache = True
+                respuesta.vary.add('Cookie')
+                return respuesta
+
+            if request.if_none_match:
+                vigente = request.if_none_match.contains(etag)
+            else:
+                vigente = bool(
+                    ultima_modificacion and request.if_modified_since
+                    and ultima_modificacion <= request.if_modified_since.replace(tzinfo=None)
+                )
+            if vigente:
+                return con_encabezados(make_response('', 304))
+
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code != 200:
+                return respuesta
+            return con_encabezados(respuesta)
+
+        return envoltura
+
+    return decorador
+
+
+def limpiar_cache():
+    """Borra todas las entradas (memoria del proceso y archivo compartido)"""
+    _memoria.limpiar()
+    archivo = _cache_archivo()
+    if archivo:
+        archivo.limpiar()
+
+
+def estadisticas_cache():
+    """Aciertos y cálculos desde el inicio del proceso"""
+    return dict(_estadisticas, entradas_memoria=len(_memoria))
@@ -0,0 +1,51 @@
+"""
+Calendario laboral: horas disponibles por mes según jornada
+
+Las horas disponibles dependen solo de (año, mes, jornada), así que se calculan
+una vez por proceso (lru_cache) a partir de los días de la semana del mes, sin
+recorrer el mes día a día en cada reporte.
+
+Jornadas:
+    - 'completa': L-J 9 horas/día, V 8 horas/día (costos y overhead)
+    - '7h': L-V 7 horas/día (productividad por persona)
+"""
+
+import calendar
+from functools import lru_cache
+
+# Horas por día de la semana (0=Lunes ... 6=Domingo)
+JORNADAS = {
+    'completa': (9, 9, 9, 9, 8, 0, 0),
+    '7h': (7, 7, 7, 7, 7, 0, 0),
+}
+
+
+@lru_cache(maxsize=None)
+def horas_disponibles_mes(año, mes, jornada='completa'):
+    """
+    Horas disponibles del mes según la jornada.
+
+    Ejemplo:
+        horas_disponibles_mes(2025, 10)       → 202 (23 días hábiles)
+        horas_disponibles_mes(2025, 10, '7h') → 161
+    """
+    horas_dia = JORNADAS[jornada]
+    primer_dia, dias_mes = calendar.monthrange(año, mes)
+
+    # Semanas completas + días restantes desde el primer día de la semana del mes
+    semanas, resto = divmod(dias_mes, 7)
+    return semanas * sum(horas_dia) + sum(horas_dia[(primer_dia + i) % 7] for i in range(resto))
+
+
+@lru_cache(maxsize=None)
+def horas_disponibles_año(año, jornada='completa'):
+    """Tupla con las horas disponibles de cada mes (índice 0 = enero)"""
+    return tuple(horas_disponibles_mes(año, mes, jornada) for mes in range(1, 13))
+
+
+@lru_cache(maxsize=None)
+def dias_habiles_mes(año, mes):
+    """Días hábiles (L-V) del mes"""
+    primer_dia, dias_mes = calendar.monthrange(año, mes)
+    semanas, resto = divmod(dias_mes, 7)
+    return semanas * 5 + sum(1 for i in range(resto) if (primer_dia + i) % 7 < 5)
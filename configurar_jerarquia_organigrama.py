@@ -7,11 +7,12 @@ Este script:
 
 Reglas de permisos:
 - Admin (es_admin=True): Ven TODO
-- Socios/Directores: Solo ven a sus reportes DIRECTOS
+- Socios/Directores: Ven a todas las personas bajo ellos (reportes directos e indirectos)
 - Resto: Solo ven su propia información
 """
 
 from app import app, db, Persona
+from jerarquia import reconstruir_jerarquia
 
 def configurar_jerarquia():
     """Configura la jerarquía según organigrama Oct 2025"""
@@ -131,6 +132,10 @@ def configurar_jerarquia():
 
         db.session.commit()
 
+        # Persona.query.update() no pasa por el flush: recalcular la tabla de clausura
+        filas = reconstruir_jerarquia()
+        print(f"\n✓ Jerarquía recalculada ({filas} relaciones ancestro → descendiente)")
+
         # Paso 3: Resumen y verificación
         print("\n" + "="*80)
         print("RESUMEN DE CONFIGURACIÓN")
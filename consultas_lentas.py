@@ -0,0 +1,182 @@
+"""
+Registro de consultas lentas con su plan de ejecución (opcional)
+
+Con CONSULTAS_LENTAS_MS definida, las consultas de un request que superan el
+umbral (medidas por instrumentacion.py) se guardan en la tabla consultas_lentas
+con:
+
+    - sentencia y parámetros
+    - duración, método, ruta y endpoint del request
+    - plan de ejecución:
+        PostgreSQL: EXPLAIN (ANALYZE, BUFFERS) para SELECT, EXPLAIN para el resto
+        SQLite:     EXPLAIN QUERY PLAN
+
+El plan se obtiene cuando la respuesta ya se envió (response.call_on_close), en
+una conexión aparte que se descarta con rollback, así que no retrasa el request
+ni repite escrituras (EXPLAIN ANALYZE solo se usa en SELECT). Un SELECT lento se
+ejecuta una vez más al analizarlo: por eso es opcional y limitado a
+CONSULTAS_LENTAS_POR_REQUEST consultas por request.
+
+La tabla funciona como buffer circular: se conservan las últimas
+CONSULTAS_LENTAS_GUARDADAS filas. Se ven en /admin/consultas-lentas.
+
+Requiere la tabla (crear_tabla_consultas_lentas.py) y la instrumentación activa.
+
+Configuración (variables de entorno):
+    CONSULTAS_LENTAS_MS            Umbral en ms; sin definir no se captura nada
+    CONSULTAS_LENTAS_GUARDADAS     Filas conservadas (default 200)
+    CONSULTAS_LENTAS_POR_REQUEST   Consultas analizadas por request (default 3)
+"""
+
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, insert, inspect, select
+
+logger = logging.getLogger('instrumentacion')
+
+UMBRAL_MS = float(os.environ['CONSULTAS_LENTAS_MS']) if os.environ.get('CONSULTAS_LENTAS_MS') else None
+GUARDADAS = int(os.environ.get('CONSULTAS_LENTAS_GUARDADAS', 200))
+POR_REQUEST = int(os.environ.get('CONSULTAS_LENTAS_POR_REQUEST', 3))
+LARGO_PARAMETROS = 2000
+
+_tabla_existe = None
+
+
+def _tabla_disponible():
+    """True si existe consultas_lentas (se revisa una vez por proceso)"""
+    global _tabla_existe
+    if _tabla_existe is None:
+        from app import db, ConsultaLenta
+        _tabla_existe = inspect(db.engine).has_table(ConsultaLenta.__tablename__)
+        if not _tabla_existe:
+            logger.warning("CONSULTAS_LENTAS_MS definida pero falta la tabla consultas_lentas "
+                           "(python crear_tabla_consultas_lentas.py --ejecutar)")
+    return _tabla_existe
+
+
+# ============= PLANES DE EJECUCIÓN =============
+
+def _plan_sqlite(filas):
+    """Árbol de EXPLAIN QUERY PLAN (id, parent, notused, detail) indentado"""
+    profundidad = {0: -1}
+    lineas = []
+    for id_nodo, padre, _, detalle in filas:
+        profundidad[id_nodo] = profundidad.get(padre, -1) + 1
+        lineas.append('  ' * profundidad[id_nodo] + str(detalle))
+    return '\n'.join(lineas)
+
+
+def plan_de_ejecucion(conexion, sentencia, parametros):
+    """
+    Plan de la sentencia en el dialecto de la conexión (None si no se soporta).
+
+    Los parámetros van tal como los recibió el driver (estilo del dialecto).
+    """
+    dialecto = conexion.dialect.name
+    if dialecto == 'postgresql':
+        es_select = sentencia.lstrip().lower().startswith('select')
+        prefijo = 'EXPLAIN (ANALYZE, BUFFERS) ' if es_select else 'EXPLAIN '
+        filas = conexion.exec_driver_sql(prefijo + sentencia, parametros).fetchall()
+        return '\n'.join(fila[0] for fila in filas)
+    if dialecto == 'sqlite':
+        return _plan_sqlite(conexion.exec_driver_sql('EXPLAIN QUERY PLAN ' + sentencia, parametros).fetchall())
+    return None
+
+
+# ============= CAPTURA =============
+
+def guardar_consultas(candidatas, metodo, ruta, endpoint):
+    """
+    Analiza y guarda consultas lentas; recorta la tabla a las últimas GUARDADAS.
+
+    Args:
+        candidatas: [(duracion_ms, sentencia, parametros)]
+    """
+    from app import db, ConsultaLenta
+
+    if not candidatas or not _tabla_disponible():
+        return
+
+    filas = []
+    with db.engine.connect() as conexion:
+        for duracion, sentencia, parametros in candidatas:
+            try:
+                plan = plan_de_ejecucion(conexion, sentencia, parametros)
+            except Exception as e:
+                conexion.rollback()
+                plan = f"No se pudo obtener el plan: {e}"
+            filas.append({
+                'fecha': datetime.now(),
+                'duracion_ms': round(duracion, 1),
+                'sentencia': sentencia,
+                'parametros': repr(parametros)[:LARGO_PARAMETROS] if parametros else None,
+                'metodo': metodo,
+                'ruta': ruta[:500],
+                'endpoint': endpoint,
+                'plan': plan,
+            })
+        conexion.rollback()
+
+    tabla = ConsultaLenta.__table__
+    with db.engine.begin() as conexion:
+        conexion.execute(insert(tabla), filas)
+        limite = conexion.execute(
+            select(tabla.c.id).order_by(tabla.c.id.desc()).offset(GUARDADAS - 1).limit(1)
+        ).scalar()
+        if limite:
+            conexion.execute(delete(tabla).where(tabla.c.id < limite))
+
+
+def registrar_al_cerrar(respuesta, candidatas, metodo, ruta, endpoint):
+    """Programa el análisis de las consultas más lentas para después de enviar la respuesta"""
+    from flask import current_app
+
+    app = current_app._get_current_object()
+    seleccion = sorted(candidatas, key=lambda candidata: candidata[0], reverse=True)[:POR_REQUEST]
+
+    def guardar():
+        with app.app_context():
+            try:
+                guardar_consultas(seleccion, metodo, ruta, endpoint)
+            except Exception:
+                logger.exception("No se pudieron guardar las consultas lentas de %s", ruta)
+
+    respuesta.call_on_close(guardar)
+
+
+# ============= CONSULTA =============
+
+def consultas_guardadas():
+    """Consultas lentas guardadas, de la más reciente a la más antigua"""
+    from app import ConsultaLenta
+
+    if not _tabla_disponible():
+        return []
+    return ConsultaLenta.query.order_by(ConsultaLenta.id.desc()).all()
+
+
+def resumen_por_sentencia(consultas):
+    """
+    Consultas agrupadas por sentencia, de mayor a menor tiempo acumulado.
+
+    Returns:
+        list: [{'sentencia', 'veces', 'total_ms', 'max_ms', 'endpoints', 'ultima'}]
+    """
+    grupos = defaultdict(list)
+    for consulta in consultas:
+        grupos[consulta.sentencia].append(consulta)
+
+    resumen = [{
+        'sentencia': sentencia,
+        'veces': len(grupo),
+        'total_ms': round(sum(c.duracion_ms for c in grupo), 1),
+        'max_ms': max(c.duracion_ms for c in grupo),
+        'endpoints': sorted({c.endpoint for c in grupo if c.endpoint}),
+        'ultima': grupo[0],
+    } for sentencia, grupo in grupos.items()]
+
+    resumen.sort(key=lambda fila: fila['total_ms'], reverse=True)
+    return resumen
@@ -0,0 +1,271 @@
+"""
+Costos hora con vigencia (tarifas_personas y valores_uf)
+
+El costo hora en UF de un registro de horas depende de su fecha:
+
+    costo_hora_uf = tarifa vigente de la persona / HORAS_EFECTIVAS_MES / valor UF vigente
+
+Cada tarifa (y cada valor UF) rige desde su fecha hasta la siguiente; la primera
+rige también para las fechas anteriores. Sin tarifas se usa
+Persona.costo_mensual_empresa y sin valores UF se usa VALOR_UF_ACTUAL.
+
+Persona.costo_hora_uf y el costo de la dotación del dashboard usan en cambio
+las tarifas actuales (costo_mensual_empresa y VALOR_UF_ACTUAL): son valores
+"de hoy" para cotizar (valorización) y para el indicador del mes en curso.
+costo_mensual_empresa se actualiza al editar a la persona con una tarifa que
+ya rige; una tarifa con fecha futura solo se refleja ahí al volver a editarla.
+
+El costo se fija en RegistroHora.costo_hora_uf, por lo que editar el sueldo de
+una persona no cambia el costo de las horas ya registradas, salvo que la nueva
+tarifa sea retroactiva (ver registrar_tarifa).
+
+Resolución en lote:
+    - resolver_costos_hora(): pares (persona, fecha) en memoria, para registros
+      aún no guardados (flush de la sesión). 2-3 queries por lote.
+    - costos_mensuales_uf(): costo mensual UF por persona y mes de un período,
+      para los reportes que cuestan la dotación (horas no imputadas, rentabilidad).
+    - asignar_costos_hora(): registros ya guardados, con un solo join por
+      intervalos de vigencia en SQL y un UPDATE por lote.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import func, and_, or_, update
+
+from app import (
+    db, Persona, RegistroHora, TarifaPersona, ValorUF,
+    VALOR_UF_ACTUAL, calcular_costo_hora_uf
+)
+
+
+# ============= RESOLUCIÓN EN MEMORIA =============
+
+def _vigente(fechas, valores, fecha):
+    """Valor vigente a la fecha (la primera vigencia rige también hacia atrás)"""
+    indice = max(bisect_right(fechas, fecha) - 1, 0)
+    return valores[indice]
+
+
+def _valores_uf(desde, hasta, session):
+    """Retorna (fechas, valores) de la UF que cubren el rango [desde, hasta]"""
+    inicio = session.query(func.max(ValorUF.fecha)).filter(ValorUF.fecha <= desde).scalar()
+
+    query = session.query(ValorUF.fecha, ValorUF.valor).filter(ValorUF.fecha <= hasta)
+    if inicio:
+        query = query.filter(ValorUF.fecha >= inicio)
+    filas = query.order_by(ValorUF.fecha).all()
+
+    return [f for f, _ in filas], [v for _, v in filas]
+
+
+def _tarifas_y_uf_vigentes(pares, session):
+    """{(persona_id, fecha): (costo mensual en pesos, valor UF o None)} vigentes a cada fecha"""
+    if not pares:
+        return {}
+
+    persona_ids = {persona_id for persona_id, _ in pares}
+    fechas_registros = [fecha for _, fecha in pares]
+
+    tarifas = defaultdict(lambda: ([], []))
+    for persona_id, vigente_desde, costo in session.query(
+        TarifaPersona.persona_id, TarifaPersona.vigente_desde, TarifaPersona.costo_mensual_empresa
+    ).filter(TarifaPersona.persona_id.in_(persona_ids)).order_by(TarifaPersona.vigente_desde).all():
+        tarifas[persona_id][0].append(vigente_desde)
+        tarifas[persona_id][1].append(costo)
+
+    # Personas sin tarifas registradas: costo mensual actual
+    sin_tarifa = persona_ids - set(tarifas)
+    costo_actual = dict(
+        session.query(Persona.id, Persona.costo_mensual_empresa).filter(Persona.id.in_(sin_tarifa)).all()
+    ) if sin_tarifa else {}
+
+    fechas_uf, valores_uf = _valores_uf(min(fechas_registros), max(fechas_registros), session)
+
+    vigentes = {}
+    for persona_id, fecha in pares:
+        if persona_id in tarifas:
+            costo_mensual = _vigente(*tarifas[persona_id], fecha)
+        else:
+            costo_mensual = costo_actual.get(persona_id, 0)
+
+        valor_uf = _vigente(fechas_uf, valores_uf, fecha) if fechas_uf else None
+        vigentes[(persona_id, fecha)] = (costo_mensual, valor_uf)
+
+    return vigentes
+
+
+def resolver_costos_hora(pares, session=None):
+    """
+    Costo hora UF vigente para cada par (persona_id, fecha).
+
+    Args:
+        pares: Iterable de (persona_id, fecha)
+        session: Sesión a usar (por defecto db.session)
+
+    Returns:
+        dict: {(persona_id, fecha): costo_hora_uf}
+    """
+    session = session or db.session
+    pares = {(persona_id, fecha) for persona_id, fecha in pares if persona_id and fecha}
+    return {
+        par: calcular_costo_hora_uf(costo_mensual, valor_uf)
+        for par, (costo_mensual, valor_uf) in _tarifas_y_uf_vigentes(pares, session).items()
+    }
+
+
+def costos_mensuales_uf(persona_ids, año, mes=None):
+    """
+    Costo mensual en UF de cada persona en cada mes del período, con la tarifa
+    y el valor UF vigentes al inicio del mes (2-3 queries).
+
+    Returns:
+        dict: {(persona_id, mes): costo_uf}
+    """
+    meses = [mes] if mes else range(1, 13)
+    pares = {(persona_id, date(año, m, 1)) for persona_id in persona_ids for m in meses}
+    return {
+        (persona_id, fecha.month): (costo_mensual or 0) / (valor_uf or VALOR_UF_ACTUAL)
+        for (persona_id, fecha), (costo_mensual, valor_uf) in _tarifas_y_uf_vigentes(pares, db.session).items()
+    }
+
+
+# ============= RESOLUCIÓN EN SQL =============
+
+def _vigencias(columna_fecha, *columnas, particion=None):
+    """
+    Subquery de vigencias: cada fila con su fecha 'desde', la fecha 'hasta'
+    (siguiente vigencia) y 'anterior' (NULL en la primera vigencia)
+    """
+    ventana = {'order_by': columna_fecha}
+    if particion is not None:
+        ventana['partition_by'] = particion
+
+    return db.session.query(
+        *columnas,
+        columna_fecha.label('desde'),
+        func.lag(columna_fecha).over(**ventana).label('anterior'),
+        func.lead(columna_fecha).over(**ventana).label('hasta')
+    ).subquery()
+
+
+def _en_vigencia(vigencias, fecha):
+    """Predicado: la fecha cae en el intervalo [desde, hasta) de la vigencia"""
+    return and_(
+        or_(vigencias.c.anterior.is_(None), vigencias.c.desde <= fecha),
+        or_(vigencias.c.hasta.is_(None), fecha < vigencias.c.hasta)
+    )
+
+
+def consulta_costos_registros():
+    """
+    Query (registro_id, costo_hora_uf actual, costo mensual vigente, valor UF vigente)
+    con un join por intervalos de vigencia de tarifas y UF. Se puede filtrar por
+    columnas de RegistroHora antes de ejecutarla.
+    """
+    tarifas = _vigencias(
+        TarifaPersona.vigente_desde, TarifaPersona.persona_id, TarifaPersona.costo_mensual_empresa,
+        particion=TarifaPersona.persona_id
+    )
+    valores_uf = _vigencias(ValorUF.fecha, ValorUF.valor)
+
+    return db.session.query(
+        RegistroHora.id,
+        RegistroHora.costo_hora_uf,
+        func.coalesce(tarifas.c.costo_mensual_empresa, Persona.costo_mensual_empresa),
+        func.coalesce(valores_uf.c.valor, VALOR_UF_ACTUAL)
+    ).join(
+        Persona, Persona.id == RegistroHora.persona_id
+    ).outerjoin(
+        tarifas, and_(tarifas.c.persona_id == RegistroHora.persona_id, _en_vigencia(tarifas, RegistroHora.fecha))
+    ).outerjoin(
+        valores_uf, _en_vigencia(valores_uf, RegistroHora.fecha)
+    )
+
+
+def asignar_costos_hora(persona_id=None, desde=None, solo_pendientes=False):
+    """
+    Recalcula RegistroHora.costo_hora_uf con la tarifa y el valor UF vigentes.
+
+    No pasa por el flush del ORM: después hay que reconstruir el resumen
+    mensual de los períodos afectados (resumen_horas.reconstruir_resumen).
+
+    Args:
+        persona_id: Solo registros de esta persona
+        desde: Solo registros con fecha >= desde
+        solo_pendientes: Solo registros sin costo hora (costo_hora_uf NULL)
+
+    Returns:
+        int: Número de registros actualizados
+    """
+    query = consulta_costos_registros()
+    if persona_id:
+        query = query.filter(RegistroHora.persona_id == persona_id)
+    if desde:
+        query = query.filter(RegistroHora.fecha >= desde)
+    if solo_pendientes:
+        query = query.filter(RegistroHora.costo_hora_uf.is_(None))
+
+    cambios = []
+    for registro_id, costo_actual, costo_mensual, valor_uf in query.all():
+        costo_hora = calcular_costo_hora_uf(costo_mensual, valor_uf)
+        if costo_actual is None or abs(costo_actual - costo_hora) > 1e-9:
+            cambios.append({'id': registro_id, 'costo_hora_uf': costo_hora})
+
+    if cambios:
+        db.session.execute(update(RegistroHora), cambios)
+    db.session.commit()
+
+    return len(cambios)
+
+
+# ============= TARIFAS =============
+
+def registrar_tarifa(persona, costo_mensual_empresa, vigente_desde=None):
+    """
+    Registra (o corrige) la tarifa de una persona desde una fecha.
+
+    Si la fecha es anterior a hoy, recalcula el costo hora de los registros
+    afectados con el ORM, así el resumen mensual se actualiza en el mismo flush.
+    No hace commit.
+
+    Returns:
+        TarifaPersona
+    """
+    vigente_desde = vigente_desde or date.today()
+
+    # Persona sin historial: la tarifa anterior es su costo actual
+    if not TarifaPersona.query.filter_by(persona_id=persona.id).count() and persona.costo_mensual_empresa:
+        db.session.add(TarifaPersona(
+            persona_id=persona.id,
+            vigente_desde=min(persona.fecha_ingreso or vigente_desde, vigente_desde - timedelta(days=1)),
+            costo_mensual_empresa=persona.costo_mensual_empresa
+        ))
+
+    tarifa = TarifaPersona.query.filter_by(persona_id=persona.id, vigente_desde=vigente_desde).first()
+    if tarifa:
+        tarifa.costo_mensual_empresa = costo_mensual_empresa
+    else:
+        tarifa = TarifaPersona(
+            persona_id=persona.id,
+            vigente_desde=vigente_desde,
+            costo_mensual_empresa=costo_mensual_empresa
+        )
+        db.session.add(tarifa)
+    db.session.flush()
+
+    if vigente_desde < date.today():
+        registros = RegistroHora.query.filter(RegistroHora.persona_id == persona.id)
+        if TarifaPersona.query.filter(
+            TarifaPersona.persona_id == persona.id,
+            TarifaPersona.vigente_desde < vigente_desde
+        ).count():
+            registros = registros.filter(RegistroHora.fecha >= vigente_desde)
+        registros = registros.all()
+
+        costos = resolver_costos_hora((r.persona_id, r.fecha) for r in registros)
+        for registro in registros:
+            registro.costo_hora_uf = costos[(registro.persona_id, registro.fecha)]
+
+    return tarifa
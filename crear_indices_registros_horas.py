@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Crear índices compuestos (dimensión, fecha) en registros_horas
+
+Los reportes filtran registros_horas por rango de fechas
+(fecha >= inicio AND fecha < fin, ver periodos.py) junto a persona, cliente,
+servicio o área. Con estos índices esas consultas son range scans en lugar
+de recorrer toda la tabla.
+
+El índice (fecha, id) sirve al listado paginado de /mis-horas
+(ORDER BY fecha DESC, id DESC, ver paginacion.py) cuando no se filtra por persona.
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python crear_indices_registros_horas.py             # Simulación (muestra el SQL)
+    python crear_indices_registros_horas.py --ejecutar  # Crea los índices
+"""
+
+import sys
+import time
+
+from sqlalchemy import text
+
+from app import app, db
+
+INDICES = [
+    ('ix_registros_horas_persona_fecha', 'persona_id, fecha'),
+    ('ix_registros_horas_cliente_fecha', 'cliente_id, fecha'),
+    ('ix_registros_horas_servicio_fecha', 'servicio_id, fecha'),
+    ('ix_registros_horas_area_fecha', 'area_id, fecha'),
+    ('ix_registros_horas_fecha_id', 'fecha, id'),
+]
+
+
+def sql_indices():
+    return [
+        f"CREATE INDEX IF NOT EXISTS {nombre} ON registros_horas ({columnas})"
+        for nombre, columnas in INDICES
+    ]
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print("CREAR ÍNDICES COMPUESTOS EN registros_horas")
+    print("=" * 80)
+    print()
+
+    if not ejecutar:
+        print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+        print()
+        print("SQL que se ejecutará:")
+        print("-" * 80)
+        for sentencia in sql_indices():
+            print(f"{sentencia};")
+        print("-" * 80)
+        print()
+        print("Para aplicar estos cambios, ejecuta:")
+        print("  python crear_indices_registros_horas.py --ejecutar")
+        return
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            for sentencia in sql_indices():
+                inicio = time.time()
+                conn.execute(text(sentencia))
+                print(f"✓ {sentencia} ({time.time() - inicio:.1f}s)")
+
+            if db.engine.dialect.name == 'postgresql':
+                conn.execute(text("ANALYZE registros_horas"))
+                print("✓ ANALYZE registros_horas")
+
+    print()
+    print("✅ Índices creados")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Crear tabla consultas_lentas (registro de consultas lentas con su plan)
+
+Con la variable CONSULTAS_LENTAS_MS definida, las consultas que superan ese
+umbral se guardan con su EXPLAIN en esta tabla (ver consultas_lentas.py) y se
+revisan en /admin/consultas-lentas, sin entrar por SSH a correr scripts de
+diagnóstico.
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python crear_tabla_consultas_lentas.py             # Simulación
+    python crear_tabla_consultas_lentas.py --ejecutar  # Crea la tabla
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from app import app, db, ConsultaLenta
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print("CREAR TABLA consultas_lentas")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        if inspect(db.engine).has_table(ConsultaLenta.__tablename__):
+            print("✓ La tabla consultas_lentas ya existe")
+            return
+
+        if not ejecutar:
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print()
+            print("Se creará la tabla consultas_lentas (fecha, duracion_ms, sentencia, parametros,")
+            print("metodo, ruta, endpoint, plan)")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python crear_tabla_consultas_lentas.py --ejecutar")
+            return
+
+        ConsultaLenta.__table__.create(db.engine)
+        print("✅ Tabla consultas_lentas creada")
+        print()
+        print("Para activar la captura, define CONSULTAS_LENTAS_MS (ej: 200) en el ambiente")
+
+
+if __name__ == '__main__':
+    main()
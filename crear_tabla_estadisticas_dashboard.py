@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Crear tabla estadisticas_dashboard y calcularla desde los datos existentes
+
+El dashboard lee sus indicadores (horas del mes y del año, ingresos, costo de
+la dotación) de esta tabla por clave primaria en vez de sumarlos en cada visita
+(ver estadisticas_dashboard.py). La tabla debe existir antes de desplegar esta
+versión de app.py: los flush que tocan horas, ingresos o personas escriben en ella.
+
+También sirve para recalcularla después de cargar ingresos con SQL directo
+(las cargas de horas ya la recalculan con reconstruir_resumen).
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python crear_tabla_estadisticas_dashboard.py             # Simulación
+    python crear_tabla_estadisticas_dashboard.py --ejecutar  # Crea (si falta) y recalcula
+"""
+
+import sys
+import time
+
+from sqlalchemy import inspect
+
+from app import app, db, EstadisticaDashboard
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print("CREAR TABLA estadisticas_dashboard")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        existe = inspect(db.engine).has_table(EstadisticaDashboard.__tablename__)
+        print(f"Tabla estadisticas_dashboard: {'ya existe (se recalcula)' if existe else 'no existe'}")
+
+        if not ejecutar:
+            print()
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python crear_tabla_estadisticas_dashboard.py --ejecutar")
+            return
+
+        if not existe:
+            EstadisticaDashboard.__table__.create(db.engine)
+            print("✓ Tabla estadisticas_dashboard creada")
+
+        from estadisticas_dashboard import reconstruir_estadisticas
+
+        inicio = time.time()
+        filas = reconstruir_estadisticas()
+        print(f"✓ {filas:,} filas calculadas ({time.time() - inicio:.1f}s)")
+
+    print()
+    print("✅ Estadísticas del dashboard listas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Crear tabla ingresos_proyectados_area y cargar la facturación por área 2025
+
+Los ingresos mensuales proyectados por área (usados por /api/rentabilidad-por-area)
+estaban fijos en app.py; ahora se leen de la tabla ingresos_proyectados_area
+(área, año, ingreso mensual UF). Para otro año basta con agregar filas.
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python crear_tabla_ingresos_proyectados_area.py             # Simulación
+    python crear_tabla_ingresos_proyectados_area.py --ejecutar  # Crea la tabla y carga 2025
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from app import app, db, Area, IngresoProyectadoArea
+
+# Facturación por área 2025 (desde Excel), UF/mes. Total: 5,586.9 UF/mes (67,043 UF/año)
+AÑO = 2025
+INGRESOS_MENSUALES_POR_AREA = {
+    'Externas': 3604.9,           # Comunicaciones externas
+    'Asuntos Públicos': 270.0,     # AAPP
+    'Redes Sociales': 874.4,       # Redes sociales
+    'Diseño': 292.6,               # Diseño
+    'Internas': 545.0              # Comunicaciones internas
+}
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print("CREAR TABLA ingresos_proyectados_area")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        existe = inspect(db.engine).has_table(IngresoProyectadoArea.__tablename__)
+        print(f"Tabla ingresos_proyectados_area: {'ya existe' if existe else 'no existe'}")
+
+        areas = {area.nombre: area for area in Area.query.all()}
+        cargados = set()
+        if existe:
+            cargados = {
+                area_id for (area_id,) in
+                db.session.query(IngresoProyectadoArea.area_id).filter_by(año=AÑO)
+            }
+
+        pendientes = []
+        for nombre, ingreso_mensual in INGRESOS_MENSUALES_POR_AREA.items():
+            area = areas.get(nombre)
+            if not area:
+                print(f"  ⚠️  Área no encontrada: {nombre}")
+            elif area.id in cargados:
+                print(f"  Ya cargada: {nombre} ({AÑO})")
+            else:
+                pendientes.append((area, ingreso_mensual))
+                print(f"  - {nombre}: {ingreso_mensual:,.1f} UF/mes ({AÑO})")
+
+        if not ejecutar:
+            print()
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python crear_tabla_ingresos_proyectados_area.py --ejecutar")
+            return
+
+        if not existe:
+            IngresoProyectadoArea.__table__.create(db.engine)
+            print("✓ Tabla ingresos_proyectados_area creada")
+
+        for area, ingreso_mensual in pendientes:
+            db.session.add(IngresoProyectadoArea(area_id=area.id, año=AÑO, ingreso_mensual_uf=ingreso_mensual))
+        db.session.commit()
+        print(f"✓ {len(pendientes)} ingresos proyectados cargados")
+
+    print()
+    print("✅ Ingresos proyectados por área listos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Crear tabla jerarquia_personas (tabla de clausura del organigrama) y calcularla
+
+Los permisos de visibilidad (Persona.puede_ver_persona, mis horas) consultan
+esta tabla para incluir a las personas bajo cada jefatura a cualquier
+profundidad (ver jerarquia.py). La tabla debe existir antes de desplegar esta
+versión de app.py: los flush que crean personas o cambian reporte_a_id escriben en ella.
+
+También sirve para recalcularla después de cambiar reporte_a_id con SQL directo.
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python crear_tabla_jerarquia_personas.py             # Simulación
+    python crear_tabla_jerarquia_personas.py --ejecutar  # Crea (si falta) y recalcula
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from app import app, db, JerarquiaPersona
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print("CREAR TABLA jerarquia_personas")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        existe = inspect(db.engine).has_table(JerarquiaPersona.__tablename__)
+        print(f"Tabla jerarquia_personas: {'ya existe (se recalcula)' if existe else 'no existe'}")
+
+        if not ejecutar:
+            print()
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python crear_tabla_jerarquia_personas.py --ejecutar")
+            return
+
+        if not existe:
+            JerarquiaPersona.__table__.create(db.engine)
+            print("✓ Tabla jerarquia_personas creada")
+
+        from jerarquia import reconstruir_jerarquia
+
+        filas = reconstruir_jerarquia()
+        print(f"✓ {filas:,} relaciones ancestro → descendiente calculadas")
+
+    print()
+    print("✅ Jerarquía lista")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Crear tabla versiones_tablas (contadores de cambios por tabla)
+
+Cada escritura con el ORM incrementa la versión de las tablas que toca
+(ver versiones.py); los reportes en caché (cache_resultados.py) se invalidan
+cuando cambia la versión de sus tablas. La tabla debe existir antes de
+desplegar esta versión de app.py: todos los flush escriben en ella.
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python crear_tabla_versiones.py             # Simulación
+    python crear_tabla_versiones.py --ejecutar  # Crea la tabla
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from app import app, db, VersionTabla
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print("CREAR TABLA versiones_tablas")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        if inspect(db.engine).has_table(VersionTabla.__tablename__):
+            print("✓ La tabla versiones_tablas ya existe")
+            return
+
+        if not ejecutar:
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print()
+            print("Se creará la tabla versiones_tablas (tabla, version, actualizado)")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python crear_tabla_versiones.py --ejecutar")
+            return
+
+        VersionTabla.__table__.create(db.engine)
+        print("✅ Tabla versiones_tablas creada")
+
+
+if __name__ == '__main__':
+    main()
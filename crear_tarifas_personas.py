@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Crear tablas tarifas_personas y valores_uf (costos con vigencia)
+
+Pasos:
+    1. Crea las tablas si no existen
+    2. Crea la tarifa inicial de cada persona sin tarifas, con su costo mensual
+       actual vigente desde su fecha de ingreso (o su primer registro de horas)
+    3. Opcional: carga valores UF desde un CSV (fecha,valor) y recalcula el costo
+       hora de los registros desde la primera fecha cargada
+    4. Reconstruye resumen_horas_mensual si cambiaron costos
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python crear_tarifas_personas.py                               # Simulación
+    python crear_tarifas_personas.py --ejecutar                    # Tarifas iniciales
+    python crear_tarifas_personas.py --ejecutar --uf valores.csv   # + valores UF
+
+Formato del CSV de UF (fecha ISO o DD-MM-YYYY, valor con punto o coma decimal):
+    fecha,valor
+    2025-01-01,38419.17
+"""
+
+import csv
+import sys
+import time
+from datetime import date, datetime
+
+from sqlalchemy import func
+
+from app import app, db, Persona, RegistroHora, TarifaPersona, ValorUF
+
+
+def leer_valores_uf(archivo):
+    """Lee el CSV de UF y retorna {fecha: valor}"""
+    valores = {}
+    with open(archivo, newline='', encoding='utf-8') as f:
+        for fila in csv.DictReader(f):
+            texto_fecha = fila['fecha'].strip()
+            try:
+                fecha = datetime.strptime(texto_fecha, '%Y-%m-%d').date()
+            except ValueError:
+                fecha = datetime.strptime(texto_fecha, '%d-%m-%Y').date()
+
+            # Formato chileno: 38.419,17
+            texto_valor = fila['valor'].strip()
+            if ',' in texto_valor:
+                texto_valor = texto_valor.replace('.', '').replace(',', '.')
+            valores[fecha] = float(texto_valor)
+    return valores
+
+
+def tarifas_iniciales():
+    """Retorna [(persona, vigente_desde)] de las personas sin tarifas"""
+    con_tarifa = {persona_id for (persona_id,) in db.session.query(TarifaPersona.persona_id).distinct()}
+    primer_registro = dict(
+        db.session.query(RegistroHora.persona_id, func.min(RegistroHora.fecha))
+        .group_by(RegistroHora.persona_id).all()
+    )
+
+    return [
+        (persona, persona.fecha_ingreso or primer_registro.get(persona.id) or date.today())
+        for persona in Persona.query.order_by(Persona.id).all()
+        if persona.id not in con_tarifa
+    ]
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+    archivo_uf = sys.argv[sys.argv.index('--uf') + 1] if '--uf' in sys.argv else None
+
+    print("=" * 80)
+    print("CREAR TARIFAS DE PERSONAS Y VALORES UF")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        # Crea tarifas_personas y valores_uf si aún no existen
+        if ejecutar:
+            db.create_all()
+
+        pendientes = tarifas_iniciales()
+        print(f"Personas sin tarifa: {len(pendientes)}")
+        for persona, vigente_desde in pendientes[:10]:
+            print(f"  - {persona.nombre}: ${persona.costo_mensual_empresa:,.0f} desde {vigente_desde}")
+        if len(pendientes) > 10:
+            print(f"  ... y {len(pendientes) - 10} más")
+
+        valores_uf = leer_valores_uf(archivo_uf) if archivo_uf else {}
+        if archivo_uf:
+            print(f"Valores UF en {archivo_uf}: {len(valores_uf)}")
+
+        if not ejecutar:
+            print()
+            print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+            print()
+            print("Para aplicar estos cambios, ejecuta:")
+            print("  python crear_tarifas_personas.py --ejecutar")
+            return
+
+        for persona, vigente_desde in pendientes:
+            db.session.add(TarifaPersona(
+                persona_id=persona.id,
+                vigente_desde=vigente_desde,
+                costo_mensual_empresa=persona.costo_mensual_empresa
+            ))
+        db.session.commit()
+        print(f"✓ {len(pendientes)} tarifas iniciales creadas")
+
+        if not valores_uf:
+            return
+
+        existentes = {v.fecha: v for v in ValorUF.query.filter(ValorUF.fecha.in_(valores_uf)).all()}
+        for fecha, valor in valores_uf.items():
+            if fecha in existentes:
+                existentes[fecha].valor = valor
+            else:
+                db.session.add(ValorUF(fecha=fecha, valor=valor))
+        db.session.commit()
+        print(f"✓ {len(valores_uf)} valores UF cargados")
+
+        from costos import asignar_costos_hora
+        from resumen_horas import reconstruir_resumen
+
+        desde = min(valores_uf)
+        inicio = time.time()
+        actualizados = asignar_costos_hora(desde=desde)
+        print(f"✓ {actualizados:,} registros con costo hora recalculado desde {desde} ({time.time() - inicio:.1f}s)")
+
+        if actualizados:
+            ultimo_año = db.session.query(func.max(RegistroHora.fecha)).scalar().year
+            for año in range(desde.year, ultimo_año + 1):
+                filas = reconstruir_resumen(año)
+                print(f"✓ Resumen {año}: {filas:,} filas")
+
+    print()
+    print("✅ Tarifas y valores UF listos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Estadísticas precalculadas del dashboard (tabla estadisticas_dashboard)
+
+El dashboard es la página de inicio después de cada login. Antes sumaba en
+cada visita las horas del mes y del año de la persona (resumen mensual), los
+ingresos del mes y del año (ingresos_mensuales) y cargaba todas las personas
+activas para sumar su costo mensual. Ahora lee sus indicadores por clave
+primaria de esta tabla:
+
+    (persona_id, año, mes)   horas de la persona en el mes
+    (persona_id, año, 0)     horas de la persona en el año
+    (0, año, mes)            ingresos UF de la empresa en el mes
+    (0, año, 0)              ingresos UF de la empresa en el año
+    (0, 0, 0)                personas activas y su costo mensual total (pesos)
+
+Mantenimiento:
+    - Incremental: aplicar_cambios_dashboard() corre en cada flush (before_flush,
+      después del resumen de horas) con los cambios de RegistroHora,
+      IngresoMensual y Persona hechos con el ORM. Los incrementos se escriben
+      como UPDATE ... SET columna = columna + delta, en la misma transacción.
+    - Completo: reconstruir_estadisticas() recalcula desde resumen_horas_mensual,
+      ingresos_mensuales y personas. reconstruir_resumen() la llama al terminar;
+      usarla también después de cargar ingresos con SQL directo.
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import func, insert, inspect, or_, tuple_
+
+from app import db, EstadisticaDashboard, IngresoMensual, Persona, ResumenHorasMensual
+
+EMPRESA = 0
+TOTAL_AÑO = 0
+DOTACION = (EMPRESA, 0, 0)
+
+
+# ============= LECTURA =============
+
+def leer_estadisticas(persona_id, año, mes, empresa=False):
+    """
+    Indicadores del dashboard en una sola consulta por clave primaria.
+
+    Returns:
+        dict: horas_mes, horas_año y, con empresa=True, ingresos_mes,
+              ingresos_año, personas_activas y costo_mensual_pesos
+    """
+    claves = {
+        'horas_mes': (persona_id, año, mes),
+        'horas_año': (persona_id, año, TOTAL_AÑO),
+    }
+    if empresa:
+        claves.update({
+            'ingresos_mes': (EMPRESA, año, mes),
+            'ingresos_año': (EMPRESA, año, TOTAL_AÑO),
+            'dotacion': DOTACION,
+        })
+
+    filas = {
+        (fila.persona_id, fila.año, fila.mes): fila
+        for fila in EstadisticaDashboard.query.filter(
+            tuple_(EstadisticaDashboard.persona_id, EstadisticaDashboard.año, EstadisticaDashboard.mes)
+            .in_(list(claves.values()))
+        )
+    }
+
+    def valor(nombre, columna):
+        fila = filas.get(claves[nombre])
+        return getattr(fila, columna) if fila else 0
+
+    estadisticas = {
+        'horas_mes': valor('horas_mes', 'horas'),
+        'horas_año': valor('horas_año', 'horas'),
+    }
+    if empresa:
+        estadisticas.update({
+            'ingresos_mes': valor('ingresos_mes', 'ingresos_uf'),
+            'ingresos_año': valor('ingresos_año', 'ingresos_uf'),
+            'personas_activas': valor('dotacion', 'personas_activas'),
+            'costo_mensual_pesos': valor('dotacion', 'costo_mensual_pesos'),
+        })
+    return estadisticas
+
+
+# ============= MANTENIMIENTO INCREMENTAL =============
+
+def _anterior(objeto, atributo):
+    """Valor de un atributo antes de los cambios pendientes del flush"""
+    historial = inspect(objeto).attrs[atributo].history
+    if historial.deleted:
+        return historial.deleted[0]
+    return getattr(objeto, atributo)
+
+
+def _cambios(session, modelo):
+    """(nuevos, eliminados, modificados) de un modelo en la sesión"""
+    nuevos = [obj for obj in session.new if isinstance(obj, modelo)]
+    eliminados = [obj for obj in session.deleted if isinstance(obj, modelo)]
+    modificados = [obj for obj in session.dirty if isinstance(obj, modelo) and session.is_modified(obj)]
+    return nuevos, eliminados, modificados
+
+
+def aplicar_cambios_dashboard(session, deltas_horas):
+    """
+    Aplica a estadisticas_dashboard los cambios pendientes de la sesión.
+
+    Args:
+        deltas_horas: Deltas del resumen mensual (resumen_horas.aplicar_cambios_sesion)
+    """
+    deltas = defaultdict(lambda: defaultdict(float))
+
+    for (persona_id, _, _, _, año, mes), (horas, _) in deltas_horas.items():
+        deltas[(persona_id, año, mes)]['horas'] += horas
+        deltas[(persona_id, año, TOTAL_AÑO)]['horas'] += horas
+
+    def ingreso(objeto, signo, anterior=False):
+        valor = (lambda a: _anterior(objeto, a)) if anterior else (lambda a: getattr(objeto, a))
+        ingreso_uf = signo * (valor('ingreso_uf') or 0)
+        deltas[(EMPRESA, valor('año'), valor('mes'))]['ingresos_uf'] += ingreso_uf
+        deltas[(EMPRESA, valor('año'), TOTAL_AÑO)]['ingresos_uf'] += ingreso_uf
+
+    nuevos, eliminados, modificados = _cambios(session, IngresoMensual)
+    for objeto in nuevos:
+        ingreso(objeto, 1)
+    for objeto in eliminados:
+        ingreso(objeto, -1, anterior=True)
+    for objeto in modificados:
+        ingreso(objeto, -1, anterior=True)
+        ingreso(objeto, 1)
+
+    def dotacion(persona, signo, anterior=False):
+        valor = (lambda a: _anterior(persona, a)) if anterior else (lambda a: getattr(persona, a))
+        # activo tiene default=True: en una persona nueva puede ser None hasta el INSERT
+        if valor('activo') is False:
+            return
+        deltas[DOTACION]['personas_activas'] += signo
+        deltas[DOTACION]['costo_mensual_pesos'] += signo * (valor('costo_mensual_empresa') or 0)
+
+    nuevos, eliminados, modificados = _cambios(session, Persona)
+    for persona in nuevos:
+        dotacion(persona, 1)
+    for persona in eliminados:
+        dotacion(persona, -1, anterior=True)
+    for persona in modificados:
+        dotacion(persona, -1, anterior=True)
+        dotacion(persona, 1)
+
+    with session.no_autoflush:
+        for clave, cambios in deltas.items():
+            cambios = {columna: delta for columna, delta in cambios.items() if abs(delta) > 1e-9}
+            if not cambios:
+                continue
+
+            fila = session.get(EstadisticaDashboard, clave)
+            if fila is None:
+                persona_id, año, mes = clave
+                session.add(EstadisticaDashboard(persona_id=persona_id, año=año, mes=mes, **dict(
+                    {'horas': 0, 'ingresos_uf': 0, 'personas_activas': 0, 'costo_mensual_pesos': 0},
+                    **cambios
+                )))
+                continue
+
+            # UPDATE ... SET columna = columna + delta: sin perder incrementos concurrentes
+            for columna, delta in cambios.items():
+                setattr(fila, columna, getattr(EstadisticaDashboard, columna) + delta)
+
+
+# ============= RECONSTRUCCIÓN =============
+
+def reconstruir_estadisticas(año=None):
+    """
+    Recalcula las estadísticas desde resumen_horas_mensual, ingresos_mensuales y personas.
+
+    Args:
+        año: Año a reconstruir (None = todos). La dotación se recalcula siempre.
+
+    Returns:
+        int: Filas escritas
+    """
+    filas = defaultdict(lambda: {'horas': 0, 'ingresos_uf': 0, 'personas_activas': 0, 'costo_mensual_pesos': 0})
+
+    horas = db.session.query(
+        ResumenHorasMensual.persona_id, ResumenHorasMensual.año, ResumenHorasMensual.mes,
+        func.sum(ResumenHorasMensual.horas)
+    )
+    ingresos = db.session.query(
+        IngresoMensual.año, IngresoMensual.mes, func.sum(IngresoMensual.ingreso_uf)
+    )
+    if año:
+        horas = horas.filter(ResumenHorasMensual.año == año)
+        ingresos = ingresos.filter(IngresoMensual.año == año)
+
+    for persona_id, año_fila, mes, total in horas.group_by(
+        ResumenHorasMensual.persona_id, ResumenHorasMensual.año, ResumenHorasMensual.mes
+    ):
+        filas[(persona_id, año_fila, mes)]['horas'] += total or 0
+        filas[(persona_id, año_fila, TOTAL_AÑO)]['horas'] += total or 0
+
+    for año_fila, mes, total in ingresos.group_by(IngresoMensual.año, IngresoMensual.mes):
+        filas[(EMPRESA, año_fila, mes)]['ingresos_uf'] += total or 0
+        filas[(EMPRESA, año_fila, TOTAL_AÑO)]['ingresos_uf'] += total or 0
+
+    personas_activas, costo_total = db.session.query(
+        func.count(Persona.id), func.sum(Persona.costo_mensual_empresa)
+    ).filter(Persona.activo == True).one()
+    filas[DOTACION].update(personas_activas=personas_activas, costo_mensual_pesos=costo_total or 0)
+
+    borrar = EstadisticaDashboard.query
+    if año:
+        borrar = borrar.filter(or_(
+            EstadisticaDashboard.año == año,
+            tuple_(EstadisticaDashboard.persona_id, EstadisticaDashboard.año, EstadisticaDashboard.mes) == DOTACION
+        ))
+    borrar.delete(synchronize_session=False)
+
+    valores = [
+        dict(persona_id=persona_id, año=año_fila, mes=mes, **columnas)
+        for (persona_id, año_fila, mes), columnas in filas.items()
+    ]
+    db.session.execute(insert(EstadisticaDashboard), valores)
+    db.session.commit()
+
+    return len(valores)
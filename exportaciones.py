@@ -0,0 +1,225 @@
+"""
+Exportación de reportes a CSV y Excel (xlsx) en streaming
+
+Las filas se escriben a la respuesta a medida que se leen (la consulta de horas
+usa yield_per, que en PostgreSQL es un cursor del lado del servidor), así que
+una exportación de varios años usa memoria constante y el navegador empieza a
+recibir datos de inmediato, sin acercarse al timeout de gunicorn.
+
+    - csv: UTF-8 con BOM (Excel lo abre con tildes correctas)
+    - xlsx: hoja única escrita directamente como XML dentro de un zip que se
+      va enviando por partes (zipfile sobre un flujo no seekable). No requiere
+      openpyxl, que solo está instalado donde corren los importadores.
+
+Uso (en una ruta):
+    return respuesta_exportacion('horas_2025', 'xlsx', ['Fecha', 'Horas'], filas)
+"""
+
+import csv
+import io
+import math
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from flask import Response, stream_with_context
+
+FILAS_POR_BLOQUE = 1000
+
+TIPOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+# ============= CSV =============
+
+def _csv(encabezados, filas):
+    """Bloques de bytes de un CSV (UTF-8 con BOM)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('﻿')
+    escritor.writerow(encabezados)
+
+    for numero, fila in enumerate(filas, 1):
+        escritor.writerow(['' if valor is None else valor for valor in fila])
+        if numero % FILAS_POR_BLOQUE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+# ============= XLSX =============
+
+# Estilos: 0 normal, 1 fecha, 2 fecha y hora, 3 encabezado (negrita)
+ESTILO_FECHA, ESTILO_FECHA_HORA, ESTILO_ENCABEZADO = 1, 2, 3
+EPOCA_EXCEL = datetime(1899, 12, 30)
+CARACTERES_INVALIDOS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+PARTES_XLSX = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '</cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+
+def _workbook(hoja):
+    # Excel no acepta nombres de hoja con []:*?/\ ni de más de 31 caracteres
+    nombre = re.sub(r'[\[\]:*?/\\]', ' ', hoja)[:31] or 'Hoja1'
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(nombre, {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _columna(indice):
+    """Letra de columna de Excel (0 → A, 26 → AA)"""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(referencia, valor, estilo=0):
+    """XML de una celda; texto como inlineStr (sin tabla de strings compartidos)"""
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)) and math.isfinite(valor):
+        return f'<c r="{referencia}"><v>{valor!r}</v></c>'
+    if isinstance(valor, datetime):
+        serial = (valor - EPOCA_EXCEL).total_seconds() / 86400
+        return f'<c r="{referencia}" s="{ESTILO_FECHA_HORA}"><v>{serial!r}</v></c>'
+    if isinstance(valor, date):
+        serial = (valor - EPOCA_EXCEL.date()).days
+        return f'<c r="{referencia}" s="{ESTILO_FECHA}"><v>{serial}</v></c>'
+
+    texto = escape(CARACTERES_INVALIDOS.sub('', str(valor)))
+    estilo = f' s="{estilo}"' if estilo else ''
+    return f'<c r="{referencia}" t="inlineStr"{estilo}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila(numero, valores, estilo=0):
+    celdas = ''.join(_celda(f'{_columna(i)}{numero}', valor, estilo) for i, valor in enumerate(valores))
+    return f'<row r="{numero}">{celdas}</row>'
+
+
+class _Salida:
+    """Flujo de solo escritura: zipfile escribe aquí y el generador vacía lo acumulado"""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes.clear()
+        return datos
+
+
+def _xlsx(encabezados, filas, hoja):
+    """Bloques de bytes de un xlsx de una hoja"""
+    salida = _Salida()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as archivo:
+        for nombre, contenido in PARTES_XLSX.items():
+            archivo.writestr(nombre, contenido)
+        archivo.writestr('xl/workbook.xml', _workbook(hoja))
+
+        with archivo.open('xl/worksheets/sheet1.xml', 'w') as xml:
+            xml.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews><sheetData>'
+                + _fila(1, encabezados, ESTILO_ENCABEZADO)
+            ).encode('utf-8'))
+
+            bloque = []
+            for numero, fila in enumerate(filas, 2):
+                bloque.append(_fila(numero, fila))
+                if len(bloque) == FILAS_POR_BLOQUE:
+                    xml.write(''.join(bloque).encode('utf-8'))
+                    bloque.clear()
+                    yield salida.vaciar()
+
+            xml.write((''.join(bloque) + '</sheetData></worksheet>').encode('utf-8'))
+
+    yield salida.vaciar()
+
+
+# ============= RESPUESTA =============
+
+def respuesta_exportacion(nombre, formato, encabezados, filas):
+    """
+    Respuesta HTTP que descarga filas como CSV o xlsx, escrita en streaming.
+
+    Args:
+        nombre: Nombre del archivo sin extensión (también nombre de la hoja)
+        formato: 'csv' o 'xlsx'
+        encabezados: Títulos de las columnas
+        filas: Iterable de tuplas; puede ser un generador sobre una consulta con
+               yield_per (se consume dentro del contexto del request)
+    """
+    if formato == 'csv':
+        bloques = _csv(encabezados, filas)
+    else:
+        bloques = _xlsx(encabezados, filas, nombre)
+
+    return Response(
+        stream_with_context(bloques),
+        mimetype=TIPOS[formato],
+        headers={'Content-Disposition': f'attachment; filename="{nombre}.{formato}"'}
+    )
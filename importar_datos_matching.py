@@ -5,11 +5,12 @@ Este script:
 1. Inicializa la base de datos si no existe
 2. Crea personas (equipo) con sus costos
 3. Crea clientes consolidados (aplicando misma lógica de consolidación)
-4. Importa registros de horas (Historial2024-2025.csv filtrado ene-sep 2025)
+4. Importa registros de horas (Historial2024-2025.csv filtrado ene-sep 2025,
+   leído por bloques con lector_horas.py y cargado con motor_importacion.py)
 5. Importa ingresos mensuales (Clientes_Permanentes.csv y Clientes_Spot.csv)
 """
 
-from app import app, db, Persona, Cliente, RegistroHora, ServicioCliente, IngresoMensual, Area, Servicio, Tarea
+from app import app, db, Persona, Cliente, ServicioCliente, IngresoMensual, Area, Servicio, Tarea
 import pandas as pd
 import hashlib
 from datetime import datetime, date
@@ -17,8 +18,6 @@ from datetime import datetime, date
 # ============= CONSTANTES =============
 VALOR_UF = 38000  # Pesos chilenos por UF
 HORAS_EFECTIVAS_MES = 156
-FECHA_INICIO = '2025-01-01'
-FECHA_FIN = '2025-09-30'
 MESES_INGRESOS = ['ene-25', 'feb-25', 'mar-25', 'abr-25', 'may-25', 'jun-25', 'jul-25', 'ago-25', 'sept-25']
 
 # Mapeo de mes texto a número
@@ -315,82 +314,56 @@ def inicializar_sistema():
         # Paso 7: Importar registros de horas
         print("\n6. IMPORTANDO REGISTROS DE HORAS (ENE-SEP 2025)...")
 
-        df_horas = pd.read_csv('/Users/alfil/Desktop/Desarrollos/Comsulting/Historial2024-2025.csv')
-        df_horas['Date'] = pd.to_datetime(df_horas['Date'])
+        from lector_horas import leer_registros_horas
+        from motor_importacion import ImportadorHoras
+        from resumen_horas import reconstruir_resumen
 
-        # Filtrar por período
-        df_horas = df_horas[
-            (df_horas['Date'] >= FECHA_INICIO) &
-            (df_horas['Date'] <= FECHA_FIN)
-        ]
-
-        # Convertir horas (formato europeo)
-        df_horas['Hours'] = df_horas['Hours'].apply(
-            lambda x: float(str(x).replace(',', '.')) if pd.notna(x) else 0
-        )
-
-        registros_creados = 0
         registros_omitidos = 0
 
-        for idx, row in df_horas.iterrows():
-            # Obtener persona
-            nombre_completo = f"{row['First Name']} {row['Last Name']}"
-            persona = personas_db.get(nombre_completo)
-
-            if not persona:
-                registros_omitidos += 1
-                continue
-
-            # Obtener cliente
-            nombre_cliente = normalizar_nombre_cliente(row['Client'])
-            if not nombre_cliente:
-                registros_omitidos += 1
-                continue
-
-            cliente = clientes_db.get(nombre_cliente)
-            if not cliente:
-                # Crear cliente si no existe (puede ser interno)
-                cliente = Cliente.query.filter_by(nombre=nombre_cliente).first()
-                if not cliente:
-                    cliente = Cliente(
-                        nombre=nombre_cliente,
-                        tipo='interno',
-                        activo=True
-                    )
-                    db.session.add(cliente)
-                    db.session.commit()
-                    clientes_db[nombre_cliente] = cliente
-
-            # Verificar si ya existe este registro
-            existe = RegistroHora.query.filter_by(
-                persona_id=persona.id,
-                cliente_id=cliente.id,
-                fecha=row['Date'].date(),
-                horas=row['Hours']
-            ).first()
-
-            if not existe:
-                registro = RegistroHora(
-                    persona_id=persona.id,
-                    cliente_id=cliente.id,
-                    area_id=area_general.id,
-                    servicio_id=servicio_general.id,
-                    tarea_id=tarea_general.id,
-                    fecha=row['Date'].date(),
-                    horas=row['Hours'],
-                    descripcion=row.get('Notes', '')
-                )
-                db.session.add(registro)
-                registros_creados += 1
+        def bloques():
+            """Bloques del CSV (ene-sep 2025) como registros para el motor de importación"""
+            nonlocal registros_omitidos
+            for filas in leer_registros_horas(
+                '/Users/alfil/Desktop/Desarrollos/Comsulting/Historial2024-2025.csv',
+                desde=date(2025, 1, 1), hasta=date(2025, 10, 1)
+            ):
+                registros = []
+                for fila in filas:
+                    # Obtener persona y cliente
+                    persona = personas_db.get(fila['nombre_completo'])
+                    nombre_cliente = normalizar_nombre_cliente(fila['cliente'])
+                    if not persona or not nombre_cliente:
+                        registros_omitidos += 1
+                        continue
+
+                    registros.append({
+                        'persona_id': persona.id,
+                        'cliente': nombre_cliente,
+                        'tipo_cliente': 'interno',  # Si no existe (puede ser interno)
+                        'area': area_general.nombre,
+                        'servicio': servicio_general.nombre,
+                        'tarea': tarea_general.nombre,
+                        'fecha': fila['fecha'],
+                        'horas': fila['horas'],
+                        'descripcion': fila['notas']
+                    })
+                yield registros
+
+        def progreso(acumulado):
+            print(f"   ... {acumulado['importados']} registros creados")
+
+        # Carga masiva por bloques en la transacción de la sesión
+        importador = ImportadorHoras(db.session.connection(), clientes_sin_mayusculas=False)
+        resultado = importador.importar_bloques(bloques(), progreso)
+        db.session.commit()
+        registros_creados = resultado['importados']
 
-                # Commit cada 1000 registros para evitar problemas de memoria
-                if registros_creados % 1000 == 0:
-                    db.session.commit()
-                    print(f"   ... {registros_creados} registros creados")
+        # Los INSERT masivos no pasan por el ORM: costo hora y resumen mensual
+        reconstruir_resumen(2025)
 
-        db.session.commit()
         print(f"   ✓ {registros_creados} registros de horas importados")
         print(f"   ⚠ {registros_omitidos} registros omitidos (persona/cliente no encontrado)")
+        print(f"   ⚠ {resultado['duplicados']} registros ya existían")
 
         # Resumen final
         print("\n" + "="*80)
@@ -22,6 +22,9 @@ if DATABASE_URL:
 else:
     DATABASE_URL = 'sqlite:///comsulting_simplified.db'
 
+# JSON de gastos (usar el archivo actualizado con línea 74)
+JSON_PATH = 'gastos_overhead_2025_real.json'
+
 # Mapeo de conceptos a categorías
 CATEGORIAS = {
     'arriendo': 'Oficina',
@@ -55,20 +58,46 @@ def categorizar_gasto(concepto):
 
     return 'Otros'
 
+def leer_json(json_path=JSON_PATH):
+    """Lee el JSON de gastos (sin usar la base de datos)"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def cargar_gastos(session, data):
+    """Agrega a la sesión un GastoOverhead por gasto mensual del JSON (sin commit)"""
+    total_registros = 0
+
+    for gasto_mes in data['gastos_por_mes']:
+        nuevo_gasto = GastoOverhead(
+            año=gasto_mes['año'],
+            mes=gasto_mes['mes'],
+            concepto=gasto_mes['concepto'],
+            categoria=gasto_mes['categoria'],
+            monto_pesos=float(gasto_mes['monto_pesos'])
+        )
+        session.add(nuevo_gasto)
+        total_registros += 1
+
+        print(f"   {gasto_mes['mes_nombre']:>12}: ${gasto_mes['monto_pesos']:>15,.0f} = {gasto_mes['monto_uf']:>8,.2f} UF")
+
+    return total_registros
+
+def reemplazar_gastos(session, data):
+    """Reemplaza los gastos de los años del JSON (importación no interactiva, sin commit)"""
+    años = sorted({gasto_mes['año'] for gasto_mes in data['gastos_por_mes']})
+    session.query(GastoOverhead).filter(GastoOverhead.año.in_(años)).delete(synchronize_session=False)
+    return cargar_gastos(session, data)
+
 def main():
     print("=" * 80)
     print("IMPORTACIÓN DE GASTOS OVERHEAD")
     print("=" * 80)
 
-    # Leer JSON (usar el archivo actualizado con línea 74)
-    json_path = 'gastos_overhead_2025_real.json'
-
-    if not os.path.exists(json_path):
-        print(f"\n❌ Error: No se encontró el archivo {json_path}")
+    if not os.path.exists(JSON_PATH):
+        print(f"\n❌ Error: No se encontró el archivo {JSON_PATH}")
         sys.exit(1)
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = leer_json()
 
     gastos_por_mes = data['gastos_por_mes']
     resumen = data['resumen']
@@ -99,20 +128,7 @@ def main():
     # Importar gastos
     print("\n📥 Importando gastos overhead mensuales...")
 
-    total_registros = 0
-
-    for gasto_mes in gastos_por_mes:
-        nuevo_gasto = GastoOverhead(
-            año=gasto_mes['año'],
-            mes=gasto_mes['mes'],
-            concepto=gasto_mes['concepto'],
-            categoria=gasto_mes['categoria'],
-            monto_pesos=float(gasto_mes['monto_pesos'])
-        )
-        session.add(nuevo_gasto)
-        total_registros += 1
-
-        print(f"   {gasto_mes['mes_nombre']:>12}: ${gasto_mes['monto_pesos']:>15,.0f} = {gasto_mes['monto_uf']:>8,.2f} UF")
+    total_registros = cargar_gastos(session, data)
 
     # Commit
     try:
@@ -5,6 +5,7 @@ Este script:
 1. Crea personas faltantes en la BD
 2. Mapea correctamente nombres de Excel (Harvest) a nombres en BD
 3. Importa registros de horas asociándolos correctamente a personas y clientes
+   (carga masiva, ver motor_importacion.py)
 4. Evita duplicados verificando si el registro ya existe
 
 IMPORTANTE: Solo importa registros de 2025 (ene-sep) que faltan
@@ -12,6 +13,7 @@ IMPORTANTE: Solo importa registros de 2025 (ene-sep) que faltan
 
 import pandas as pd
 import sqlite3
+from sqlalchemy import create_engine
 from datetime import datetime
 from collections import defaultdict
 
@@ -113,30 +115,6 @@ def obtener_mapeo_personas(conn):
 
     return mapeo
 
-def obtener_o_crear_cliente(conn, nombre_cliente):
-    """Obtiene o crea un cliente"""
-    cursor = conn.cursor()
-
-    # Normalizar nombre
-    nombre_cliente = nombre_cliente.strip()
-
-    # Buscar cliente existente
-    cursor.execute("SELECT id FROM clientes WHERE nombre = ?", (nombre_cliente,))
-    result = cursor.fetchone()
-
-    if result:
-        return result[0]
-
-    # Crear cliente nuevo
-    tipo = 'spot' if 'spot' in nombre_cliente.lower() else 'permanente'
-    cursor.execute("""
-        INSERT INTO clientes (nombre, tipo, activo, fecha_inicio)
-        VALUES (?, ?, ?, ?)
-    """, (nombre_cliente, tipo, True, datetime.now().date()))
-
-    conn.commit()
-    return cursor.lastrowid
-
 def mapear_area_excel_a_bd(area_excel):
     """Mapea el área del Excel a un área existente en BD"""
     if not area_excel or pd.isna(area_excel):
@@ -158,77 +136,58 @@ def mapear_area_excel_a_bd(area_excel):
     else:
         return 'Externas'  # Por defecto
 
-def obtener_o_crear_area(conn, nombre_area):
-    """Obtiene o crea un área"""
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT id FROM areas WHERE nombre = ?", (nombre_area,))
-    result = cursor.fetchone()
-
-    if result:
-        return result[0]
-
-    # Crear área
-    cursor.execute("INSERT INTO areas (nombre, activo) VALUES (?, ?)", (nombre_area, True))
-    conn.commit()
-    return cursor.lastrowid
-
-def obtener_o_crear_servicio(conn, area_id, nombre_servicio):
-    """Obtiene o crea un servicio dentro de un área"""
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id FROM servicios WHERE area_id = ? AND nombre = ?
-    """, (area_id, nombre_servicio))
-    result = cursor.fetchone()
+def preparar_registros(df_2025, mapeo_personas):
+    """
+    Convierte las filas del Excel en registros normalizados para el motor de importación
+    (sin consultas a la BD)
 
-    if result:
-        return result[0]
+    Returns:
+        tuple: (registros, personas_sin_match, registros_sin_persona)
+    """
+    registros = []
+    personas_sin_match = set()
+    registros_sin_persona = 0
 
-    # Crear servicio
-    cursor.execute("""
-        INSERT INTO servicios (area_id, nombre, activo) VALUES (?, ?, ?)
-    """, (area_id, nombre_servicio, True))
-    conn.commit()
-    return cursor.lastrowid
+    for row in df_2025.to_dict('records'):
+        nombre_completo = row['NombreCompleto']
+        cliente_nombre = str(row['Client']).strip() if pd.notna(row['Client']) else ''
+        horas = float(row['Hours'])
 
-def obtener_o_crear_tarea(conn, servicio_id, nombre_tarea):
-    """Obtiene o crea una tarea dentro de un servicio"""
-    cursor = conn.cursor()
+        # Validar datos
+        if not cliente_nombre or horas == 0:
+            continue
 
-    if not nombre_tarea or nombre_tarea.strip() == '':
-        nombre_tarea = 'Tarea general'
+        # Obtener persona_id usando el mapeo
+        persona_id = mapeo_personas.get(nombre_completo)
+        if not persona_id:
+            personas_sin_match.add(nombre_completo)
+            registros_sin_persona += 1
+            continue
 
-    cursor.execute("""
-        SELECT id FROM tareas WHERE servicio_id = ? AND nombre = ?
-    """, (servicio_id, nombre_tarea))
-    result = cursor.fetchone()
+        # Usar Project o Client como nombre del servicio
+        project = row.get('Project')
+        tarea = row.get('Task')
+        notas = row.get('Notes')
 
-    if result:
-        return result[0]
+        registros.append({
+            'persona_id': persona_id,
+            'cliente': cliente_nombre,
+            'area': mapear_area_excel_a_bd(row.get('Area', None)),
+            'servicio': str(project).strip() if pd.notna(project) else cliente_nombre,
+            'tarea': str(tarea).strip() if pd.notna(tarea) else 'Tarea general',
+            'fecha': row['Date'].date(),
+            'horas': horas,
+            'descripcion': notas if pd.notna(notas) else ''
+        })
 
-    # Crear tarea
-    cursor.execute("""
-        INSERT INTO tareas (servicio_id, nombre, activo) VALUES (?, ?, ?)
-    """, (servicio_id, nombre_tarea, True))
-    conn.commit()
-    return cursor.lastrowid
+    return registros, personas_sin_match, registros_sin_persona
 
-def verificar_registro_existe(conn, persona_id, cliente_id, fecha, horas):
-    """Verifica si un registro ya existe para evitar duplicados"""
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id FROM registros_horas
-        WHERE persona_id = ? AND cliente_id = ? AND fecha = ? AND horas = ?
-    """, (persona_id, cliente_id, fecha, horas))
-    return cursor.fetchone() is not None
+def importar_registros(df_excel, mapeo_personas):
+    """Importa registros de horas desde Excel (carga masiva, ver motor_importacion.py)"""
+    from motor_importacion import ImportadorHoras
 
-def importar_registros(conn, df_excel, mapeo_personas):
-    """Importa registros de horas desde Excel"""
     print("\n=== IMPORTANDO REGISTROS DE HORAS ===\n")
 
-    cursor = conn.cursor()
-
     # Filtrar solo 2025
     df_excel['Date'] = pd.to_datetime(df_excel['Date'])
     df_2025 = df_excel[(df_excel['Date'] >= '2025-01-01') & (df_excel['Date'] < '2025-10-01')].copy()
@@ -238,88 +197,21 @@ def importar_registros(conn, df_excel, mapeo_personas):
 
     print(f"  Total registros en Excel (2025): {len(df_2025):,}\n")
 
-    registros_importados = 0
-    registros_duplicados = 0
-    registros_error = 0
-    personas_sin_match = set()
+    registros, personas_sin_match, registros_error = preparar_registros(df_2025, mapeo_personas)
 
-    for idx, row in df_2025.iterrows():
-        if idx % 5000 == 0 and idx > 0:
-            print(f"    Procesados: {idx:,} registros...")
-            conn.commit()
-
-        try:
-            nombre_completo = row['NombreCompleto']
-            cliente_nombre = row['Client'].strip()
-            fecha = row['Date'].date()
-            horas = float(row['Hours'])
-
-            # Validar datos
-            if not cliente_nombre or horas == 0:
-                continue
-
-            # Obtener persona_id usando el mapeo
-            persona_id = mapeo_personas.get(nombre_completo)
-
-            if not persona_id:
-                personas_sin_match.add(nombre_completo)
-                registros_error += 1
-                continue
-
-            # Obtener o crear cliente
-            cliente_id = obtener_o_crear_cliente(conn, cliente_nombre)
-
-            # Obtener área, servicio y tarea
-            area_excel = row.get('Area', None)
-            nombre_area_bd = mapear_area_excel_a_bd(area_excel)
-            area_id = obtener_o_crear_area(conn, nombre_area_bd)
-
-            # Usar Project o Client como nombre del servicio
-            project_nombre = row.get('Project', '').strip() if pd.notna(row.get('Project')) else cliente_nombre
-            servicio_id = obtener_o_crear_servicio(conn, area_id, project_nombre)
-
-            # Obtener tarea
-            tarea_nombre = row.get('Task', 'Tarea general').strip()
-            tarea_id = obtener_o_crear_tarea(conn, servicio_id, tarea_nombre)
-
-            # Verificar si ya existe
-            if verificar_registro_existe(conn, persona_id, cliente_id, fecha, horas):
-                registros_duplicados += 1
-                continue
-
-            # Insertar registro
-            cursor.execute("""
-                INSERT INTO registros_horas (
-                    persona_id, cliente_id, area_id, servicio_id, tarea_id,
-                    fecha, horas, descripcion
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                persona_id,
-                cliente_id,
-                area_id,
-                servicio_id,
-                tarea_id,
-                fecha,
-                horas,
-                row.get('Notes', '') or ''
-            ))
-
-            registros_importados += 1
-
-        except Exception as e:
-            print(f"    ⚠️  Error en fila {idx}: {e}")
-            registros_error += 1
-            continue
-
-    conn.commit()
+    # Clientes por nombre exacto (sin UPPER), como en la carga original
+    engine = create_engine(f'sqlite:///{DB_PATH}')
+    with engine.connect() as conn_import:
+        resultado = ImportadorHoras(conn_import, clientes_sin_mayusculas=False).importar(registros)
+        conn_import.commit()
 
     print("\n" + "="*70)
     print("RESUMEN DE IMPORTACIÓN")
     print("="*70)
     print(f"\n  📊 Registros:")
     print(f"    Total en Excel (2025):     {len(df_2025):,}")
-    print(f"    Importados nuevos:         {registros_importados:,}")
-    print(f"    Duplicados (ya existían):  {registros_duplicados:,}")
+    print(f"    Importados nuevos:         {resultado['importados']:,}")
+    print(f"    Duplicados (ya existían):  {resultado['duplicados']:,}")
     print(f"    Con errores:               {registros_error:,}")
 
     if personas_sin_match:
@@ -327,7 +219,7 @@ def importar_registros(conn, df_excel, mapeo_personas):
         for persona in sorted(personas_sin_match):
             print(f"    - {persona}")
 
-    return registros_importados
+    return resultado['importados']
 
 def verificar_totales(conn):
     """Verifica totales después de la importación"""
@@ -374,6 +266,18 @@ def verificar_totales(conn):
     for nombre, horas in cursor.fetchall():
         print(f"  {nombre:40s} {horas:10.2f} horas")
 
+def reconstruir_resumen_mensual():
+    """Reconstruye resumen_horas_mensual de 2025 (los INSERT directos no pasan por el ORM)"""
+    print("\n=== RECONSTRUYENDO RESUMEN MENSUAL DE HORAS ===\n")
+
+    from app import app
+    from resumen_horas import reconstruir_resumen
+
+    with app.app_context():
+        filas = reconstruir_resumen(2025)
+
+    print(f"  Filas en resumen mensual (2025): {filas:,}")
+
 def main():
     """Función principal"""
     print("="*70)
@@ -398,11 +302,14 @@ def main():
         print(f"  Total registros en Excel: {len(df_excel):,}")
 
         # 4. Importar registros
-        registros_importados = importar_registros(conn, df_excel, mapeo_personas)
+        registros_importados = importar_registros(df_excel, mapeo_personas)
 
         # 5. Verificar totales
         verificar_totales(conn)
 
+        # 6. Actualizar resumen mensual de horas
+        reconstruir_resumen_mensual()
+
         print("\n" + "="*70)
         print("✓ IMPORTACIÓN COMPLETADA")
         print("="*70)
@@ -5,20 +5,23 @@ Este script:
 1. Se conecta a PostgreSQL usando DATABASE_URL
 2. Crea personas faltantes
 3. Importa registros de horas con mapeo correcto de nombres
+   (lectura del Excel por bloques y carga masiva con COPY,
+   ver lector_horas.py y motor_importacion.py)
 4. Evita duplicados
 
 IMPORTANTE: Este script debe ejecutarse en el servidor de Render o con acceso a la BD PostgreSQL
 """
 
-import pandas as pd
 import os
-from datetime import datetime
+import time
+from datetime import date, datetime
 from sqlalchemy import create_engine, text
-from collections import defaultdict
 
 # Configuración
 import sys
 # Buscar Excel en el directorio del script o en el directorio padre
+# (las validaciones de archivo y DATABASE_URL están en main(), así importar_todo.py
+# puede importar este módulo)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXCEL_PATH = os.path.join(SCRIPT_DIR, 'Historial 2024-2025.xlsx')
 
@@ -26,23 +29,17 @@ EXCEL_PATH = os.path.join(SCRIPT_DIR, 'Historial 2024-2025.xlsx')
 if not os.path.exists(EXCEL_PATH):
     EXCEL_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), 'Historial 2024-2025.xlsx')
 
-# Si aún no existe, mostrar error
-if not os.path.exists(EXCEL_PATH):
-    print(f"ERROR: No se encuentra el archivo Excel")
-    print(f"Buscado en: {EXCEL_PATH}")
-    sys.exit(1)
-
 # Obtener DATABASE_URL del ambiente
 DATABASE_URL = os.environ.get('DATABASE_URL')
-if not DATABASE_URL:
-    print("ERROR: DATABASE_URL no está configurada")
-    print("Ejecuta: export DATABASE_URL='postgresql://...'")
-    exit(1)
 
 # Fix para Render (postgres:// -> postgresql://)
-if DATABASE_URL.startswith('postgres://'):
+if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
     DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
 
+# Período importado (fin excluido)
+FECHA_DESDE = date(2025, 1, 1)
+FECHA_HASTA = date(2025, 10, 1)
+
 # Mapeo de nombres de personas: Excel -> BD
 MAPEO_NOMBRES = {
     'Ángeles Pérez': 'María De Los Ángeles Pérez',
@@ -167,7 +164,7 @@ def mapear_area_excel_a_bd(area_excel):
 
     Áreas en producción: Asuntos Públicos, Comunicaciones, Diseño, Externas, Internas, Redes Sociales
     """
-    if not area_excel or pd.isna(area_excel):
+    if not area_excel:
         return 'Comunicaciones'  # Por defecto usa Comunicaciones (área general)
 
     area_excel = str(area_excel).strip().lower()
@@ -187,200 +184,102 @@ def mapear_area_excel_a_bd(area_excel):
     else:
         return 'Comunicaciones'  # Por defecto
 
-def obtener_o_crear_cliente(conn, nombre_cliente):
-    """Obtiene o crea un cliente"""
-    nombre_cliente = nombre_cliente.strip()
-
-    # Aplicar mapeo de nombres si existe
-    nombre_cliente_bd = MAPEO_CLIENTES.get(nombre_cliente, nombre_cliente)
+def preparar_registros(filas, mapeo_personas, personas_sin_match):
+    """
+    Convierte un bloque de filas normalizadas (lector_horas.py) en registros para el
+    motor de importación (sin consultas a la BD)
 
-    # Buscar cliente existente (case-insensitive)
-    result = conn.execute(text("SELECT id FROM clientes WHERE UPPER(nombre) = UPPER(:nombre)"),
-                          {"nombre": nombre_cliente_bd})
-    row = result.fetchone()
-    if row:
-        return row[0]
+    Returns:
+        tuple: (registros, registros_sin_persona)
+    """
+    registros = []
+    registros_sin_persona = 0
 
-    # Si no existe, crearlo con el nombre mapeado
-    tipo = 'spot' if 'spot' in nombre_cliente_bd.lower() else 'permanente'
-    result = conn.execute(text("""
-        INSERT INTO clientes (nombre, tipo, activo)
-        VALUES (:nombre, :tipo, :activo)
-        RETURNING id
-    """), {
-        "nombre": nombre_cliente_bd,
-        "tipo": tipo,
-        "activo": True
-    })
-    return result.fetchone()[0]
-
-def obtener_o_crear_area(conn, nombre_area):
-    """Obtiene o crea un área"""
-    result = conn.execute(text("SELECT id FROM areas WHERE nombre = :nombre"), {"nombre": nombre_area})
-    row = result.fetchone()
-    if row:
-        return row[0]
+    for fila in filas:
+        cliente_nombre = fila['cliente']
+        horas = fila['horas']
 
-    result = conn.execute(text("""
-        INSERT INTO areas (nombre, activo) VALUES (:nombre, :activo) RETURNING id
-    """), {"nombre": nombre_area, "activo": True})
-    return result.fetchone()[0]
+        if not cliente_nombre or horas == 0:
+            continue
 
-def obtener_o_crear_servicio(conn, area_id, nombre_servicio):
-    """Obtiene o crea un servicio"""
-    result = conn.execute(text("""
-        SELECT id FROM servicios WHERE area_id = :area_id AND nombre = :nombre
-    """), {"area_id": area_id, "nombre": nombre_servicio})
-    row = result.fetchone()
-    if row:
-        return row[0]
+        persona_id = mapeo_personas.get(fila['nombre_completo'])
+        if not persona_id:
+            personas_sin_match.add(fila['nombre_completo'])
+            registros_sin_persona += 1
+            continue
 
-    result = conn.execute(text("""
-        INSERT INTO servicios (area_id, nombre, activo)
-        VALUES (:area_id, :nombre, :activo) RETURNING id
-    """), {"area_id": area_id, "nombre": nombre_servicio, "activo": True})
-    return result.fetchone()[0]
+        registros.append({
+            'persona_id': persona_id,
+            'cliente': MAPEO_CLIENTES.get(cliente_nombre, cliente_nombre),
+            'area': mapear_area_excel_a_bd(fila['area']),
+            'servicio': fila['proyecto'] or cliente_nombre,
+            'tarea': fila['tarea'] or 'Tarea general',
+            'fecha': fila['fecha'],
+            'horas': horas,
+            'descripcion': fila['notas']
+        })
 
-def obtener_o_crear_tarea(conn, servicio_id, nombre_tarea):
-    """Obtiene o crea una tarea"""
-    if not nombre_tarea or nombre_tarea.strip() == '':
-        nombre_tarea = 'Tarea general'
+    return registros, registros_sin_persona
 
-    result = conn.execute(text("""
-        SELECT id FROM tareas WHERE servicio_id = :servicio_id AND nombre = :nombre
-    """), {"servicio_id": servicio_id, "nombre": nombre_tarea})
-    row = result.fetchone()
-    if row:
-        return row[0]
+def importar_registros(conn, mapeo_personas, ruta=None):
+    """
+    Importa registros de horas 2025 desde el Excel, por bloques
+    (lectura con lector_horas.py, carga masiva con motor_importacion.py)
 
-    result = conn.execute(text("""
-        INSERT INTO tareas (servicio_id, nombre, activo)
-        VALUES (:servicio_id, :nombre, :activo) RETURNING id
-    """), {"servicio_id": servicio_id, "nombre": nombre_tarea, "activo": True})
-    return result.fetchone()[0]
+    Args:
+        ruta: Excel o CSV normalizado por preparar_archivo() (None = EXCEL_PATH)
+    """
+    from lector_horas import leer_registros_horas
+    from motor_importacion import ImportadorHoras
 
-def verificar_registro_existe(conn, persona_id, cliente_id, fecha, horas):
-    """Verifica si un registro ya existe"""
-    result = conn.execute(text("""
-        SELECT id FROM registros_horas
-        WHERE persona_id = :persona_id
-          AND cliente_id = :cliente_id
-          AND fecha = :fecha
-          AND horas = :horas
-    """), {
-        "persona_id": persona_id,
-        "cliente_id": cliente_id,
-        "fecha": fecha,
-        "horas": horas
-    })
-    return result.fetchone() is not None
-
-def importar_registros(conn, df_excel, mapeo_personas):
-    """Importa registros de horas desde Excel"""
     print("\n=== IMPORTANDO REGISTROS DE HORAS ===\n")
 
-    # Filtrar solo 2025
-    df_excel['Date'] = pd.to_datetime(df_excel['Date'])
-    df_2025 = df_excel[(df_excel['Date'] >= '2025-01-01') & (df_excel['Date'] < '2025-10-01')].copy()
-    df_2025['NombreCompleto'] = df_2025['First Name'] + ' ' + df_2025['Last Name']
-
-    print(f"  Total registros en Excel (2025): {len(df_2025):,}\n")
-
-    registros_importados = 0
-    registros_duplicados = 0
+    inicio = time.time()
+    leidos = 0
     registros_error = 0
     personas_sin_match = set()
-    errores_detallados = []
 
-    for idx, row in df_2025.iterrows():
-        if idx % 5000 == 0 and idx > 0:
-            print(f"    Procesados: {idx:,} registros...")
-            conn.commit()
+    def bloques():
+        nonlocal leidos, registros_error
+        for filas in leer_registros_horas(ruta or EXCEL_PATH, hoja='Horas',
+                                          desde=FECHA_DESDE, hasta=FECHA_HASTA):
+            leidos += len(filas)
+            registros, sin_persona = preparar_registros(filas, mapeo_personas, personas_sin_match)
+            registros_error += sin_persona
+            yield registros
 
-        try:
-            nombre_completo = row['NombreCompleto']
-            cliente_nombre = row['Client'].strip()
-            fecha = row['Date'].date()
-            horas = float(row['Hours'])
-
-            if not cliente_nombre or horas == 0:
-                continue
-
-            persona_id = mapeo_personas.get(nombre_completo)
-            if not persona_id:
-                personas_sin_match.add(nombre_completo)
-                registros_error += 1
-                continue
-
-            cliente_id = obtener_o_crear_cliente(conn, cliente_nombre)
-
-            area_excel = row.get('Area', None)
-            nombre_area_bd = mapear_area_excel_a_bd(area_excel)
-            area_id = obtener_o_crear_area(conn, nombre_area_bd)
-
-            project_nombre = row.get('Project', '').strip() if pd.notna(row.get('Project')) else cliente_nombre
-            servicio_id = obtener_o_crear_servicio(conn, area_id, project_nombre)
-
-            tarea_nombre = row.get('Task', 'Tarea general').strip()
-            tarea_id = obtener_o_crear_tarea(conn, servicio_id, tarea_nombre)
-
-            if verificar_registro_existe(conn, persona_id, cliente_id, fecha, horas):
-                registros_duplicados += 1
-                continue
-
-            conn.execute(text("""
-                INSERT INTO registros_horas (
-                    persona_id, cliente_id, area_id, servicio_id, tarea_id,
-                    fecha, horas, descripcion
-                ) VALUES (
-                    :persona_id, :cliente_id, :area_id, :servicio_id, :tarea_id,
-                    :fecha, :horas, :descripcion
-                )
-            """), {
-                "persona_id": persona_id,
-                "cliente_id": cliente_id,
-                "area_id": area_id,
-                "servicio_id": servicio_id,
-                "tarea_id": tarea_id,
-                "fecha": fecha,
-                "horas": horas,
-                "descripcion": row.get('Notes', '') or ''
-            })
-
-            registros_importados += 1
+    def progreso(acumulado):
+        print(f"    ... {leidos:,} filas leídas, {acumulado['importados']:,} importadas")
 
-        except Exception as e:
-            # Si hay error, hacer rollback y continuar
-            conn.rollback()
-            error_msg = f"Cliente: {row.get('Client', 'N/A')}, Persona: {row.get('NombreCompleto', 'N/A')}"
-            errores_detallados.append((idx, str(e), error_msg))
-            if len(errores_detallados) <= 10:  # Solo mostrar primeros 10
-                print(f"    ⚠️  Error en fila {idx}: {e}")
-                print(f"        {error_msg}")
-            registros_error += 1
-            continue
+    try:
+        resultado = ImportadorHoras(conn).importar_bloques(bloques(), progreso)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"    ⚠️  Error en la carga masiva: {e}")
+        raise
 
-    conn.commit()
+    creados = resultado['dimensiones_creadas']
 
     print("\n" + "="*70)
     print("RESUMEN DE IMPORTACIÓN")
     print("="*70)
     print(f"\n  📊 Registros:")
-    print(f"    Total en Excel (2025):     {len(df_2025):,}")
-    print(f"    Importados nuevos:         {registros_importados:,}")
-    print(f"    Duplicados (ya existían):  {registros_duplicados:,}")
+    print(f"    Total en Excel (2025):     {leidos:,}")
+    print(f"    Importados nuevos:         {resultado['importados']:,}")
+    print(f"    Duplicados (ya existían):  {resultado['duplicados']:,}")
     print(f"    Con errores:               {registros_error:,}")
+    print(f"    Tiempo de carga:           {time.time() - inicio:.1f}s")
+    if any(creados.values()):
+        print(f"\n  🆕 Creados: {creados['clientes']} clientes, {creados['areas']} áreas, "
+              f"{creados['servicios']} servicios, {creados['tareas']} tareas")
 
     if personas_sin_match:
         print(f"\n  ⚠️  Personas sin match ({len(personas_sin_match)}):")
         for persona in sorted(personas_sin_match)[:10]:
             print(f"    - {persona}")
 
-    if errores_detallados and len(errores_detallados) > 10:
-        print(f"\n  ⚠️  Total de errores SQL: {len(errores_detallados)}")
-        print(f"      (Se mostraron solo los primeros 10 arriba)")
-
-    return registros_importados
+    return resultado['importados']
 
 def verificar_totales(conn):
     """Verifica totales después de la importación"""
@@ -406,8 +305,68 @@ def verificar_totales(conn):
     else:
         print("\n  ⚠️  Aún hay diferencias")
 
+def reconstruir_resumen_mensual():
+    """Reconstruye resumen_horas_mensual de 2025 (los INSERT directos no pasan por el ORM)"""
+    print("\n=== RECONSTRUYENDO RESUMEN MENSUAL DE HORAS ===\n")
+
+    from app import app
+    from resumen_horas import reconstruir_resumen
+
+    with app.app_context():
+        filas = reconstruir_resumen(2025)
+
+    print(f"  Filas en resumen mensual (2025): {filas:,}")
+
+def preparar_archivo(ruta_csv, ruta_excel=None):
+    """
+    Convierte la hoja Horas (2025) en un CSV normalizado, sin usar la base de datos.
+
+    Leer el Excel es lo más lento de la importación: importar_todo.py lo hace en
+    un proceso aparte y después carga el CSV con importar_horas().
+    """
+    from lector_horas import leer_registros_horas, escribir_csv
+
+    return escribir_csv(
+        leer_registros_horas(ruta_excel or EXCEL_PATH, hoja='Horas', desde=FECHA_DESDE, hasta=FECHA_HASTA),
+        ruta_csv
+    )
+
+def importar_horas(engine, ruta=None):
+    """Pasos 0-5 de la importación sobre `engine` (ruta: ver importar_registros)"""
+    with engine.connect() as conn:
+        # 0. Arreglar secuencias de PostgreSQL
+        if engine.dialect.name == 'postgresql':
+            arreglar_secuencias(conn)
+
+        # 1. Crear personas faltantes
+        crear_personas_faltantes(conn)
+
+        # 2. Obtener mapeo
+        print("\n=== CREANDO MAPEO DE PERSONAS ===\n")
+        mapeo_personas = obtener_mapeo_personas(conn)
+        print(f"  Total personas mapeadas: {len(mapeo_personas)}")
+
+        # 3. Leer Excel por bloques e importar registros
+        importar_registros(conn, mapeo_personas, ruta)
+
+        # 4. Verificar totales
+        verificar_totales(conn)
+
+    # 5. Actualizar resumen mensual de horas
+    reconstruir_resumen_mensual()
+
 def main():
     """Función principal"""
+    if not os.path.exists(EXCEL_PATH):
+        print(f"ERROR: No se encuentra el archivo Excel")
+        print(f"Buscado en: {EXCEL_PATH}")
+        sys.exit(1)
+
+    if not DATABASE_URL:
+        print("ERROR: DATABASE_URL no está configurada")
+        print("Ejecuta: export DATABASE_URL='postgresql://...'")
+        exit(1)
+
     print("="*70)
     print("IMPORTACIÓN DE HORAS A PRODUCCIÓN (PostgreSQL)")
     print("="*70)
@@ -417,32 +376,11 @@ def main():
     engine = create_engine(DATABASE_URL)
 
     try:
-        with engine.connect() as conn:
-            # 0. Arreglar secuencias de PostgreSQL
-            arreglar_secuencias(conn)
-
-            # 1. Crear personas faltantes
-            crear_personas_faltantes(conn)
-
-            # 2. Obtener mapeo
-            print("\n=== CREANDO MAPEO DE PERSONAS ===\n")
-            mapeo_personas = obtener_mapeo_personas(conn)
-            print(f"  Total personas mapeadas: {len(mapeo_personas)}")
-
-            # 3. Leer Excel
-            print("\n=== LEYENDO EXCEL ===\n")
-            df_excel = pd.read_excel(EXCEL_PATH, sheet_name='Horas')
-            print(f"  Total registros en Excel: {len(df_excel):,}")
-
-            # 4. Importar registros
-            importar_registros(conn, df_excel, mapeo_personas)
-
-            # 5. Verificar totales
-            verificar_totales(conn)
+        importar_horas(engine)
 
-            print("\n" + "="*70)
-            print("✓ IMPORTACIÓN COMPLETADA")
-            print("="*70)
+        print("\n" + "="*70)
+        print("✓ IMPORTACIÓN COMPLETADA")
+        print("="*70)
 
     except Exception as e:
         print(f"\n❌ Error: {e}")
@@ -6,6 +6,12 @@ Importar ingresos desde CSV separados (Permanentes y Spot)
 import csv
 from app import app, db, Cliente, ServicioCliente, IngresoMensual
 
+# CSV de ingresos: (ruta, tipo de cliente)
+ARCHIVOS = [
+    ('../Clientes_Permanentes.csv', 'permanente'),
+    ('../Clientes_Spot.csv', 'spot'),
+]
+
 # Mapeo de nombres de meses a números
 MESES_MAP = {
     'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6,
@@ -51,17 +57,25 @@ def buscar_cliente(nombre_csv):
 
     return cliente
 
-def importar_csv(csv_path, tipo_cliente):
-    """Importa un CSV"""
+def leer_csv(csv_path):
+    """Lee las líneas del CSV (sin usar la base de datos)"""
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        return list(csv.reader(f, delimiter=';'))
+
+def leer_archivos():
+    """Líneas de cada CSV de ARCHIVOS: {csv_path: lineas}"""
+    return {csv_path: leer_csv(csv_path) for csv_path, _ in ARCHIVOS}
+
+def importar_csv(csv_path, tipo_cliente, lineas=None):
+    """Importa un CSV (lineas: ya leídas con leer_csv, None = leer csv_path)"""
 
     print(f"\n{'='*60}")
     print(f"📋 Importando: {csv_path}")
     print(f"   Tipo: {tipo_cliente.upper()}")
     print(f"{'='*60}\n")
 
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.reader(f, delimiter=';')
-        lineas = list(reader)
+    if lineas is None:
+        lineas = leer_csv(csv_path)
 
     # Leer encabezados (fila 1)
     encabezados = lineas[0]
@@ -194,28 +208,35 @@ def importar_csv(csv_path, tipo_cliente):
 
     return servicios_creados, ingresos_creados
 
-if __name__ == '__main__':
-    with app.app_context():
-        print("=" * 80)
-        print("IMPORTACIÓN DE INGRESOS DESDE CSV")
-        print("=" * 80)
-
-        # Importar permanentes
-        s1, i1 = importar_csv('../Clientes_Permanentes.csv', 'permanente')
-
-        # Importar spot
-        s2, i2 = importar_csv('../Clientes_Spot.csv', 'spot')
+def importar_archivos(lineas_por_archivo=None):
+    """Importa los CSV de permanentes y spot (lineas_por_archivo: resultado de leer_archivos)"""
+    lineas_por_archivo = lineas_por_archivo or {}
 
-        # Resumen
-        print(f"\n{'='*80}")
-        print("✅ IMPORTACIÓN COMPLETADA")
-        print(f"{'='*80}")
-        print(f"📊 Servicios creados: {s1 + s2}")
-        print(f"💰 Ingresos creados: {i1 + i2}")
+    print("=" * 80)
+    print("IMPORTACIÓN DE INGRESOS DESDE CSV")
+    print("=" * 80)
 
-        total_uf = db.session.query(db.func.sum(IngresoMensual.ingreso_uf)).scalar() or 0
-        total_reg = IngresoMensual.query.count()
+    servicios_creados = 0
+    ingresos_creados = 0
+    for csv_path, tipo_cliente in ARCHIVOS:
+        s, i = importar_csv(csv_path, tipo_cliente, lineas_por_archivo.get(csv_path))
+        servicios_creados += s
+        ingresos_creados += i
+
+    # Resumen
+    print(f"\n{'='*80}")
+    print("✅ IMPORTACIÓN COMPLETADA")
+    print(f"{'='*80}")
+    print(f"📊 Servicios creados: {servicios_creados}")
+    print(f"💰 Ingresos creados: {ingresos_creados}")
+
+    total_uf = db.session.query(db.func.sum(IngresoMensual.ingreso_uf)).scalar() or 0
+    total_reg = IngresoMensual.query.count()
+
+    print(f"\n💵 Total en sistema: {total_uf:,.2f} UF")
+    print(f"📅 Total registros: {total_reg:,}")
+    print()
 
-        print(f"\n💵 Total en sistema: {total_uf:,.2f} UF")
-        print(f"📅 Total registros: {total_reg:,}")
-        print()
+if __name__ == '__main__':
+    with app.app_context():
+        importar_archivos()
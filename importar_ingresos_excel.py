@@ -9,6 +9,9 @@ import openpyxl
 from datetime import datetime
 from app import app, db, Cliente, ServicioCliente, IngresoMensual
 
+EXCEL_PATH = "../Cliente_Comsulting.xlsx"
+HOJAS = ('Permanentes', 'Spot')
+
 def normalizar_nombre(nombre):
     """Normaliza nombre para comparación"""
     if not nombre:
@@ -61,18 +64,40 @@ def buscar_cliente(nombre_excel):
 
     return cliente
 
-def importar_hoja(sheet, tipo_cliente='permanente'):
-    """Importa una hoja del Excel"""
+def leer_excel(excel_path=EXCEL_PATH):
+    """
+    Lee las hojas Permanentes y Spot como listas de filas (tuplas de valores).
+
+    No usa la base de datos: importar_todo.py la ejecuta en un proceso aparte.
+    """
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        return {
+            titulo: list(wb[titulo].iter_rows(values_only=True))
+            for titulo in HOJAS if titulo in wb.sheetnames
+        }
+    finally:
+        wb.close()
+
+def celda(filas, row_idx, col_idx):
+    """Valor de la celda (índices desde 1, como sheet.cell); None fuera de rango"""
+    if row_idx > len(filas) or col_idx > len(filas[row_idx - 1]):
+        return None
+    return filas[row_idx - 1][col_idx - 1]
+
+def importar_hoja(titulo, filas, tipo_cliente='permanente'):
+    """Importa una hoja del Excel (filas leídas con leer_excel)"""
 
     print(f"\n{'='*60}")
-    print(f"📋 Importando hoja: {sheet.title}")
+    print(f"📋 Importando hoja: {titulo}")
     print(f"   Tipo: {tipo_cliente.upper()}")
     print(f"{'='*60}\n")
 
     # Leer encabezados (fechas en fila 1, columnas 3+)
     fechas = []
-    for col_idx in range(3, sheet.max_column + 1):
-        fecha_cell = sheet.cell(1, col_idx).value
+    max_column = len(filas[0]) if filas else 0
+    for col_idx in range(3, max_column + 1):
+        fecha_cell = celda(filas, 1, col_idx)
         if fecha_cell:
             if isinstance(fecha_cell, datetime):
                 fechas.append((col_idx, fecha_cell))
@@ -95,9 +120,9 @@ def importar_hoja(sheet, tipo_cliente='permanente'):
     clientes_no_encontrados = set()
 
     # Procesar filas (empezar en fila 2)
-    for row_idx in range(2, sheet.max_row + 1):
-        nombre_cliente = sheet.cell(row_idx, 1).value
-        nombre_servicio = sheet.cell(row_idx, 2).value
+    for row_idx in range(2, len(filas) + 1):
+        nombre_cliente = celda(filas, row_idx, 1)
+        nombre_servicio = celda(filas, row_idx, 2)
 
         # Saltar filas vacías
         if not nombre_cliente and not nombre_servicio:
@@ -152,7 +177,7 @@ def importar_hoja(sheet, tipo_cliente='permanente'):
             total_ingreso = 0
 
             for col_idx, fecha in fechas:
-                valor_cell = sheet.cell(row_idx, col_idx).value
+                valor_cell = celda(filas, row_idx, col_idx)
 
                 if valor_cell:
                     try:
@@ -206,34 +231,38 @@ def importar_hoja(sheet, tipo_cliente='permanente'):
         'clientes_no_encontrados': clientes_no_encontrados
     }
 
-def importar_excel():
-    """Importa todo el Excel"""
+def importar_excel(hojas=None):
+    """
+    Importa todo el Excel
+
+    Args:
+        hojas: Resultado de leer_excel() (None = leer EXCEL_PATH)
+    """
 
     print("=" * 80)
     print("IMPORTACIÓN DE INGRESOS DESDE EXCEL")
     print("=" * 80)
 
-    excel_path = "../Cliente_Comsulting.xlsx"
-
-    try:
-        wb = openpyxl.load_workbook(excel_path, data_only=True)
-    except FileNotFoundError:
-        print(f"❌ No se encontró el archivo: {excel_path}")
-        return
+    if hojas is None:
+        try:
+            hojas = leer_excel()
+        except FileNotFoundError:
+            print(f"❌ No se encontró el archivo: {EXCEL_PATH}")
+            return
 
-    print(f"📄 Excel cargado: {excel_path}")
-    print(f"📊 Hojas encontradas: {', '.join(wb.sheetnames)}")
+    print(f"📄 Excel cargado: {EXCEL_PATH}")
+    print(f"📊 Hojas encontradas: {', '.join(hojas)}")
 
     # Importar hoja Permanentes
-    if 'Permanentes' in wb.sheetnames:
-        stats_perm = importar_hoja(wb['Permanentes'], 'permanente')
+    if 'Permanentes' in hojas:
+        stats_perm = importar_hoja('Permanentes', hojas['Permanentes'], 'permanente')
     else:
         print("⚠️  No se encontró hoja 'Permanentes'")
         stats_perm = {}
 
     # Importar hoja Spot
-    if 'Spot' in wb.sheetnames:
-        stats_spot = importar_hoja(wb['Spot'], 'spot')
+    if 'Spot' in hojas:
+        stats_spot = importar_hoja('Spot', hojas['Spot'], 'spot')
     else:
         print("⚠️  No se encontró hoja 'Spot'")
         stats_spot = {}
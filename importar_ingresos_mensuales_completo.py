@@ -7,6 +7,8 @@ Importa 24 meses de ingresos (Ene 2024 - Dic 2025)
 import csv
 from app import app, db, Cliente, ServicioCliente, IngresoMensual
 
+CSV_PATH = "../Cliente_Comsulting.csv"
+
 # Mapeo de columnas a meses
 MESES_COLUMNAS = {
     5: (2024, 1),   # ene-24
@@ -85,23 +87,30 @@ def buscar_cliente(nombre_csv):
 
     return cliente
 
-def importar_ingresos():
-    """Importa ingresos mensuales desde el CSV"""
+def leer_csv(csv_path=CSV_PATH):
+    """Lee las líneas del CSV (sin usar la base de datos)"""
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        return list(csv.reader(f, delimiter=';'))
+
+def importar_ingresos(lineas=None):
+    """
+    Importa ingresos mensuales desde el CSV
+
+    Args:
+        lineas: Líneas ya leídas con leer_csv() (None = leer CSV_PATH)
+    """
 
     print("=" * 80)
     print("IMPORTACIÓN DE INGRESOS MENSUALES 2024-2025")
     print("=" * 80)
     print()
 
-    csv_path = "../Cliente_Comsulting.csv"
-
-    try:
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f, delimiter=';')
-            lineas = list(reader)
-    except FileNotFoundError:
-        print(f"❌ No se encontró el archivo: {csv_path}")
-        return
+    if lineas is None:
+        try:
+            lineas = leer_csv()
+        except FileNotFoundError:
+            print(f"❌ No se encontró el archivo: {CSV_PATH}")
+            return
 
     print(f"📄 CSV cargado: {len(lineas)} líneas")
     print(f"📅 Importando {len(MESES_COLUMNAS)} meses (Ene 2024 - Dic 2025)")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Importación completa del ambiente con un solo comando
+
+Reemplaza la ejecución manual, uno tras otro, de los importadores:
+
+    areas               crear_areas_iniciales.py                    (dimensiones)
+    ingresos_excel      importar_ingresos_excel.py                  (servicios)
+    ingresos_csv        importar_ingresos_csv_final.py              (ingresos)
+    ingresos_mensuales  importar_ingresos_mensuales_completo.py     (ingresos)
+    gastos_overhead     importar_gastos_overhead.py                 (overhead)
+    horas               importar_horas_produccion.py                (horas)
+    historial           importar_historial_2024_2025.py             (horas, opcional)
+
+Cada fuente tiene dos fases:
+    1. Lectura: parsea su archivo sin tocar la base de datos. Todas las lecturas
+       corren en paralelo en un pool de procesos desde el inicio.
+    2. Carga: escribe en la base de datos. Las cargas son secuenciales, en el
+       orden del grafo de dependencias (dimensiones → servicios →
+       ingresos/overhead → horas), cada una apenas termina su lectura.
+
+El tiempo total queda acotado por la lectura más lenta (el Excel de horas) más
+las cargas. 'historial' y 'horas' importan el mismo período con mapeos distintos,
+por eso 'historial' solo corre si se pide con --fuentes.
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python importar_todo.py                                        # Simulación
+    python importar_todo.py --ejecutar
+    python importar_todo.py --ejecutar --fuentes horas,gastos_overhead
+    python importar_todo.py --ejecutar --procesos 2
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from graphlib import TopologicalSorter
+
+
+# ============= LECTURA (procesos del pool, sin base de datos) =============
+
+def leer_ingresos_excel(temporal):
+    from importar_ingresos_excel import leer_excel
+    return leer_excel()
+
+
+def leer_ingresos_csv(temporal):
+    from importar_ingresos_csv_final import leer_archivos
+    return leer_archivos()
+
+
+def leer_ingresos_mensuales(temporal):
+    from importar_ingresos_mensuales_completo import leer_csv
+    return leer_csv()
+
+
+def leer_gastos_overhead(temporal):
+    from importar_gastos_overhead import leer_json
+    return leer_json()
+
+
+def leer_horas(temporal):
+    """Convierte el Excel de horas a un CSV normalizado; retorna la ruta"""
+    from importar_horas_produccion import preparar_archivo
+    ruta = os.path.join(temporal, 'horas.csv')
+    preparar_archivo(ruta)
+    return ruta
+
+
+# ============= CARGA (proceso principal, contexto de la app) =============
+
+def cargar_areas(datos):
+    from crear_areas_iniciales import crear_areas_iniciales
+    crear_areas_iniciales()
+
+
+def cargar_ingresos_excel(datos):
+    from importar_ingresos_excel import importar_excel
+    importar_excel(datos)
+
+
+def cargar_ingresos_csv(datos):
+    from importar_ingresos_csv_final import importar_archivos
+    importar_archivos(datos)
+
+
+def cargar_ingresos_mensuales(datos):
+    from importar_ingresos_mensuales_completo import importar_ingresos
+    importar_ingresos(datos)
+
+
+def cargar_gastos_overhead(datos):
+    from app import db
+    from importar_gastos_overhead import reemplazar_gastos
+    total = reemplazar_gastos(db.session, datos)
+    db.session.commit()
+    print(f"\n✅ {total} gastos overhead importados")
+
+
+def cargar_horas(ruta):
+    from app import db
+    from importar_horas_produccion import importar_horas
+    importar_horas(db.engine, ruta)
+
+
+def cargar_historial(datos):
+    from importar_historial_2024_2025 import importar_historial
+    importar_historial()
+
+
+FUENTES = {
+    'areas': {
+        'etapa': 'dimensiones', 'depende_de': [],
+        'leer': None, 'cargar': cargar_areas,
+    },
+    'ingresos_excel': {
+        'etapa': 'servicios', 'depende_de': ['areas'],
+        'leer': leer_ingresos_excel, 'cargar': cargar_ingresos_excel,
+    },
+    'ingresos_csv': {
+        'etapa': 'ingresos', 'depende_de': ['ingresos_excel'],
+        'leer': leer_ingresos_csv, 'cargar': cargar_ingresos_csv,
+    },
+    'ingresos_mensuales': {
+        # Después de ingresos_csv: el último en cargar define el ingreso de cada mes
+        'etapa': 'ingresos', 'depende_de': ['ingresos_csv'],
+        'leer': leer_ingresos_mensuales, 'cargar': cargar_ingresos_mensuales,
+    },
+    'gastos_overhead': {
+        'etapa': 'overhead', 'depende_de': ['areas'],
+        'leer': leer_gastos_overhead, 'cargar': cargar_gastos_overhead,
+    },
+    'horas': {
+        'etapa': 'horas', 'depende_de': ['ingresos_mensuales', 'gastos_overhead'],
+        'leer': leer_horas, 'cargar': cargar_horas,
+    },
+    'historial': {
+        'etapa': 'horas', 'depende_de': ['ingresos_mensuales', 'gastos_overhead'],
+        'leer': None, 'cargar': cargar_historial,
+    },
+}
+
+FUENTES_POR_DEFECTO = [nombre for nombre in FUENTES if nombre != 'historial']
+
+
+def _leer(nombre, temporal):
+    """Ejecuta la lectura de una fuente en un proceso del pool: (datos, segundos)"""
+    inicio = time.time()
+    datos = FUENTES[nombre]['leer'](temporal)
+    return datos, time.time() - inicio
+
+
+def orden_de_carga(fuentes):
+    """Orden topológico de las fuentes elegidas (las dependencias no elegidas se ignoran)"""
+    grafo = {
+        nombre: [dependencia for dependencia in FUENTES[nombre]['depende_de'] if dependencia in fuentes]
+        for nombre in fuentes
+    }
+    return list(TopologicalSorter(grafo).static_order())
+
+
+def importar(orden, procesos):
+    """
+    Lee en paralelo y carga en orden.
+
+    Returns:
+        list: [(fuente, segundos lectura, segundos carga, estado)]
+    """
+    from app import app
+
+    tiempos = []
+    fallidas = set()
+
+    with tempfile.TemporaryDirectory() as temporal, ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            nombre: pool.submit(_leer, nombre, temporal)
+            for nombre in orden if FUENTES[nombre]['leer']
+        }
+
+        with app.app_context():
+            for nombre in orden:
+                fuente = FUENTES[nombre]
+                bloqueada = [d for d in fuente['depende_de'] if d in fallidas]
+                if bloqueada:
+                    fallidas.add(nombre)
+                    tiempos.append((nombre, 0, 0, f"omitida (falló {', '.join(bloqueada)})"))
+                    continue
+
+                print()
+                print("#" * 80)
+                print(f"# {nombre.upper()} ({fuente['etapa']})")
+                print("#" * 80)
+
+                segundos_lectura = 0
+                inicio = time.time()
+                try:
+                    datos = None
+                    if nombre in futuros:
+                        datos, segundos_lectura = futuros[nombre].result()
+                    inicio = time.time()
+                    fuente['cargar'](datos)
+                    estado = 'ok'
+                except Exception as e:
+                    from app import db
+                    db.session.rollback()
+                    fallidas.add(nombre)
+                    estado = f"error: {e}"
+                    print(f"\n❌ Error en {nombre}: {e}")
+
+                tiempos.append((nombre, segundos_lectura, time.time() - inicio, estado))
+
+    return tiempos
+
+
+def main():
+    ejecutar = '--ejecutar' in sys.argv
+    fuentes = (
+        sys.argv[sys.argv.index('--fuentes') + 1].split(',')
+        if '--fuentes' in sys.argv else FUENTES_POR_DEFECTO
+    )
+    procesos = int(sys.argv[sys.argv.index('--procesos') + 1]) if '--procesos' in sys.argv else None
+
+    print("=" * 80)
+    print("IMPORTACIÓN COMPLETA")
+    print("=" * 80)
+    print()
+
+    desconocidas = [nombre for nombre in fuentes if nombre not in FUENTES]
+    if desconocidas:
+        print(f"❌ Fuentes desconocidas: {', '.join(desconocidas)}")
+        print(f"   Disponibles: {', '.join(FUENTES)}")
+        sys.exit(1)
+
+    orden = orden_de_carga(fuentes)
+    print("Orden de carga:")
+    for i, nombre in enumerate(orden, 1):
+        fuente = FUENTES[nombre]
+        lectura = 'lectura en paralelo' if fuente['leer'] else 'sin lectura previa'
+        print(f"  {i}. {nombre:<20} {fuente['etapa']:<12} {lectura}")
+
+    if not ejecutar:
+        print()
+        print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+        print()
+        print("Para importar, ejecuta:")
+        print("  python importar_todo.py --ejecutar")
+        return
+
+    inicio = time.time()
+    tiempos = importar(orden, procesos)
+    total = time.time() - inicio
+
+    print()
+    print("=" * 80)
+    print("TIEMPOS POR FUENTE")
+    print("=" * 80)
+    print(f"  {'Fuente':<20} {'Lectura':>10} {'Carga':>10}  Estado")
+    for nombre, segundos_lectura, segundos_carga, estado in tiempos:
+        print(f"  {nombre:<20} {segundos_lectura:>9.1f}s {segundos_carga:>9.1f}s  {estado}")
+    print(f"\n  Total: {total:.1f}s")
+    print()
+
+    if any(estado != 'ok' for _, _, _, estado in tiempos):
+        print("⚠️  Importación con errores")
+        sys.exit(1)
+    print("✅ Importación completa")
+
+
+if __name__ == '__main__':
+    main()
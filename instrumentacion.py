@@ -0,0 +1,252 @@
+"""
+Instrumentación por request: consultas SQL, tiempos y objetos cargados
+
+Para cada request se mide:
+    - consultas SQL ejecutadas y tiempo total en SQL (eventos before/after_cursor_execute)
+    - las consultas más lentas del request
+    - tiempo de render de templates (señales before_render_template/template_rendered)
+    - objetos del ORM materializados (evento load de los mappers)
+    - tiempo total
+
+El resultado se publica en tres lugares:
+    1. Encabezado Server-Timing de la respuesta (visible en las DevTools del navegador)
+    2. Una línea de log JSON por request (logger 'instrumentacion'); los requests
+       sobre el umbral se registran como WARNING
+    3. /admin/perf: últimos requests de este proceso, agrupados por endpoint con
+       percentiles e histograma de latencia
+
+Con CONSULTAS_LENTAS_MS definida, las consultas sobre ese umbral se guardan
+además con su plan de ejecución (ver consultas_lentas.py).
+
+Un N+1 se ve como un endpoint con decenas o cientos de consultas por request.
+
+Los requests recientes se guardan en memoria de cada proceso: con varios workers
+de gunicorn, /admin/perf muestra los del worker que atendió la página.
+
+Configuración (variables de entorno):
+    INSTRUMENTACION             '0' la desactiva (default activa)
+    INSTRUMENTACION_REQUESTS    Requests recientes guardados por proceso (default 500)
+    INSTRUMENTACION_LENTO_MS    Umbral para registrar el request como WARNING (default 1000)
+"""
+
+import heapq
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque, defaultdict
+
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+
+from consultas_lentas import UMBRAL_MS as UMBRAL_CONSULTA_LENTA_MS, registrar_al_cerrar
+
+logger = logging.getLogger('instrumentacion')
+
+ACTIVA = os.environ.get('INSTRUMENTACION', '1') != '0'
+REQUESTS_GUARDADOS = int(os.environ.get('INSTRUMENTACION_REQUESTS', 500))
+UMBRAL_LENTO_MS = float(os.environ.get('INSTRUMENTACION_LENTO_MS', 1000))
+
+CONSULTAS_LENTAS = 5          # Consultas más lentas guardadas por request
+LARGO_SQL = 400               # Caracteres de cada sentencia guardada
+ENDPOINTS_EXCLUIDOS = {'static'}
+
+# Límites superiores (ms) de los tramos del histograma de latencia
+TRAMOS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+
+_recientes = deque(maxlen=REQUESTS_GUARDADOS)
+_lock = threading.Lock()
+
+
+# ============= MEDICIÓN DEL REQUEST EN CURSO =============
+
+def _medicion():
+    """Medición del request en curso (None fuera de un request o si no se mide)"""
+    if not has_request_context():
+        return None
+    return g.get('_instrumentacion')
+
+
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if _medicion() is not None:
+        conn.info.setdefault('_instrumentacion_inicio', []).append(time.perf_counter())
+
+
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion()
+    inicios = conn.info.get('_instrumentacion_inicio')
+    if medicion is None or not inicios:
+        return
+
+    duracion = (time.perf_counter() - inicios.pop()) * 1000
+    medicion['consultas'] += 1
+    medicion['sql_ms'] += duracion
+
+    # Heap de mínimos con las CONSULTAS_LENTAS más lentas
+    lenta = (duracion, medicion['consultas'], statement[:LARGO_SQL])
+    if len(medicion['lentas']) < CONSULTAS_LENTAS:
+        heapq.heappush(medicion['lentas'], lenta)
+    elif duracion > medicion['lentas'][0][0]:
+        heapq.heapreplace(medicion['lentas'], lenta)
+
+    if UMBRAL_CONSULTA_LENTA_MS is not None and duracion >= UMBRAL_CONSULTA_LENTA_MS and not executemany:
+        medicion['para_explicar'].append((duracion, statement, parameters))
+
+
+def _objeto_cargado(objeto, contexto):
+    medicion = _medicion()
+    if medicion is not None:
+        medicion['objetos'] += 1
+
+
+def _antes_de_render(app, template, context, **extra):
+    medicion = _medicion()
+    if medicion is not None:
+        medicion['render_inicio'] = time.perf_counter()
+
+
+def _despues_de_render(app, template, context, **extra):
+    medicion = _medicion()
+    if medicion is not None and medicion.get('render_inicio'):
+        medicion['render_ms'] += (time.perf_counter() - medicion.pop('render_inicio')) * 1000
+
+
+def _iniciar_request():
+    if request.endpoint in ENDPOINTS_EXCLUIDOS:
+        return
+    g._instrumentacion = {
+        'inicio': time.perf_counter(),
+        'consultas': 0,
+        'sql_ms': 0.0,
+        'render_ms': 0.0,
+        'objetos': 0,
+        'lentas': [],
+        'para_explicar': [],
+    }
+
+
+def _terminar_request(respuesta):
+    medicion = g.pop('_instrumentacion', None)
+    if medicion is None:
+        return respuesta
+
+    total_ms = (time.perf_counter() - medicion['inicio']) * 1000
+    registro = {
+        'fecha': time.time(),
+        'metodo': request.method,
+        'ruta': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint or '-',
+        'estado': respuesta.status_code,
+        'ms': round(total_ms, 1),
+        'consultas': medicion['consultas'],
+        'sql_ms': round(medicion['sql_ms'], 1),
+        'render_ms': round(medicion['render_ms'], 1),
+        'objetos': medicion['objetos'],
+        'lentas': [
+            {'ms': round(duracion, 1), 'orden': orden, 'sql': sql}
+            for duracion, orden, sql in sorted(medicion['lentas'], reverse=True)
+        ],
+    }
+    with _lock:
+        _recientes.append(registro)
+
+    if medicion['para_explicar']:
+        registrar_al_cerrar(respuesta, medicion['para_explicar'],
+                            registro['metodo'], registro['ruta'], registro['endpoint'])
+
+    respuesta.headers['Server-Timing'] = (
+        f'sql;dur={medicion["sql_ms"]:.1f};desc="{medicion["consultas"]} consultas", '
+        f'render;dur={medicion["render_ms"]:.1f}, '
+        f'total;dur={total_ms:.1f}'
+    )
+
+    linea = {clave: valor for clave, valor in registro.items() if clave not in ('fecha', 'lentas')}
+    if total_ms >= UMBRAL_LENTO_MS:
+        linea['consulta_mas_lenta'] = registro['lentas'][0] if registro['lentas'] else None
+        logger.warning(json.dumps(linea, ensure_ascii=False))
+    else:
+        logger.info(json.dumps(linea, ensure_ascii=False))
+
+    return respuesta
+
+
+def instrumentar(app):
+    """Registra los eventos de SQLAlchemy y los hooks de Flask (una vez por app)"""
+    if not ACTIVA:
+        return
+
+    event.listen(Engine, 'before_cursor_execute', _antes_de_consulta)
+    event.listen(Engine, 'after_cursor_execute', _despues_de_consulta)
+    event.listen(Mapper, 'load', _objeto_cargado)
+    before_render_template.connect(_antes_de_render, app)
+    template_rendered.connect(_despues_de_render, app)
+    app.before_request(_iniciar_request)
+    app.after_request(_terminar_request)
+
+
+# ============= CONSULTA DE REQUESTS RECIENTES =============
+
+def requests_recientes(limite=None):
+    """Últimos requests medidos en este proceso, del más reciente al más antiguo"""
+    with _lock:
+        registros = list(_recientes)
+    registros.reverse()
+    return registros[:limite] if limite else registros
+
+
+def _percentil(valores, p):
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+def histograma(tiempos):
+    """Cantidad de requests por tramo de latencia: [(etiqueta, cantidad)]"""
+    conteo = [0] * (len(TRAMOS_MS) + 1)
+    for ms in tiempos:
+        conteo[next((i for i, limite in enumerate(TRAMOS_MS) if ms < limite), len(TRAMOS_MS))] += 1
+
+    etiquetas = [f'<{TRAMOS_MS[0]}']
+    etiquetas += [f'{desde}-{hasta}' for desde, hasta in zip(TRAMOS_MS, TRAMOS_MS[1:])]
+    etiquetas.append(f'≥{TRAMOS_MS[-1]}')
+    return list(zip(etiquetas, conteo))
+
+
+def resumen_por_endpoint():
+    """
+    Estadísticas de los requests recientes agrupadas por endpoint, de mayor a
+    menor p95.
+
+    Returns:
+        list: [{'endpoint', 'requests', 'p50_ms', 'p95_ms', 'max_ms', 'consultas_promedio',
+                'consultas_max', 'sql_ms_promedio', 'render_ms_promedio',
+                'objetos_promedio', 'histograma'}]
+    """
+    por_endpoint = defaultdict(list)
+    for registro in requests_recientes():
+        por_endpoint[registro['endpoint']].append(registro)
+
+    resumen = []
+    for endpoint, registros in por_endpoint.items():
+        tiempos = [r['ms'] for r in registros]
+        cantidad = len(registros)
+        resumen.append({
+            'endpoint': endpoint,
+            'requests': cantidad,
+            'p50_ms': round(_percentil(tiempos, 50), 1),
+            'p95_ms': round(_percentil(tiempos, 95), 1),
+            'max_ms': max(tiempos),
+            'consultas_promedio': round(sum(r['consultas'] for r in registros) / cantidad, 1),
+            'consultas_max': max(r['consultas'] for r in registros),
+            'sql_ms_promedio': round(sum(r['sql_ms'] for r in registros) / cantidad, 1),
+            'render_ms_promedio': round(sum(r['render_ms'] for r in registros) / cantidad, 1),
+            'objetos_promedio': round(sum(r['objetos'] for r in registros) / cantidad),
+            'histograma': histograma(tiempos),
+        })
+
+    resumen.sort(key=lambda fila: fila['p95_ms'], reverse=True)
+    return resumen
@@ -0,0 +1,208 @@
+"""
+Jerarquía organizacional como tabla de clausura (tabla jerarquia_personas)
+
+Por cada persona guarda una fila (ancestro, descendiente, profundidad) con cada
+persona sobre ella en el organigrama (reporte_a_id), incluida ella misma con
+profundidad 0. Así "¿A está bajo B a cualquier nivel?" y "todas las personas
+bajo B" son una consulta por clave, sin recorrer el árbol:
+
+    RegistroHora.persona_id IN (SELECT descendiente_id FROM jerarquia_personas
+                                WHERE ancestro_id = :jefe)
+
+Mantenimiento:
+    - Incremental: aplicar_cambios_jerarquia() corre en cada flush (after_flush)
+      cuando se crea, elimina o cambia de jefe una persona con el ORM. Mover a
+      una persona mueve todo su subárbol (dos sentencias: desconectar y conectar).
+    - Completo: reconstruir_jerarquia() recalcula la tabla desde personas. Se usa
+      cuando un mismo flush cambia varias jefaturas y después de actualizaciones
+      masivas (Persona.query.update, SQL directo), p. ej. en
+      configurar_jerarquia_organigrama.py.
+
+La visibilidad de cada usuario se calcula una vez por request (ver personas_visibles).
+"""
+
+from flask import g, has_request_context
+from sqlalchemy import delete, insert, inspect, or_, select, true
+from sqlalchemy.orm import aliased
+
+from app import db, JerarquiaPersona, Persona
+
+
+# ============= CONSULTAS =============
+
+def _subordinados(persona_id):
+    """SELECT de las personas bajo persona_id a cualquier profundidad (incluida ella)"""
+    return select(JerarquiaPersona.descendiente_id).where(JerarquiaPersona.ancestro_id == persona_id)
+
+
+def filtro_visibles(persona, columna):
+    """
+    Condición SQL "columna es una persona visible para persona".
+
+    Admin ve a todas las personas activas; el resto se ve a sí misma y a las
+    personas activas bajo ella en el organigrama, a cualquier profundidad.
+
+    Args:
+        persona: Usuario que consulta
+        columna: Columna con un id de persona (RegistroHora.persona_id, Persona.id...)
+    """
+    activas = select(Persona.id).where(Persona.activo == True)
+    if persona.es_admin:
+        return columna.in_(activas)
+
+    return or_(
+        columna == persona.id,
+        columna.in_(_subordinados(persona.id).where(JerarquiaPersona.descendiente_id.in_(activas)))
+    )
+
+
+def personas_visibles(persona):
+    """
+    Personas que persona puede ver: {persona_id: activo}.
+
+    Se calcula con una consulta y se guarda en g durante el request, así que
+    los permisos y filtros de una misma página no repiten la consulta.
+    Para admin incluye solo a las personas activas (puede ver a cualquiera,
+    ver Persona.puede_ver_persona).
+    """
+    cache = g.setdefault('_personas_visibles', {}) if has_request_context() else {}
+    if persona.id not in cache:
+        if persona.es_admin:
+            consulta = select(Persona.id, Persona.activo).where(Persona.activo == True)
+        else:
+            consulta = (
+                select(Persona.id, Persona.activo)
+                .where(Persona.id.in_(_subordinados(persona.id)))
+            )
+        visibles = dict(db.session.execute(consulta).all())
+        visibles.setdefault(persona.id, persona.activo)
+        cache[persona.id] = visibles
+    return cache[persona.id]
+
+
+# ============= MANTENIMIENTO INCREMENTAL =============
+
+def _cambio_jefe(persona):
+    """True si el flush cambió el jefe de persona (por reporte_a_id o por supervisor)"""
+    estado = inspect(persona)
+    return (estado.attrs.reporte_a_id.history.has_changes()
+            or estado.attrs.supervisor.history.has_changes())
+
+
+def _conectar(conexion, persona_id, jefe_id):
+    """Cuelga el subárbol de persona_id bajo jefe_id (y todos los ancestros de jefe_id)"""
+    tabla = JerarquiaPersona.__table__
+    ancestros = aliased(JerarquiaPersona)
+    subarbol = aliased(JerarquiaPersona)
+
+    circular = conexion.execute(
+        select(tabla.c.ancestro_id)
+        .where(tabla.c.ancestro_id == persona_id, tabla.c.descendiente_id == jefe_id)
+    ).first()
+    if circular:
+        raise ValueError(f'Jerarquía circular: la persona {jefe_id} ya reporta (directa o '
+                         f'indirectamente) a la persona {persona_id}')
+
+    conexion.execute(insert(tabla).from_select(
+        ['ancestro_id', 'descendiente_id', 'profundidad'],
+        select(
+            ancestros.ancestro_id,
+            subarbol.descendiente_id,
+            ancestros.profundidad + subarbol.profundidad + 1
+        )
+        .join_from(ancestros, subarbol, true())  # ancestros de jefe_id × subárbol de persona_id
+        .where(ancestros.descendiente_id == jefe_id, subarbol.ancestro_id == persona_id)
+    ))
+
+
+def _desconectar(conexion, persona_id):
+    """Separa el subárbol de persona_id de todos sus ancestros (queda como raíz)"""
+    tabla = JerarquiaPersona.__table__
+    subarbol = select(tabla.c.descendiente_id).where(tabla.c.ancestro_id == persona_id)
+    # Materializar: algunos motores no permiten leer la tabla que se borra
+    ids = [fila[0] for fila in conexion.execute(subarbol)]
+    conexion.execute(
+        delete(tabla)
+        .where(tabla.c.descendiente_id.in_(ids))
+        .where(tabla.c.ancestro_id.notin_(ids))
+    )
+
+
+def aplicar_cambios_jerarquia(session):
+    """
+    Aplica a jerarquia_personas las altas, bajas y cambios de jefe del flush.
+
+    Corre en after_flush, cuando las personas nuevas ya tienen id y el
+    historial de atributos todavía registra los cambios del flush.
+    """
+    nuevas = [obj for obj in session.new if isinstance(obj, Persona)]
+    eliminadas = [obj for obj in session.deleted if isinstance(obj, Persona)]
+    movidas = [obj for obj in session.dirty if isinstance(obj, Persona) and _cambio_jefe(obj)]
+    if not (nuevas or eliminadas or movidas):
+        return
+
+    conexion = session.connection()
+    tabla = JerarquiaPersona.__table__
+
+    # Varias personas en un flush (cargas, reorganizaciones): el orden de las
+    # operaciones importaría, es más simple y igual de barato recalcular todo
+    if len(nuevas) + len(movidas) > 1:
+        reconstruir_jerarquia(conexion)
+        return
+
+    for persona in eliminadas:
+        conexion.execute(delete(tabla).where(or_(
+            tabla.c.ancestro_id == persona.id, tabla.c.descendiente_id == persona.id
+        )))
+
+    for persona in nuevas:
+        conexion.execute(insert(tabla).values(
+            ancestro_id=persona.id, descendiente_id=persona.id, profundidad=0
+        ))
+        if persona.reporte_a_id:
+            _conectar(conexion, persona.id, persona.reporte_a_id)
+
+    for persona in movidas:
+        _desconectar(conexion, persona.id)
+        if persona.reporte_a_id:
+            _conectar(conexion, persona.id, persona.reporte_a_id)
+
+
+# ============= RECONSTRUCCIÓN =============
+
+def reconstruir_jerarquia(conexion=None):
+    """
+    Recalcula jerarquia_personas desde personas.reporte_a_id.
+
+    Args:
+        conexion: Conexión de una transacción en curso. Sin conexión usa
+                  db.session y hace commit.
+
+    Returns:
+        int: Filas escritas
+    """
+    ejecutar = conexion.execute if conexion is not None else db.session.execute
+    jefes = dict(ejecutar(select(Persona.id, Persona.reporte_a_id)).all())
+
+    filas = []
+    for persona_id in jefes:
+        filas.append({'ancestro_id': persona_id, 'descendiente_id': persona_id, 'profundidad': 0})
+        vistos = {persona_id}
+        jefe_id, profundidad = jefes[persona_id], 1
+        # Un ciclo en reporte_a_id se corta al volver a una persona ya vista
+        while jefe_id is not None and jefe_id in jefes and jefe_id not in vistos:
+            filas.append({'ancestro_id': jefe_id, 'descendiente_id': persona_id, 'profundidad': profundidad})
+            vistos.add(jefe_id)
+            jefe_id, profundidad = jefes[jefe_id], profundidad + 1
+
+    ejecutar(delete(JerarquiaPersona.__table__))
+    if filas:
+        ejecutar(insert(JerarquiaPersona.__table__), filas)
+    if conexion is None:
+        # Fuera de un flush nadie más avisa que cambió la visibilidad (ver usuario_actual.py)
+        from usuario_actual import CLAVE_PERMISOS
+        from versiones import incrementar_versiones
+        incrementar_versiones(db.session.connection(), {CLAVE_PERMISOS})
+        db.session.commit()
+
+    return len(filas)
@@ -0,0 +1,198 @@
+"""
+Lectura por bloques de exportaciones de horas (Harvest) en Excel o CSV
+
+Los importadores cargaban el archivo completo con pandas (pd.read_excel /
+pd.read_csv) y luego copiaban el DataFrame filtrado, así que la memoria crecía
+con todo el historial. Este módulo recorre el archivo fila por fila y entrega
+bloques de tamaño fijo de filas normalizadas:
+
+    - xlsx: openpyxl en modo read_only (no carga la hoja completa)
+    - csv: módulo csv
+
+Cada fila normalizada es un dict con claves en español:
+
+    {
+        'fecha': date(2025, 3, 14),
+        'horas': 1.5,
+        'nombre': 'Ana',
+        'apellido': 'Pérez',
+        'nombre_completo': 'Ana Pérez',
+        'cliente': 'Falabella',
+        'proyecto': 'Falabella',
+        'tarea': 'Reunión',
+        'area': 'Externas',
+        'notas': ''
+    }
+
+Uso:
+    for bloque in leer_registros_horas('Historial 2024-2025.xlsx', hoja='Horas',
+                                       desde=date(2025, 1, 1), hasta=date(2025, 10, 1)):
+        importador.importar(preparar(bloque))
+
+Con ImportadorHoras (motor_importacion.py) cada bloque se inserta en lote, así
+que la importación completa usa memoria acotada por el tamaño del bloque.
+"""
+
+import csv
+import os
+from datetime import date, datetime
+from itertools import islice
+
+TAMAÑO_BLOQUE = 5000
+
+# Columnas de la exportación de Harvest -> claves normalizadas
+COLUMNAS = {
+    'Date': 'fecha',
+    'Hours': 'horas',
+    'First Name': 'nombre',
+    'Last Name': 'apellido',
+    'Client': 'cliente',
+    'Project': 'proyecto',
+    'Task': 'tarea',
+    'Area': 'area',
+    'Notes': 'notas',
+}
+
+FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S')
+
+
+# ============= CONVERSIÓN DE VALORES =============
+
+def _texto(valor):
+    """Texto sin espacios; '' para celdas vacías"""
+    if valor is None:
+        return ''
+    return str(valor).strip()
+
+
+def convertir_fecha(valor):
+    """Fecha desde celda de Excel (datetime/date) o texto; None si no se puede leer"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+
+    texto = _texto(valor)
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def convertir_horas(valor):
+    """Horas desde número o texto con coma decimal (formato europeo); 0.0 si está vacío"""
+    if isinstance(valor, (int, float)):
+        return float(valor)
+
+    texto = _texto(valor).replace(',', '.')
+    try:
+        return float(texto) if texto else 0.0
+    except ValueError:
+        return 0.0
+
+
+def normalizar_fila(fila):
+    """Mapea una fila cruda (columnas de Harvest) a un registro normalizado"""
+    registro = {clave: _texto(fila.get(columna)) for columna, clave in COLUMNAS.items()}
+    registro['fecha'] = convertir_fecha(fila.get('Date'))
+    registro['horas'] = convertir_horas(fila.get('Hours'))
+    registro['nombre_completo'] = f"{registro['nombre']} {registro['apellido']}"
+    return registro
+
+
+# ============= LECTORES DE FILAS =============
+
+def filas_excel(ruta, hoja=None):
+    """Filas de una hoja de Excel como dicts {encabezado: valor} (openpyxl read_only)"""
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro[hoja].iter_rows(values_only=True) if hoja else libro.active.iter_rows(values_only=True)
+        encabezados = [_texto(celda) for celda in next(filas, ())]
+        for valores in filas:
+            if any(valor is not None for valor in valores):
+                yield dict(zip(encabezados, valores))
+    finally:
+        libro.close()
+
+
+def filas_csv(ruta, separador=',', encoding='utf-8-sig'):
+    """Filas de un CSV como dicts {encabezado: valor}"""
+    with open(ruta, newline='', encoding=encoding) as archivo:
+        yield from csv.DictReader(archivo, delimiter=separador)
+
+
+def filas_archivo(ruta, hoja=None, separador=','):
+    """Filas crudas según la extensión del archivo (.xlsx/.xlsm o .csv)"""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return filas_excel(ruta, hoja)
+    if extension == '.csv':
+        return filas_csv(ruta, separador)
+    raise ValueError(f"Formato no soportado: {extension} (se espera .xlsx o .csv)")
+
+
+# ============= BLOQUES =============
+
+def en_bloques(iterable, tamaño=TAMAÑO_BLOQUE):
+    """Agrupa un iterable en listas de hasta `tamaño` elementos"""
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamaño))
+        if not bloque:
+            return
+        yield bloque
+
+
+def leer_registros_horas(ruta, hoja=None, desde=None, hasta=None, separador=',',
+                         tamaño_bloque=TAMAÑO_BLOQUE):
+    """
+    Registros normalizados del archivo en bloques de `tamaño_bloque`.
+
+    Args:
+        ruta: Archivo .xlsx o .csv exportado de Harvest
+        hoja: Hoja del Excel (None = hoja activa)
+        desde: Fecha inicial incluida (opcional)
+        hasta: Fecha final excluida (opcional)
+        separador: Separador del CSV
+
+    Las filas sin fecha válida se descartan.
+    """
+    def registros():
+        for fila in filas_archivo(ruta, hoja, separador):
+            registro = normalizar_fila(fila)
+            fecha = registro['fecha']
+            if fecha is None:
+                continue
+            if desde and fecha < desde:
+                continue
+            if hasta and fecha >= hasta:
+                continue
+            yield registro
+
+    return en_bloques(registros(), tamaño_bloque)
+
+
+def escribir_csv(bloques, ruta):
+    """
+    Escribe bloques de registros normalizados como CSV con las columnas de Harvest
+    (fecha ISO, horas con punto decimal), legible otra vez con leer_registros_horas.
+
+    Returns:
+        int: Filas escritas
+    """
+    filas = 0
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(COLUMNAS)
+        for bloque in bloques:
+            for registro in bloque:
+                escritor.writerow([
+                    registro['fecha'].isoformat() if clave == 'fecha' else registro[clave]
+                    for clave in COLUMNAS.values()
+                ])
+            filas += len(bloque)
+    return filas
@@ -0,0 +1,367 @@
+"""
+Motor de importación masiva de registros de horas
+
+Reemplaza el patrón fila por fila de los importadores (obtener_o_crear_* y
+verificar_registro_existe por cada hora importada, 5-6 consultas por fila):
+
+    1. Precarga las dimensiones (clientes, áreas, servicios, tareas) en diccionarios
+    2. Crea en lote los miembros que faltan (un executemany por dimensión)
+    3. Carga los registros en una tabla temporal de staging:
+       COPY en PostgreSQL, executemany en SQLite
+    4. Inserta en registros_horas con un solo INSERT ... SELECT ... ON CONFLICT
+       (huella) DO NOTHING
+
+Los registros de entrada son dicts normalizados:
+
+    {
+        'persona_id': 12,
+        'cliente': 'Falabella',
+        'area': 'Externas',
+        'servicio': 'Falabella',
+        'tarea': 'Tarea general',
+        'fecha': date(2025, 3, 14),
+        'horas': 1.5,
+        'descripcion': '',
+        'tipo_cliente': 'interno',  # Opcional, para clientes nuevos
+        'origen': 'harvest',        # Opcional, con id_origen
+        'id_origen': '123456'       # Opcional, id de la fila en el sistema de origen
+    }
+
+Cada registro importado lleva una huella (huella_registro): hash de la fila de
+origen (origen + id_origen si el archivo trae id de fila; si no, persona, fecha,
+cliente, servicio, tarea, horas y notas). registros_horas.huella tiene índice
+único, así que reimportar un archivo nunca duplica horas. Las bases existentes
+necesitan agregar_huella_registros.py --ejecutar antes de la primera importación.
+
+importar_bloques() recibe un iterable de listas de registros (ver lector_horas.py)
+e importa bloque por bloque, con las dimensiones en memoria entre bloques.
+
+Funciona con una conexión de SQLAlchemy (engine.connect()) en PostgreSQL o SQLite.
+Como la carga no pasa por la sesión del ORM, al terminar incrementa las versiones
+de las tablas modificadas (ver versiones.py) para invalidar los reportes en caché.
+El costo hora (costo_hora_uf) y el resumen mensual se completan después con
+resumen_horas.reconstruir_resumen().
+"""
+
+import csv
+import hashlib
+import io
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+TAREA_POR_DEFECTO = 'Tarea general'
+
+COLUMNAS_STAGING = (
+    'fila', 'persona_id', 'cliente_id', 'area_id', 'servicio_id', 'tarea_id',
+    'fecha', 'horas', 'descripcion', 'huella'
+)
+
+
+def huella_registro(persona_id, fecha, cliente_id, servicio_id, tarea_id, horas, descripcion,
+                    origen=None, id_origen=None):
+    """
+    Huella determinística (sha256 hex) de un registro de horas.
+
+    Con origen e id_origen la huella identifica la fila en el sistema de origen;
+    si no, se calcula con la clave natural del registro. Las horas se redondean
+    a 4 decimales y las notas se comparan sin espacios al inicio y al final.
+    """
+    if origen and id_origen:
+        partes = (origen, id_origen)
+    else:
+        partes = (
+            persona_id, fecha.isoformat(), cliente_id or '', servicio_id, tarea_id,
+            f'{float(horas):.4f}', (descripcion or '').strip()
+        )
+    return hashlib.sha256('|'.join(str(parte) for parte in partes).encode()).hexdigest()
+
+
+class ImportadorHoras:
+    """
+    Importa registros de horas en lote sobre una conexión de SQLAlchemy.
+
+    Uso:
+        with engine.connect() as conn:
+            importador = ImportadorHoras(conn)
+            resultado = importador.importar(registros)
+            conn.commit()
+    """
+
+    def __init__(self, conn, clientes_sin_mayusculas=True):
+        """
+        Args:
+            conn: Conexión de SQLAlchemy
+            clientes_sin_mayusculas: Buscar clientes sin distinguir mayúsculas
+                (UPPER(nombre)), como importar_horas_produccion.py
+        """
+        self.conn = conn
+        self.es_postgresql = conn.dialect.name == 'postgresql'
+        self.clientes_sin_mayusculas = clientes_sin_mayusculas
+
+        self.clientes = {}
+        self.areas = {}
+        self.servicios = {}
+        self.tareas = {}
+
+    # ============= DIMENSIONES =============
+
+    def _clave_cliente(self, nombre):
+        return nombre.upper() if self.clientes_sin_mayusculas else nombre
+
+    def cargar_dimensiones(self):
+        """Precarga clientes, áreas, servicios y tareas (4 consultas)"""
+        self.clientes = {
+            self._clave_cliente(nombre): id_cliente
+            for id_cliente, nombre in self.conn.execute(text("SELECT id, nombre FROM clientes"))
+        }
+        self.areas = {
+            nombre: id_area
+            for id_area, nombre in self.conn.execute(text("SELECT id, nombre FROM areas"))
+        }
+        self.servicios = {
+            (area_id, nombre): id_servicio
+            for id_servicio, area_id, nombre in self.conn.execute(
+                text("SELECT id, area_id, nombre FROM servicios")
+            )
+        }
+        self.tareas = {
+            (servicio_id, nombre): id_tarea
+            for id_tarea, servicio_id, nombre in self.conn.execute(
+                text("SELECT id, servicio_id, nombre FROM tareas")
+            )
+        }
+
+    def _crear_faltantes(self, sentencia, filas):
+        """Inserta en lote los miembros faltantes de una dimensión (executemany)"""
+        if filas:
+            self.conn.execute(text(sentencia), filas)
+        return len(filas)
+
+    def crear_dimensiones(self, registros):
+        """
+        Crea en lote los clientes, áreas, servicios y tareas que no existen
+        y recarga los diccionarios.
+
+        Returns:
+            dict: Número de miembros creados por dimensión
+        """
+        creados = {}
+
+        nuevos_clientes = {}
+        nuevas_areas = set()
+        for registro in registros:
+            clave = self._clave_cliente(registro['cliente'])
+            if clave not in self.clientes:
+                nuevos_clientes.setdefault(clave, (registro['cliente'], registro.get('tipo_cliente')))
+            if registro['area'] not in self.areas:
+                nuevas_areas.add(registro['area'])
+
+        creados['clientes'] = self._crear_faltantes(
+            "INSERT INTO clientes (nombre, tipo, activo) VALUES (:nombre, :tipo, :activo)",
+            [{
+                'nombre': nombre,
+                'tipo': tipo or ('spot' if 'spot' in nombre.lower() else 'permanente'),
+                'activo': True
+            } for nombre, tipo in nuevos_clientes.values()]
+        )
+        creados['areas'] = self._crear_faltantes(
+            "INSERT INTO areas (nombre, activo) VALUES (:nombre, :activo)",
+            [{'nombre': nombre, 'activo': True} for nombre in sorted(nuevas_areas)]
+        )
+        if creados['clientes'] or creados['areas']:
+            self.cargar_dimensiones()
+
+        nuevos_servicios = {
+            (self.areas[r['area']], r['servicio']) for r in registros
+        } - set(self.servicios)
+        creados['servicios'] = self._crear_faltantes(
+            "INSERT INTO servicios (area_id, nombre, activo) VALUES (:area_id, :nombre, :activo)",
+            [{'area_id': area_id, 'nombre': nombre, 'activo': True}
+             for area_id, nombre in sorted(nuevos_servicios)]
+        )
+        if creados['servicios']:
+            self.cargar_dimensiones()
+
+        nuevas_tareas = {
+            (self.servicios[(self.areas[r['area']], r['servicio'])], r['tarea'] or TAREA_POR_DEFECTO)
+            for r in registros
+        } - set(self.tareas)
+        creados['tareas'] = self._crear_faltantes(
+            "INSERT INTO tareas (servicio_id, nombre, activo) VALUES (:servicio_id, :nombre, :activo)",
+            [{'servicio_id': servicio_id, 'nombre': nombre, 'activo': True}
+             for servicio_id, nombre in sorted(nuevas_tareas)]
+        )
+        if creados['tareas']:
+            self.cargar_dimensiones()
+
+        return creados
+
+    def _filas_staging(self, registros):
+        """Convierte registros con nombres a filas con ids para el staging"""
+        for fila, registro in enumerate(registros):
+            area_id = self.areas[registro['area']]
+            servicio_id = self.servicios[(area_id, registro['servicio'])]
+            cliente_id = self.clientes[self._clave_cliente(registro['cliente'])]
+            tarea_id = self.tareas[(servicio_id, registro['tarea'] or TAREA_POR_DEFECTO)]
+            descripcion = registro.get('descripcion') or ''
+            yield {
+                'fila': fila,
+                'persona_id': registro['persona_id'],
+                'cliente_id': cliente_id,
+                'area_id': area_id,
+                'servicio_id': servicio_id,
+                'tarea_id': tarea_id,
+                'fecha': registro['fecha'],
+                'horas': registro['horas'],
+                'descripcion': descripcion,
+                'huella': huella_registro(
+                    registro['persona_id'], registro['fecha'], cliente_id, servicio_id, tarea_id,
+                    registro['horas'], descripcion, registro.get('origen'), registro.get('id_origen')
+                )
+            }
+
+    # ============= STAGING =============
+
+    def _crear_staging(self):
+        self.conn.execute(text("DROP TABLE IF EXISTS staging_registros_horas"))
+        self.conn.execute(text("""
+            CREATE TEMPORARY TABLE staging_registros_horas (
+                fila INTEGER NOT NULL,
+                persona_id INTEGER NOT NULL,
+                cliente_id INTEGER,
+                area_id INTEGER NOT NULL,
+                servicio_id INTEGER NOT NULL,
+                tarea_id INTEGER NOT NULL,
+                fecha DATE NOT NULL,
+                horas FLOAT NOT NULL,
+                descripcion TEXT,
+                huella VARCHAR(64) NOT NULL
+            )
+        """))
+
+    def _cargar_staging_copy(self, filas):
+        """PostgreSQL: COPY desde un CSV en memoria"""
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for fila in filas:
+            escritor.writerow([fila[columna] for columna in COLUMNAS_STAGING])
+        buffer.seek(0)
+
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY staging_registros_horas ({', '.join(COLUMNAS_STAGING)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def _cargar_staging_executemany(self, filas):
+        """SQLite: executemany"""
+        self.conn.execute(text(f"""
+            INSERT INTO staging_registros_horas ({', '.join(COLUMNAS_STAGING)})
+            VALUES ({', '.join(':' + columna for columna in COLUMNAS_STAGING)})
+        """), list(filas))
+
+    def _insertar_desde_staging(self):
+        """INSERT ... SELECT con ON CONFLICT (huella) DO NOTHING (PostgreSQL y SQLite)"""
+        # WHERE true: en SQLite evita que ON CONFLICT se lea como parte del SELECT
+        resultado = self.conn.execute(text("""
+            INSERT INTO registros_horas (
+                persona_id, cliente_id, area_id, servicio_id, tarea_id,
+                fecha, horas, descripcion, huella
+            )
+            SELECT s.persona_id, s.cliente_id, s.area_id, s.servicio_id, s.tarea_id,
+                   s.fecha, s.horas, s.descripcion, s.huella
+            FROM staging_registros_horas s
+            WHERE true
+            ORDER BY s.fila
+            ON CONFLICT (huella) DO NOTHING
+        """))
+        return resultado.rowcount
+
+    def _incrementar_versiones(self, tablas):
+        """Incrementa versiones_tablas (si existe) para las tablas modificadas"""
+        if not tablas or not inspect(self.conn).has_table('versiones_tablas'):
+            return
+        self.conn.execute(text("""
+            INSERT INTO versiones_tablas (tabla, version, actualizado)
+            VALUES (:tabla, 1, :ahora)
+            ON CONFLICT (tabla) DO UPDATE
+            SET version = versiones_tablas.version + 1, actualizado = :ahora
+        """), [{'tabla': tabla, 'ahora': datetime.now()} for tabla in sorted(tablas)])
+
+    # ============= IMPORTACIÓN =============
+
+    def importar(self, registros):
+        """
+        Importa los registros (lista de dicts normalizados).
+
+        Returns:
+            dict: {'total', 'importados', 'duplicados', 'dimensiones_creadas'}
+        """
+        registros = list(registros)
+        if not registros:
+            return {'total': 0, 'importados': 0, 'duplicados': 0, 'dimensiones_creadas': {}}
+
+        if not self.clientes:
+            columnas = {columna['name'] for columna in inspect(self.conn).get_columns('registros_horas')}
+            if 'huella' not in columnas:
+                raise RuntimeError(
+                    "registros_horas no tiene la columna huella: "
+                    "ejecuta python agregar_huella_registros.py --ejecutar"
+                )
+            self.cargar_dimensiones()
+        creados = self.crear_dimensiones(registros)
+
+        self._crear_staging()
+        filas = self._filas_staging(registros)
+        if self.es_postgresql:
+            self._cargar_staging_copy(filas)
+        else:
+            self._cargar_staging_executemany(filas)
+
+        importados = self._insertar_desde_staging()
+        self.conn.execute(text("DROP TABLE staging_registros_horas"))
+
+        tablas = {tabla for tabla, cantidad in creados.items() if cantidad}
+        if importados:
+            tablas.add('registros_horas')
+        self._incrementar_versiones(tablas)
+
+        return {
+            'total': len(registros),
+            'importados': importados,
+            'duplicados': len(registros) - importados,
+            'dimensiones_creadas': creados
+        }
+
+    def importar_bloques(self, bloques, al_terminar_bloque=None):
+        """
+        Importa un iterable de bloques (listas de registros), uno a la vez.
+
+        Los duplicados entre bloques se descartan igual: la huella de cada
+        registro es única en registros_horas.
+
+        Args:
+            bloques: Iterable de listas de registros normalizados
+            al_terminar_bloque: Función opcional llamada con el resultado acumulado
+                después de cada bloque (progreso, commit)
+
+        Returns:
+            dict: {'total', 'importados', 'duplicados', 'dimensiones_creadas'} acumulados
+        """
+        acumulado = {'total': 0, 'importados': 0, 'duplicados': 0,
+                     'dimensiones_creadas': {'clientes': 0, 'areas': 0, 'servicios': 0, 'tareas': 0}}
+
+        for bloque in bloques:
+            resultado = self.importar(bloque)
+            for clave in ('total', 'importados', 'duplicados'):
+                acumulado[clave] += resultado[clave]
+            for dimension, cantidad in resultado['dimensiones_creadas'].items():
+                acumulado['dimensiones_creadas'][dimension] += cantidad
+            if al_terminar_bloque:
+                al_terminar_bloque(acumulado)
+
+        return acumulado
@@ -0,0 +1,263 @@
+"""
+Motor de rentabilidad basado en consultas agregadas
+
+Calcula ingresos, horas, costos directos y margen por cliente, servicio y área
+con un número fijo de consultas agrupadas (GROUP BY), en lugar de consultar
+IngresoMensual y RegistroHora por cada cliente, servicio y área. Las horas y
+costos se leen del resumen mensual (resumen_horas_mensual).
+
+Los resultados tienen la misma forma que consume templates/rentabilidad.html:
+    - stats
+    - clientes_analisis (con servicios anidados)
+    - areas_analisis
+    - overhead_info
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from app import (
+    db, Persona, Area, Servicio, Cliente, ServicioCliente, IngresoMensual, ResumenHorasMensual,
+    obtener_overhead_distribuido
+)
+from costos import costos_mensuales_uf
+from resumen_horas import filtrar_periodo, horas_agrupadas
+
+CLIENTES_EXCLUIDOS = ('CLIENTES PERMANENTES',)
+CLIENTE_INTERNO = 'COMSULTING'
+
+
+# ============= CONSULTAS AGREGADAS =============
+
+def ingresos_agrupados(columna, año, mes=None):
+    """
+    Suma IngresoMensual.ingreso_uf agrupado por una columna.
+
+    Args:
+        columna: IngresoMensual.servicio_id o ServicioCliente.cliente_id
+        año: Año a consultar
+        mes: Mes específico (None = todo el año)
+
+    Returns:
+        dict: {valor_columna: ingresos_uf}
+    """
+    query = db.session.query(columna, func.sum(IngresoMensual.ingreso_uf))
+    if columna.class_ is ServicioCliente:
+        query = query.join(ServicioCliente, ServicioCliente.id == IngresoMensual.servicio_id)
+
+    query = query.filter(IngresoMensual.año == año)
+    if mes:
+        query = query.filter(IngresoMensual.mes == mes)
+
+    return {clave: total or 0 for clave, total in query.group_by(columna).all()}
+
+
+def horas_y_costos_agrupados(columna, año, mes=None):
+    """
+    Suma horas y costo directo (UF) del resumen mensual agrupados por una columna.
+
+    Args:
+        columna: ResumenHorasMensual.cliente_id, .servicio_id, .area_id...
+        año: Año a consultar
+        mes: Mes específico (None = todo el año)
+
+    Returns:
+        dict: {valor_columna: {'horas': float, 'costos': float}}
+    """
+    query = filtrar_periodo(horas_agrupadas(columna), año, mes)
+    return {
+        clave: {'horas': horas or 0, 'costos': costos or 0}
+        for clave, horas, costos in query.all()
+    }
+
+
+# ============= ANÁLISIS DE RENTABILIDAD =============
+
+def _margen(ingresos, costos):
+    """Retorna (margen_uf, margen_porcentaje)"""
+    margen = ingresos - costos
+    porcentaje = (margen / ingresos * 100) if ingresos > 0 else 0
+    return margen, porcentaje
+
+
+def calcular_rentabilidad(año, mes=None):
+    """
+    Calcula la rentabilidad completa del período con consultas agregadas.
+
+    Args:
+        año: Año a analizar
+        mes: Mes específico (None = todo el año)
+
+    Returns:
+        dict: {
+            'stats': {...},
+            'clientes_analisis': [...],
+            'areas_analisis': [...],
+            'overhead_info': {...}
+        }
+    """
+    # ===== RESUMEN GENERAL =====
+    total_ingresos = db.session.query(func.sum(IngresoMensual.ingreso_uf)).filter(
+        IngresoMensual.año == año
+    )
+    if mes:
+        total_ingresos = total_ingresos.filter(IngresoMensual.mes == mes)
+    total_ingresos = total_ingresos.scalar() or 0
+
+    # Costo de la dotación activa en cada mes del período, con la tarifa y UF vigentes ese mes
+    personas_activas = Persona.query.filter_by(activo=True).all()
+    costos_periodo = sum(costos_mensuales_uf([p.id for p in personas_activas], año, mes).values())
+
+    margen_uf, margen_porcentaje = _margen(total_ingresos, costos_periodo)
+
+    stats = {
+        'total_ingresos': round(total_ingresos, 2),
+        'total_costos': round(costos_periodo, 2),
+        'margen_uf': round(margen_uf, 2),
+        'margen_porcentaje': round(margen_porcentaje, 2),
+        'personal_activo': len(personas_activas)
+    }
+
+    # Overhead y horas no imputadas (gap): un cálculo en caché por (año, mes)
+    overhead_info = obtener_overhead_distribuido(año, mes)
+    distribucion_overhead = overhead_info['distribucion_por_cliente']
+    horas_no_imputadas_total = overhead_info['horas_no_imputadas']
+    costo_no_imputadas_total = overhead_info['overhead_horas_no_imputadas_uf']
+
+    # ===== AGREGADOS (una consulta por dimensión) =====
+    ingresos_por_cliente = ingresos_agrupados(ServicioCliente.cliente_id, año, mes)
+    ingresos_por_servicio = ingresos_agrupados(IngresoMensual.servicio_id, año, mes)
+
+    horas_por_cliente = horas_y_costos_agrupados(ResumenHorasMensual.cliente_id, año, mes)
+    horas_por_servicio = horas_y_costos_agrupados(ResumenHorasMensual.servicio_id, año, mes)
+    horas_por_area = horas_y_costos_agrupados(ResumenHorasMensual.area_id, año, mes)
+
+    servicios_por_cliente = defaultdict(list)
+    for servicio in ServicioCliente.query.filter_by(activo=True).order_by(ServicioCliente.id).all():
+        servicios_por_cliente[servicio.cliente_id].append(servicio)
+
+    # ===== ANÁLISIS POR CLIENTE =====
+    clientes_analisis = []
+    vacio = {'horas': 0, 'costos': 0}
+
+    for cliente in Cliente.query.filter_by(activo=True).all():
+        if cliente.nombre in CLIENTES_EXCLUIDOS:
+            continue
+
+        es_comsulting = cliente.nombre == CLIENTE_INTERNO
+
+        total_ingresos_cliente = ingresos_por_cliente.get(cliente.id, 0)
+        total_horas_cliente = horas_por_cliente.get(cliente.id, vacio)['horas']
+        total_costos_directos_cliente = horas_por_cliente.get(cliente.id, vacio)['costos']
+
+        overhead_cliente = distribucion_overhead.get(cliente.id, 0)
+
+        total_costos_cliente = total_costos_directos_cliente + overhead_cliente
+        margen_cliente, margen_porcentaje_cliente = _margen(total_ingresos_cliente, total_costos_cliente)
+
+        # Análisis por servicio
+        servicios_analisis = []
+        for servicio in servicios_por_cliente.get(cliente.id, []):
+            total_ingresos_servicio = ingresos_por_servicio.get(servicio.id, 0)
+            total_horas_servicio = horas_por_servicio.get(servicio.id, vacio)['horas']
+            total_costos_servicio = horas_por_servicio.get(servicio.id, vacio)['costos']
+
+            margen_servicio, margen_porcentaje_servicio = _margen(total_ingresos_servicio, total_costos_servicio)
+
+            if total_ingresos_servicio > 0 or total_costos_servicio > 0:
+                servicios_analisis.append({
+                    'servicio': servicio,
+                    'ingresos': round(total_ingresos_servicio, 2),
+                    'horas': round(total_horas_servicio, 2),
+                    'costos': round(total_costos_servicio, 2),
+                    'margen': round(margen_servicio, 2),
+                    'margen_porcentaje': round(margen_porcentaje_servicio, 2)
+                })
+
+        # Incluir cliente si tiene ingresos, costos, o es COMSULTING (siempre mostrar)
+        if not (total_ingresos_cliente > 0 or total_costos_cliente > 0 or es_comsulting):
+            continue
+
+        # Si es COMSULTING, agregar las horas no imputadas
+        if es_comsulting:
+            horas_imputadas = total_horas_cliente
+            costos_imputados = total_costos_cliente
+
+            total_horas_cliente += horas_no_imputadas_total
+            total_costos_cliente += costo_no_imputadas_total
+            margen_cliente = total_ingresos_cliente - total_costos_cliente
+
+            servicios_analisis.insert(0, {
+                'servicio': type('obj', (object,), {'nombre': '📊 HORAS NO IMPUTADAS (Gap)'})(),
+                'ingresos': 0,
+                'horas': round(horas_no_imputadas_total, 2),
+                'costos': round(costo_no_imputadas_total, 2),
+                'margen': round(-costo_no_imputadas_total, 2),
+                'margen_porcentaje': 0,
+                'es_gap': True
+            })
+
+            if horas_imputadas > 0:
+                servicios_analisis.insert(1, {
+                    'servicio': type('obj', (object,), {'nombre': '✏️ HORAS IMPUTADAS (Registradas)'})(),
+                    'ingresos': 0,
+                    'horas': round(horas_imputadas, 2),
+                    'costos': round(costos_imputados, 2),
+                    'margen': round(-costos_imputados, 2),
+                    'margen_porcentaje': 0,
+                    'es_gap': False
+                })
+
+        clientes_analisis.append({
+            'cliente': cliente,
+            'ingresos': round(total_ingresos_cliente, 2),
+            'horas': round(total_horas_cliente, 2),
+            'costos_directos': round(total_costos_directos_cliente, 2),
+            'overhead': round(overhead_cliente, 2),
+            'costos': round(total_costos_cliente, 2),  # Total = directos + overhead
+            'margen': round(margen_cliente, 2),
+            'margen_porcentaje': round(margen_porcentaje_cliente, 2) if total_ingresos_cliente > 0 else 0,
+            'servicios': servicios_analisis,
+            'es_comsulting': es_comsulting
+        })
+
+    # Ordenar: COMSULTING al final, resto por margen descendente
+    clientes_analisis.sort(key=lambda x: (x['es_comsulting'], -x['margen']))
+
+    # ===== ANÁLISIS POR ÁREA =====
+    servicios_por_area = defaultdict(list)
+    for servicio_id, area_id in db.session.query(Servicio.id, Servicio.area_id).filter_by(activo=True).all():
+        servicios_por_area[area_id].append(servicio_id)
+
+    areas_analisis = []
+    for area in Area.query.filter_by(activo=True).all():
+        total_horas_area = horas_por_area.get(area.id, vacio)['horas']
+        total_costos_area = horas_por_area.get(area.id, vacio)['costos']
+
+        # Ingresos por área (sumando ingresos de servicios en esta área)
+        total_ingresos_area = sum(
+            ingresos_por_servicio.get(servicio_id, 0) for servicio_id in servicios_por_area.get(area.id, [])
+        )
+
+        margen_area, margen_porcentaje_area = _margen(total_ingresos_area, total_costos_area)
+
+        if total_ingresos_area > 0 or total_costos_area > 0:
+            areas_analisis.append({
+                'area': area,
+                'ingresos': round(total_ingresos_area, 2),
+                'horas': round(total_horas_area, 2),
+                'costos': round(total_costos_area, 2),
+                'margen': round(margen_area, 2),
+                'margen_porcentaje': round(margen_porcentaje_area, 2)
+            })
+
+    # Ordenar por margen descendente
+    areas_analisis.sort(key=lambda x: -x['margen'])
+
+    return {
+        'stats': stats,
+        'clientes_analisis': clientes_analisis,
+        'areas_analisis': areas_analisis,
+        'overhead_info': overhead_info
+    }
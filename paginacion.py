@@ -0,0 +1,68 @@
+"""
+Paginación por clave (keyset) de listados ordenados por fecha
+
+Los listados de registros se ordenan por (fecha DESC, id DESC). En lugar de
+OFFSET, que obliga a la base de datos a recorrer y descartar todas las filas
+anteriores, cada página continúa después de la última fila de la anterior:
+
+    WHERE fecha < :fecha OR (fecha = :fecha AND id < :id)
+    ORDER BY fecha DESC, id DESC
+    LIMIT :por_pagina + 1
+
+El cursor de la página siguiente es "fecha.id" de esa última fila (ej:
+"2025-03-14.8812"). El costo de cada página es el mismo sin importar cuántas
+filas haya antes, y las filas insertadas mientras se recorre no desplazan las páginas.
+"""
+
+from datetime import date
+
+from sqlalchemy import and_, or_
+
+
+def codificar_cursor(fecha, id_fila):
+    """Cursor "fecha.id" de una fila"""
+    return f'{fecha.isoformat()}.{id_fila}'
+
+
+def decodificar_cursor(cursor):
+    """
+    (fecha, id) de un cursor "fecha.id".
+
+    Raises:
+        ValueError: Si el cursor no tiene ese formato
+    """
+    fecha, _, id_fila = cursor.partition('.')
+    return date.fromisoformat(fecha), int(id_fila)
+
+
+def pagina_por_fecha(query, columna_fecha, columna_id, cursor=None, por_pagina=100):
+    """
+    Una página de query ordenada por (fecha DESC, id DESC).
+
+    Args:
+        query: Query ORM ya filtrada (sin order_by)
+        columna_fecha, columna_id: Columnas de orden (ej: RegistroHora.fecha, RegistroHora.id)
+        cursor: Cursor de la página anterior (None = primera página)
+        por_pagina: Filas por página
+
+    Returns:
+        tuple: (filas, cursor de la página siguiente o None si es la última)
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    if cursor:
+        fecha, id_fila = decodificar_cursor(cursor)
+        query = query.filter(or_(
+            columna_fecha < fecha,
+            and_(columna_fecha == fecha, columna_id < id_fila)
+        ))
+
+    filas = query.order_by(columna_fecha.desc(), columna_id.desc()).limit(por_pagina + 1).all()
+
+    siguiente = None
+    if len(filas) > por_pagina:
+        filas = filas[:por_pagina]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(getattr(ultima, columna_fecha.key), getattr(ultima, columna_id.key))
+    return filas, siguiente
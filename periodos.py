@@ -0,0 +1,61 @@
+"""
+Períodos de fechas para filtrar por rango
+
+En lugar de filtrar con extract('year'/'month', fecha), que impide usar
+índices sobre la columna fecha (PostgreSQL y SQLite), los períodos se
+expresan como rangos semiabiertos [inicio, fin):
+
+    fecha >= inicio AND fecha < fin
+
+Así las consultas por mes o año usan los índices compuestos
+(persona_id, fecha), (cliente_id, fecha), (servicio_id, fecha) y (area_id, fecha)
+como range scans (ver crear_indices_registros_horas.py).
+"""
+
+from datetime import date
+
+from sqlalchemy import and_
+
+
+def sumar_meses(año, mes, meses):
+    """Retorna (año, mes) desplazado en `meses` meses (puede ser negativo)"""
+    indice = año * 12 + (mes - 1) + meses
+    return indice // 12, indice % 12 + 1
+
+
+def rango_periodo(año, mes=None):
+    """
+    Rango semiabierto [inicio, fin) de un año o de un mes.
+
+    Ejemplos:
+        rango_periodo(2025)     → (2025-01-01, 2026-01-01)
+        rango_periodo(2025, 12) → (2025-12-01, 2026-01-01)
+    """
+    if not mes:
+        return date(año, 1, 1), date(año + 1, 1, 1)
+
+    año_fin, mes_fin = sumar_meses(año, mes, 1)
+    return date(año, mes, 1), date(año_fin, mes_fin, 1)
+
+
+def rango_ultimos_meses(meses, hoy=None):
+    """
+    Rango semiabierto de los últimos `meses` meses calendario, incluyendo el mes actual.
+
+    Ejemplo (hoy = 2025-10-15):
+        rango_ultimos_meses(3) → (2025-08-01, 2025-11-01)
+    """
+    hoy = hoy or date.today()
+    año_inicio, mes_inicio = sumar_meses(hoy.year, hoy.month, -(max(meses, 1) - 1))
+    año_fin, mes_fin = sumar_meses(hoy.year, hoy.month, 1)
+    return date(año_inicio, mes_inicio, 1), date(año_fin, mes_fin, 1)
+
+
+def filtro_rango(columna, inicio, fin):
+    """Predicado SQL columna >= inicio AND columna < fin"""
+    return and_(columna >= inicio, columna < fin)
+
+
+def filtro_periodo(columna, año, mes=None):
+    """Predicado SQL del año (o mes) sobre una columna de fecha"""
+    return filtro_rango(columna, *rango_periodo(año, mes))
@@ -0,0 +1,158 @@
+"""
+Proyección de ingresos por servicio: matriz servicios × meses en UF
+
+Antes cada servicio se proyectaba por separado: proyeccion_anual_servicio_ajustada()
+consultaba su HistoricoServicio y ver_clientes buscaba el IngresoMensual del mes
+de cada servicio (y la suma del año de cada servicio SPOT). Ahora, para todos
+los servicios de un año, se hacen dos consultas:
+
+    - cambios de valor (historico_servicios) desde el 1 de enero del año
+    - ingresos reales (ingresos_mensuales) del año, sumados por servicio y mes
+
+y se arma en una pasada la matriz {servicio_id: [UF enero, ..., UF diciembre]}:
+
+    - mes con ingreso registrado: el ingreso real
+    - mes sin ingreso, servicio permanente: el valor vigente del servicio en ese
+      mes (un cambio rige desde el mes de su fecha_cambio, ej: 100 UF de enero
+      a septiembre y 200 UF desde octubre = 900 + 600 = 1.500 UF)
+    - mes sin ingreso, servicio SPOT: 0 (un SPOT solo factura lo registrado)
+
+De la matriz salen la proyección anual, el ingreso del mes en curso y los
+totales SPOT de todos los clientes a la vez (ver ingresos_por_cliente).
+"""
+
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
+
+from app import db, Cliente, HistoricoServicio, IngresoMensual, ServicioCliente
+
+MESES = 12
+
+
+# ============= MATRIZ =============
+
+def _valores_vigentes(valor_actual, cambios, año):
+    """
+    Valor vigente del servicio en cada mes del año.
+
+    Args:
+        valor_actual: valor_mensual_uf del servicio (vigente después del último cambio)
+        cambios: (fecha_cambio, valor_anterior_uf, valor_nuevo_uf) desde el 1 de
+                 enero del año, ordenados por fecha
+    """
+    valores = []
+    siguiente = 0
+    for mes in range(1, MESES + 1):
+        # Un cambio de este mes o anterior ya rige; el primero posterior trae el valor vigente
+        while siguiente < len(cambios) and (cambios[siguiente][0].year, cambios[siguiente][0].month) <= (año, mes):
+            siguiente += 1
+        valores.append(cambios[siguiente][1] if siguiente < len(cambios) else valor_actual)
+    return valores
+
+
+def matriz_ingresos(año, servicios):
+    """
+    UF por mes del año de cada servicio: ingreso real o proyectado (2 queries).
+
+    Args:
+        año: Año de la matriz
+        servicios: ServicioCliente a incluir
+
+    Returns:
+        dict: {servicio_id: [12 valores UF]}
+    """
+    servicios = list(servicios)
+    ids = [servicio.id for servicio in servicios]
+    if not ids:
+        return {}
+
+    cambios = defaultdict(list)
+    for servicio_id, fecha, anterior, nuevo in db.session.query(
+        HistoricoServicio.servicio_cliente_id,
+        HistoricoServicio.fecha_cambio,
+        HistoricoServicio.valor_anterior_uf,
+        HistoricoServicio.valor_nuevo_uf
+    ).filter(
+        HistoricoServicio.servicio_cliente_id.in_(ids),
+        HistoricoServicio.fecha_cambio >= date(año, 1, 1)
+    ).order_by(HistoricoServicio.fecha_cambio, HistoricoServicio.id):
+        cambios[servicio_id].append((fecha, anterior, nuevo))
+
+    reales = defaultdict(dict)
+    for servicio_id, mes, ingreso in db.session.query(
+        IngresoMensual.servicio_id,
+        IngresoMensual.mes,
+        func.sum(IngresoMensual.ingreso_uf)
+    ).filter(
+        IngresoMensual.servicio_id.in_(ids),
+        IngresoMensual.año == año
+    ).group_by(IngresoMensual.servicio_id, IngresoMensual.mes):
+        reales[servicio_id][mes] = ingreso or 0
+
+    matriz = {}
+    for servicio in servicios:
+        if servicio.es_spot:
+            proyectados = [0] * MESES
+        else:
+            proyectados = _valores_vigentes(servicio.valor_mensual_uf or 0, cambios[servicio.id], año)
+        registrados = reales[servicio.id]
+        matriz[servicio.id] = [registrados.get(mes, proyectados[mes - 1]) for mes in range(1, MESES + 1)]
+    return matriz
+
+
+# ============= CONSULTAS =============
+
+def proyeccion_anual_servicio(servicio, año):
+    """Proyección anual de un servicio en UF (ingresos reales y valores vigentes por mes)"""
+    return sum(matriz_ingresos(año, [servicio])[servicio.id])
+
+
+def ingresos_por_cliente(año, mes):
+    """
+    Ingresos de los servicios activos de todos los clientes activos (3 queries).
+
+    Args:
+        año: Año de la proyección
+        mes: Mes en curso (1-12)
+
+    Returns:
+        list: Un dict por cliente en orden de nombre, con:
+            cliente, servicios_permanentes, servicios_spot,
+            ingreso_mensual (permanentes, mes en curso), proyeccion_anual
+            (permanentes, año completo) e ingreso_anual_spot
+    """
+    servicios = (
+        ServicioCliente.query
+        .join(ServicioCliente.cliente)
+        .filter(Cliente.activo == True, ServicioCliente.activo == True)
+        .options(contains_eager(ServicioCliente.cliente))
+        .order_by(Cliente.nombre, Cliente.id, ServicioCliente.id)
+        .all()
+    )
+    matriz = matriz_ingresos(año, servicios)
+
+    clientes = {}
+    for servicio in servicios:
+        datos = clientes.get(servicio.cliente_id)
+        if datos is None:
+            datos = clientes[servicio.cliente_id] = {
+                'cliente': servicio.cliente,
+                'servicios_permanentes': [],
+                'servicios_spot': [],
+                'ingreso_mensual': 0,
+                'proyeccion_anual': 0,
+                'ingreso_anual_spot': 0,
+            }
+        meses = matriz[servicio.id]
+        if servicio.es_spot:
+            datos['servicios_spot'].append(servicio)
+            datos['ingreso_anual_spot'] += sum(meses)
+        else:
+            datos['servicios_permanentes'].append(servicio)
+            datos['ingreso_mensual'] += meses[mes - 1]
+            datos['proyeccion_anual'] += sum(meses)
+
+    return list(clientes.values())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Reconstruye la tabla resumen_horas_mensual desde registros_horas
+
+Uso:
+    python reconstruir_resumen_horas.py            # Todos los años
+    python reconstruir_resumen_horas.py 2025       # Solo 2025
+    python reconstruir_resumen_horas.py 2025 10    # Solo octubre 2025
+
+Ejecutar después de importaciones con SQL directo o cargas masivas
+(bulk_save_objects, query.delete()) que no pasan por el flush del ORM.
+"""
+
+import sys
+import time
+
+from app import app, db
+from resumen_horas import reconstruir_resumen
+
+
+def main():
+    año = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    mes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    periodo = 'todos los años' if not año else (f'{año}-{mes:02d}' if mes else str(año))
+
+    print("=" * 80)
+    print(f"RECONSTRUIR RESUMEN MENSUAL DE HORAS ({periodo})")
+    print("=" * 80)
+
+    with app.app_context():
+        # Crea la tabla resumen_horas_mensual si aún no existe
+        db.create_all()
+
+        inicio = time.time()
+        filas = reconstruir_resumen(año, mes)
+
+        print(f"✅ {filas:,} filas escritas en resumen_horas_mensual ({time.time() - inicio:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
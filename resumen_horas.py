@@ -0,0 +1,298 @@
+"""
+Resumen mensual de horas (tabla resumen_horas_mensual)
+
+Mantiene un agregado de registros_horas por
+persona × cliente × servicio × área × año × mes con horas y costo en UF,
+para que los reportes analíticos consulten meses × dimensiones en lugar de
+recorrer cada registro de horas.
+
+Mantenimiento:
+    - Incremental: aplicar_cambios_sesion() se ejecuta en cada flush (before_flush)
+      y aplica las altas, modificaciones y bajas de RegistroHora hechas con el ORM
+      (rutas registrar/editar/eliminar horas y scripts de importación con db.session).
+    - Completo: reconstruir_resumen() recalcula el período desde registros_horas.
+      Usar después de cargas masivas con SQL directo, bulk_save_objects o
+      query.delete() (ver reconstruir_resumen_horas.py).
+
+El costo de cada registro es horas × RegistroHora.costo_hora_uf, el costo hora
+vigente a la fecha del registro (tarifa de la persona y valor UF, ver costos.py);
+cambiar el sueldo de una persona no modifica el costo de sus horas ya registradas.
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import func, extract, inspect, insert, delete, update, or_, and_
+
+from app import db, RegistroHora, ResumenHorasMensual
+from costos import resolver_costos_hora, asignar_costos_hora
+from periodos import filtro_periodo
+from versiones import insert_dialecto
+
+COLUMNAS_CLAVE = ('persona_id', 'cliente_id', 'servicio_id', 'area_id')
+
+
+# ============= CONSULTAS =============
+
+def filtrar_periodo(query, año, mes=None):
+    """Aplica el filtro de año/mes sobre el resumen mensual"""
+    query = query.filter(ResumenHorasMensual.año == año)
+    if mes:
+        query = query.filter(ResumenHorasMensual.mes == mes)
+    return query
+
+
+def filtrar_rango(query, inicio, fin):
+    """
+    Filtra el resumen por un rango semiabierto de fechas [inicio, fin)
+    alineado a meses (ver periodos.rango_ultimos_meses)
+    """
+    return query.filter(
+        or_(
+            ResumenHorasMensual.año > inicio.year,
+            and_(ResumenHorasMensual.año == inicio.year, ResumenHorasMensual.mes >= inicio.month)
+        ),
+        or_(
+            ResumenHorasMensual.año < fin.year,
+            and_(ResumenHorasMensual.año == fin.year, ResumenHorasMensual.mes < fin.month)
+        )
+    )
+
+
+def horas_agrupadas(*columnas):
+    """
+    Query base de horas y costo UF agrupados por las columnas indicadas.
+
+    Ejemplo:
+        filtrar_periodo(horas_agrupadas(ResumenHorasMensual.cliente_id), 2025).all()
+        → [(cliente_id, horas, costo_uf), ...]
+    """
+    return db.session.query(
+        *columnas,
+        func.sum(ResumenHorasMensual.horas),
+        func.sum(ResumenHorasMensual.costo_uf)
+    ).group_by(*columnas)
+
+
+# ============= MANTENIMIENTO INCREMENTAL =============
+
+def _valor_anterior(registro, atributo):
+    """Valor de un atributo antes de los cambios pendientes del flush"""
+    historial = inspect(registro).attrs[atributo].history
+    if historial.deleted:
+        return historial.deleted[0]
+    return getattr(registro, atributo)
+
+
+def _clave(registro, anterior=False):
+    """Clave del resumen (persona, cliente, servicio, área, año, mes) de un registro"""
+    valor = (lambda a: _valor_anterior(registro, a)) if anterior else (lambda a: getattr(registro, a))
+    fecha = valor('fecha')
+    return tuple(valor(c) for c in COLUMNAS_CLAVE) + (fecha.year, fecha.month)
+
+
+def _horas_y_costo(registro, anterior=False):
+    """(horas, costo_uf) de un registro según su costo hora fijado"""
+    valor = (lambda a: _valor_anterior(registro, a)) if anterior else (lambda a: getattr(registro, a))
+    horas = valor('horas') or 0
+    return horas, horas * (valor('costo_hora_uf') or 0)
+
+
+def _fijar_costo_hora(session, registros):
+    """
+    Fija costo_hora_uf en registros nuevos o que cambiaron de persona o fecha,
+    con la tarifa y el valor UF vigentes a la fecha (ver costos.py)
+    """
+    pendientes = [r for r in registros if r.costo_hora_uf is None]
+    if not pendientes:
+        return
+
+    costos = resolver_costos_hora(((r.persona_id, r.fecha) for r in pendientes), session)
+    for registro in pendientes:
+        costo = costos.get((registro.persona_id, registro.fecha))
+        if costo is None:
+            # Persona aún sin id (creada en el mismo flush)
+            costo = registro.persona.costo_hora_uf if registro.persona else 0
+        registro.costo_hora_uf = costo
+
+
+def _filtro_clave(clave):
+    """Condición SQL de la fila del resumen con esa clave (cliente_id puede ser NULL)"""
+    persona_id, cliente_id, servicio_id, area_id, año, mes = clave
+    return and_(
+        ResumenHorasMensual.persona_id == persona_id,
+        ResumenHorasMensual.cliente_id.is_(None) if cliente_id is None
+        else ResumenHorasMensual.cliente_id == cliente_id,
+        ResumenHorasMensual.servicio_id == servicio_id,
+        ResumenHorasMensual.area_id == area_id,
+        ResumenHorasMensual.año == año,
+        ResumenHorasMensual.mes == mes,
+    )
+
+
+def _aplicar_deltas(session, deltas):
+    """
+    Suma los deltas al resumen con incrementos del lado de la base de datos.
+
+    UPDATE ... SET horas = horas + delta no pierde incrementos de otros workers
+    que escriben la misma clave a la vez (sumar en Python sobre valores leídos
+    antes sí). Si la fila no existe se inserta con un upsert (ON CONFLICT DO
+    UPDATE) por si otro worker la creó entretanto; con cliente_id NULL la
+    restricción única no detecta el conflicto y pueden quedar dos filas, cuya
+    suma sigue siendo correcta. Al final se borran en SQL las filas que quedaron
+    sin horas.
+    """
+    tabla = ResumenHorasMensual.__table__
+    insert_upsert = insert_dialecto(session.connection())
+
+    for clave, (horas, costo) in deltas.items():
+        actualizadas = session.execute(
+            update(ResumenHorasMensual)
+            .where(_filtro_clave(clave))
+            .values(horas=ResumenHorasMensual.horas + horas,
+                    costo_uf=ResumenHorasMensual.costo_uf + costo)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if actualizadas or horas <= 0:
+            continue
+
+        sentencia = insert_upsert(ResumenHorasMensual).values(
+            dict(zip(COLUMNAS_CLAVE + ('año', 'mes'), clave), horas=horas, costo_uf=costo)
+        )
+        session.execute(sentencia.on_conflict_do_update(
+            index_elements=list(COLUMNAS_CLAVE) + ['año', 'mes'],
+            set_={'horas': tabla.c.horas + sentencia.excluded.horas,
+                  'costo_uf': tabla.c.costo_uf + sentencia.excluded.costo_uf}
+        ))
+
+    if any(horas < 0 for horas, _ in deltas.values()):
+        session.execute(
+            delete(ResumenHorasMensual)
+            .where(ResumenHorasMensual.horas <= 1e-9)
+            .where(or_(*(_filtro_clave(clave) for clave, (horas, _) in deltas.items() if horas < 0)))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def aplicar_cambios_sesion(session):
+    """
+    Aplica al resumen mensual los cambios pendientes de RegistroHora en la sesión.
+
+    Se llama desde el evento before_flush, por lo que los cambios del resumen
+    quedan en la misma transacción que los registros de horas. También fija el
+    costo hora de los registros nuevos (o que cambiaron de persona o fecha).
+
+    Returns:
+        dict: {(persona, cliente, servicio, área, año, mes): [horas, costo_uf]} aplicados
+    """
+    nuevos = [obj for obj in session.new if isinstance(obj, RegistroHora)]
+    eliminados = [obj for obj in session.deleted if isinstance(obj, RegistroHora)]
+    modificados = [
+        obj for obj in session.dirty
+        if isinstance(obj, RegistroHora) and session.is_modified(obj)
+    ]
+    if not (nuevos or eliminados or modificados):
+        return {}
+
+    deltas = defaultdict(lambda: [0.0, 0.0])
+
+    def acumular(clave, horas, costo, signo):
+        deltas[clave][0] += signo * horas
+        deltas[clave][1] += signo * costo
+
+    with session.no_autoflush:
+        for registro in modificados:
+            atributos = inspect(registro).attrs
+            cambio_vigencia = atributos.persona_id.history.has_changes() or atributos.fecha.history.has_changes()
+            if cambio_vigencia and not atributos.costo_hora_uf.history.has_changes():
+                registro.costo_hora_uf = None
+        _fijar_costo_hora(session, nuevos + modificados)
+
+        for registro in nuevos:
+            acumular(_clave(registro), *_horas_y_costo(registro), 1)
+
+        for registro in eliminados:
+            acumular(_clave(registro, anterior=True), *_horas_y_costo(registro, anterior=True), -1)
+
+        for registro in modificados:
+            acumular(_clave(registro, anterior=True), *_horas_y_costo(registro, anterior=True), -1)
+            acumular(_clave(registro), *_horas_y_costo(registro), 1)
+
+        deltas = {clave: delta for clave, delta in deltas.items() if delta[0] or delta[1]}
+        if not deltas:
+            return {}
+
+        _aplicar_deltas(session, deltas)
+
+    return deltas
+
+
+def completar_costo_hora_registros():
+    """
+    Fija costo_hora_uf en los registros que no lo tienen (históricos o cargados
+    con SQL directo / bulk_save_objects), con la tarifa y UF vigentes a su fecha.
+
+    Returns:
+        int: Número de registros actualizados
+    """
+    return asignar_costos_hora(solo_pendientes=True)
+
+
+# ============= RECONSTRUCCIÓN =============
+
+def reconstruir_resumen(año=None, mes=None):
+    """
+    Recalcula el resumen mensual desde registros_horas (y las estadísticas
+    del dashboard del año, ver estadisticas_dashboard.py).
+
+    Args:
+        año: Año a reconstruir (None = todos)
+        mes: Mes específico (requiere año)
+
+    Returns:
+        int: Número de filas escritas en el resumen
+    """
+    completar_costo_hora_registros()
+
+    anio_col = extract('year', RegistroHora.fecha)
+    mes_col = extract('month', RegistroHora.fecha)
+
+    query = db.session.query(
+        RegistroHora.persona_id,
+        RegistroHora.cliente_id,
+        RegistroHora.servicio_id,
+        RegistroHora.area_id,
+        anio_col,
+        mes_col,
+        func.sum(RegistroHora.horas),
+        func.sum(RegistroHora.costo_uf)
+    )
+    borrar = ResumenHorasMensual.query
+    if año:
+        query = query.filter(filtro_periodo(RegistroHora.fecha, año, mes))
+        borrar = filtrar_periodo(borrar, año, mes)
+
+    grupos = query.group_by(
+        RegistroHora.persona_id, RegistroHora.cliente_id, RegistroHora.servicio_id,
+        RegistroHora.area_id, anio_col, mes_col
+    ).all()
+
+    filas = [{
+        'persona_id': persona_id,
+        'cliente_id': cliente_id,
+        'servicio_id': servicio_id,
+        'area_id': area_id,
+        'año': int(anio_val),
+        'mes': int(mes_val),
+        'horas': horas or 0,
+        'costo_uf': costo or 0
+    } for persona_id, cliente_id, servicio_id, area_id, anio_val, mes_val, horas, costo in grupos]
+
+    borrar.delete(synchronize_session=False)
+    if filas:
+        db.session.execute(insert(ResumenHorasMensual), filas)
+    db.session.commit()
+
+    from estadisticas_dashboard import reconstruir_estadisticas
+    reconstruir_estadisticas(año)
+
+    return len(filas)
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Snapshot de la base de datos: copiar todos los datos entre ambientes
+
+Reemplaza a exportar_datos_json.py / importar_desde_json.py (un solo JSON con
+todo en memoria, un get por fila) y a fix_sequences.py / arreglar_secuencias.py.
+
+Formato del snapshot (un directorio):
+    manifiesto.json        tablas en orden de dependencias, columnas, filas,
+                           bloques y SHA-256 de cada tabla
+    <tabla>.jsonl.gz       un bloque de hasta FILAS_POR_BLOQUE filas por línea,
+                           guardado por columnas ({"columnas": [[...], [...]]}),
+                           comprimido con gzip
+
+Exportar lee cada tabla en orden de clave primaria con un cursor del lado del
+servidor (PostgreSQL) y escribe bloque a bloque; importar lee una línea a la vez
+y carga con COPY en PostgreSQL o executemany en SQLite, todo en una
+transacción. La memoria queda acotada por el tamaño del bloque.
+
+Después de importar se sincronizan las secuencias de PostgreSQL con MAX(id) y
+se verifican conteos y checksums contra el manifiesto. Todas las tablas de los
+modelos se copian tal cual, incluidas las derivadas (resumen de horas,
+estadísticas del dashboard, jerarquía), así que no hay que reconstruirlas.
+
+Funciona en PostgreSQL (producción) y SQLite (local) usando DATABASE_URL de app.py.
+
+Uso:
+    python snapshot.py exportar [directorio]                  # Por defecto snapshot_AAAAMMDD_HHMM
+    python snapshot.py importar directorio                    # Simulación
+    python snapshot.py importar directorio --ejecutar         # Solo en tablas vacías
+    python snapshot.py importar directorio --ejecutar --reemplazar   # Vacía las tablas antes
+    python snapshot.py verificar directorio                   # Conteos y checksums base vs snapshot
+    python snapshot.py secuencias [--ejecutar]                # Solo sincroniza secuencias (PostgreSQL)
+
+Ejemplo (clonar producción en local):
+    DATABASE_URL=postgresql://... python snapshot.py exportar respaldo
+    python snapshot.py importar respaldo --ejecutar --reemplazar
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, func, inspect, select, text
+
+from app import app, db, VersionTabla
+
+FORMATO = 1
+FILAS_POR_BLOQUE = 5000
+MANIFIESTO = 'manifiesto.json'
+
+
+# ============= CODIFICACIÓN =============
+
+def _codificador(columna):
+    """Valor de la base → valor JSON (normalizado por tipo para que el checksum no dependa del motor)"""
+    tipo = columna.type
+    if isinstance(tipo, Boolean):
+        return lambda valor: None if valor is None else bool(valor)
+    if isinstance(tipo, Integer):
+        return lambda valor: None if valor is None else int(valor)
+    if isinstance(tipo, Float):
+        return lambda valor: None if valor is None else float(valor)
+    if isinstance(tipo, (Date, DateTime)):
+        return lambda valor: None if valor is None else valor.isoformat()
+    return lambda valor: valor
+
+
+def _decodificador(columna):
+    """Valor JSON → valor para insertar con SQLAlchemy"""
+    if isinstance(columna.type, DateTime):
+        return lambda valor: None if valor is None else datetime.fromisoformat(valor)
+    if isinstance(columna.type, Date):
+        return lambda valor: None if valor is None else date.fromisoformat(valor)
+    return lambda valor: valor
+
+
+def _linea_checksum(fila):
+    return (json.dumps(fila, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def _leer_tabla(conexion, tabla, columnas):
+    """Bloques de filas codificadas de la tabla, en orden de clave primaria"""
+    codificadores = [_codificador(columna) for columna in columnas]
+    orden = list(tabla.primary_key.columns) or columnas
+    resultado = conexion.execution_options(stream_results=True).execute(
+        select(*columnas).order_by(*orden)
+    )
+    for bloque in resultado.partitions(FILAS_POR_BLOQUE):
+        yield [[codificar(valor) for codificar, valor in zip(codificadores, fila)] for fila in bloque]
+
+
+def _columnas_existentes(conexion, tabla):
+    """Columnas del modelo que existen en la base (una base sin migrar puede no tenerlas todas)"""
+    reales = {columna['name'] for columna in inspect(conexion).get_columns(tabla.name)}
+    return [columna for columna in tabla.columns if columna.name in reales]
+
+
+def _tablas_existentes(conexion):
+    """Tablas de los modelos presentes en la base, en orden de dependencias (FK)"""
+    existentes = set(inspect(conexion).get_table_names())
+    return [tabla for tabla in db.metadata.sorted_tables if tabla.name in existentes]
+
+
+# ============= EXPORTAR =============
+
+def exportar(directorio):
+    os.makedirs(directorio, exist_ok=True)
+    manifiesto = {
+        'formato': FORMATO,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'motor': db.engine.dialect.name,
+        'tablas': [],
+    }
+
+    with db.engine.connect() as conexion:
+        for tabla in _tablas_existentes(conexion):
+            inicio = time.time()
+            columnas = _columnas_existentes(conexion, tabla)
+            suma = hashlib.sha256()
+            filas = bloques = 0
+
+            with gzip.open(os.path.join(directorio, f'{tabla.name}.jsonl.gz'), 'wt', encoding='utf-8') as archivo:
+                for bloque in _leer_tabla(conexion, tabla, columnas):
+                    for fila in bloque:
+                        suma.update(_linea_checksum(fila))
+                    archivo.write(json.dumps({'columnas': [list(valores) for valores in zip(*bloque)]},
+                                             ensure_ascii=False, separators=(',', ':')))
+                    archivo.write('\n')
+                    filas += len(bloque)
+                    bloques += 1
+
+            manifiesto['tablas'].append({
+                'nombre': tabla.name,
+                'columnas': [columna.name for columna in columnas],
+                'filas': filas,
+                'bloques': bloques,
+                'sha256': suma.hexdigest(),
+            })
+            print(f"  ✓ {tabla.name:35} {filas:>10,} filas ({time.time() - inicio:.1f}s)")
+
+    with open(os.path.join(directorio, MANIFIESTO), 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=2)
+
+    tamaño = sum(os.path.getsize(os.path.join(directorio, nombre)) for nombre in os.listdir(directorio))
+    print()
+    print(f"✅ Snapshot en {directorio}/ ({tamaño / 1024 / 1024:.1f} MB)")
+
+
+# ============= IMPORTAR =============
+
+def leer_manifiesto(directorio):
+    with open(os.path.join(directorio, MANIFIESTO), encoding='utf-8') as archivo:
+        manifiesto = json.load(archivo)
+    if manifiesto.get('formato') != FORMATO:
+        raise ValueError(f"Formato de snapshot {manifiesto.get('formato')} no soportado (se espera {FORMATO})")
+    return manifiesto
+
+
+def _bloques_archivo(directorio, nombre):
+    """Bloques del archivo de una tabla como listas de columnas"""
+    with gzip.open(os.path.join(directorio, f'{nombre}.jsonl.gz'), 'rt', encoding='utf-8') as archivo:
+        for linea in archivo:
+            yield json.loads(linea)['columnas']
+
+
+def _valor_copy(valor):
+    """Valor JSON en formato CSV de COPY: NULL sin comillas (\\N), el resto entre comillas"""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 'true' if valor else 'false'
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+class _LectorCopy:
+    """Archivo de solo lectura para COPY FROM STDIN, generado bloque a bloque"""
+
+    def __init__(self, bloques):
+        self.bloques = bloques
+        self.actual = io.StringIO()
+
+    def read(self, tamaño=-1):
+        partes = []
+        while tamaño != 0:
+            datos = self.actual.read(tamaño)
+            if datos:
+                partes.append(datos)
+                if tamaño > 0:
+                    tamaño -= len(datos)
+                continue
+            try:
+                self.actual = io.StringIO(next(self.bloques))
+            except StopIteration:
+                break
+        return ''.join(partes)
+
+
+def _cargar_copy(conexion, tabla, columnas, bloques):
+    """PostgreSQL: un solo COPY por tabla (las FK a la misma tabla se validan al final)"""
+    preparador = conexion.dialect.identifier_preparer
+    sql = (f"COPY {preparador.format_table(tabla)} ({', '.join(preparador.quote(c) for c in columnas)}) "
+           f"FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+
+    def csv_bloques():
+        for valores in bloques:
+            yield ''.join(','.join(_valor_copy(valor) for valor in fila) + '\n' for fila in zip(*valores))
+
+    cursor = conexion.connection.cursor()
+    cursor.copy_expert(sql, _LectorCopy(csv_bloques()))
+    cursor.close()
+
+
+def _cargar_executemany(conexion, tabla, columnas, bloques):
+    """Otros motores: INSERT por bloques (executemany)"""
+    decodificadores = [_decodificador(tabla.c[nombre]) for nombre in columnas]
+    for valores in bloques:
+        columnas_decodificadas = [
+            [decodificar(valor) for valor in lista] for decodificar, lista in zip(decodificadores, valores)
+        ]
+        conexion.execute(tabla.insert(), [dict(zip(columnas, fila)) for fila in zip(*columnas_decodificadas)])
+
+
+def _vaciar(conexion, tablas):
+    if conexion.dialect.name == 'postgresql':
+        preparador = conexion.dialect.identifier_preparer
+        conexion.execute(text(f"TRUNCATE {', '.join(preparador.format_table(t) for t in tablas)}"))
+    else:
+        for tabla in reversed(tablas):
+            conexion.execute(tabla.delete())
+
+
+def sincronizar_secuencias(conexion, tablas):
+    """
+    PostgreSQL: deja la secuencia de cada id autoincremental en MAX(id), para
+    que los INSERT siguientes no choquen con ids copiados o importados.
+
+    Returns:
+        list: (tabla, valor) de cada secuencia sincronizada
+    """
+    if conexion.dialect.name != 'postgresql':
+        return []
+
+    sincronizadas = []
+    for tabla in tablas:
+        clave = list(tabla.primary_key.columns)
+        if len(clave) != 1 or not isinstance(clave[0].type, Integer) or clave[0].autoincrement is False:
+            continue
+        secuencia = conexion.execute(
+            text("SELECT pg_get_serial_sequence(:tabla, :columna)"),
+            {'tabla': tabla.name, 'columna': clave[0].name}
+        ).scalar()
+        if not secuencia:
+            continue
+        columna = conexion.dialect.identifier_preparer.quote(clave[0].name)
+        valor = conexion.execute(
+            text(f"SELECT setval(:secuencia, COALESCE(MAX({columna}), 1), MAX({columna}) IS NOT NULL) "
+                 f"FROM {conexion.dialect.identifier_preparer.format_table(tabla)}"),
+            {'secuencia': secuencia}
+        ).scalar()
+        sincronizadas.append((tabla.name, valor))
+    return sincronizadas
+
+
+def importar(directorio, ejecutar, reemplazar):
+    manifiesto = leer_manifiesto(directorio)
+    print(f"Snapshot: {directorio}/ ({manifiesto['motor']}, {manifiesto['creado']})")
+    print(f"Destino:  {db.engine.url.render_as_string(hide_password=True)}")
+    print()
+
+    if ejecutar:
+        db.create_all()  # Tablas que falten en el destino
+
+    entradas = []
+    with db.engine.connect() as conexion:
+        existentes = {tabla.name for tabla in _tablas_existentes(conexion)}
+        for entrada in manifiesto['tablas']:
+            tabla = db.metadata.tables.get(entrada['nombre'])
+            if tabla is None:
+                print(f"  ⚠️  {entrada['nombre']:35} no existe en los modelos, se omite")
+                continue
+            desconocidas = set(entrada['columnas']) - set(tabla.columns.keys())
+            if desconocidas:
+                print(f"  ⚠️  {entrada['nombre']:35} columnas sin modelo: {', '.join(sorted(desconocidas))}")
+                continue
+            actuales = conexion.execute(select(func.count()).select_from(tabla)).scalar() \
+                if tabla.name in existentes else 0
+            entradas.append((tabla, entrada, actuales))
+            print(f"  {tabla.name:35} {entrada['filas']:>10,} filas en snapshot, {actuales:>10,} en destino")
+
+    con_datos = [tabla.name for tabla, _, actuales in entradas if actuales]
+    print()
+
+    if not ejecutar:
+        print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+        if con_datos and not reemplazar:
+            print(f"   Hay tablas con datos en el destino ({len(con_datos)}): se necesitará --reemplazar")
+        print()
+        print("Para aplicar estos cambios, ejecuta:")
+        print(f"  python snapshot.py importar {directorio} --ejecutar{' --reemplazar' if con_datos else ''}")
+        return True
+
+    if con_datos and not reemplazar:
+        print(f"❌ Tablas con datos en el destino: {', '.join(con_datos)}")
+        print("   Usa --reemplazar para vaciarlas antes de importar")
+        return False
+
+    inicio_total = time.time()
+    with db.engine.begin() as conexion:
+        tablas = [tabla for tabla, _, _ in entradas]
+        if con_datos:
+            _vaciar(conexion, tablas)
+            print(f"✓ {len(con_datos)} tablas vaciadas")
+
+        cargar = _cargar_copy if conexion.dialect.name == 'postgresql' else _cargar_executemany
+        for tabla, entrada, _ in entradas:
+            inicio = time.time()
+            cargar(conexion, tabla, entrada['columnas'], _bloques_archivo(directorio, tabla.name))
+            print(f"  ✓ {tabla.name:35} {entrada['filas']:>10,} filas ({time.time() - inicio:.1f}s)")
+
+        for nombre, valor in sincronizar_secuencias(conexion, tablas):
+            print(f"  ✓ secuencia de {nombre} → {valor}")
+
+        # Versiones nuevas para que ningún caché de reportes del destino se reutilice
+        from versiones import incrementar_versiones
+        incrementar_versiones(conexion, [tabla.name for tabla in tablas])
+
+    print(f"✓ Importación completa ({time.time() - inicio_total:.1f}s)")
+    print()
+    return verificar(directorio, manifiesto)
+
+
+# ============= VERIFICAR =============
+
+def verificar(directorio, manifiesto=None):
+    """Compara conteos y checksums de la base con el manifiesto; True si todo coincide"""
+    manifiesto = manifiesto or leer_manifiesto(directorio)
+    diferencias = 0
+
+    print("Verificación (conteo y SHA-256 por tabla):")
+    with db.engine.connect() as conexion:
+        existentes = {tabla.name for tabla in _tablas_existentes(conexion)}
+        for entrada in manifiesto['tablas']:
+            tabla = db.metadata.tables.get(entrada['nombre'])
+            if tabla is None or tabla.name not in existentes:
+                print(f"  ✗ {entrada['nombre']:35} no existe en la base")
+                diferencias += 1
+                continue
+            if entrada['nombre'] == VersionTabla.__tablename__:
+                # Se incrementa al importar (invalidación de cachés): solo se compara el conteo
+                filas = conexion.execute(select(func.count()).select_from(tabla)).scalar()
+                coincide = filas >= entrada['filas']
+            else:
+                suma = hashlib.sha256()
+                filas = 0
+                for bloque in _leer_tabla(conexion, tabla, [tabla.c[nombre] for nombre in entrada['columnas']]):
+                    for fila in bloque:
+                        suma.update(_linea_checksum(fila))
+                    filas += len(bloque)
+                coincide = filas == entrada['filas'] and suma.hexdigest() == entrada['sha256']
+
+            if coincide:
+                print(f"  ✓ {entrada['nombre']:35} {filas:>10,} filas")
+            else:
+                print(f"  ✗ {entrada['nombre']:35} {filas:>10,} filas (snapshot: {entrada['filas']:,}), checksum distinto")
+                diferencias += 1
+
+    print()
+    if diferencias:
+        print(f"❌ {diferencias} tablas no coinciden con el snapshot")
+        return False
+    print("✅ La base coincide con el snapshot")
+    return True
+
+
+# ============= SECUENCIAS =============
+
+def secuencias(ejecutar):
+    if db.engine.dialect.name != 'postgresql':
+        print("Solo aplica a PostgreSQL (SQLite asigna ids desde MAX(id))")
+        return
+
+    if not ejecutar:
+        with db.engine.connect() as conexion:
+            tablas = _tablas_existentes(conexion)
+        print("⚠️  MODO SIMULACIÓN - No se realizarán cambios")
+        print()
+        print(f"Se sincronizarán las secuencias de {len(tablas)} tablas con su MAX(id)")
+        print()
+        print("Para aplicar estos cambios, ejecuta:")
+        print("  python snapshot.py secuencias --ejecutar")
+        return
+
+    with db.engine.begin() as conexion:
+        for nombre, valor in sincronizar_secuencias(conexion, _tablas_existentes(conexion)):
+            print(f"  ✓ {nombre:35} → {valor}")
+    print()
+    print("✅ Secuencias sincronizadas")
+
+
+def main():
+    argumentos = [argumento for argumento in sys.argv[1:] if not argumento.startswith('--')]
+    comando = argumentos[0] if argumentos else None
+    directorio = argumentos[1] if len(argumentos) > 1 else None
+    ejecutar = '--ejecutar' in sys.argv
+
+    print("=" * 80)
+    print(f"SNAPSHOT DE LA BASE DE DATOS{f' - {comando.upper()}' if comando else ''}")
+    print("=" * 80)
+    print()
+
+    with app.app_context():
+        if comando == 'exportar':
+            exportar(directorio or f"snapshot_{datetime.now():%Y%m%d_%H%M}")
+        elif comando == 'importar' and directorio:
+            if not importar(directorio, ejecutar, '--reemplazar' in sys.argv):
+                sys.exit(1)
+        elif comando == 'verificar' and directorio:
+            if not verificar(directorio):
+                sys.exit(1)
+        elif comando == 'secuencias':
+            secuencias(ejecutar)
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
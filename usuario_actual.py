@@ -0,0 +1,139 @@
+"""
+Usuario actual por request y permisos guardados en la sesión
+
+Los decoradores de permisos y las vistas cargaban cada uno la persona de la
+sesión (Persona.query.get(session['user_id'])). Ahora:
+
+    - usuario_actual(): la persona logueada, cargada una sola vez por request (g)
+    - permisos_actuales(): permisos guardados en la cookie de sesión (firmada
+      por Flask con SECRET_KEY): es_admin, es_socia y las personas visibles.
+      Solo se recalculan desde la base de datos cuando cambia su versión.
+
+Versiones (en versiones_tablas, ver versiones.py), incrementadas en el mismo flush:
+    - permisos_persona_<id>: cambios de la persona (rol, activo, nombre, email, contraseña)
+    - permisos: cambios del organigrama o actualizaciones masivas de personas,
+      que pueden cambiar los permisos de cualquiera
+
+Comprobar los permisos cuesta una lectura por clave de versiones_tablas; una
+persona desactivada pierde la sesión en su siguiente request.
+"""
+
+from flask import g, session
+from sqlalchemy import inspect
+
+from app import db, Persona
+from jerarquia import personas_visibles
+from versiones import obtener_versiones
+
+CLAVE_PERMISOS = 'permisos'
+ATRIBUTOS_PERMISOS = ('nombre', 'email', 'password_hash', 'es_socia', 'es_admin', 'activo')
+
+
+def clave_persona(persona_id):
+    """Clave en versiones_tablas de los permisos de una persona"""
+    return f'permisos_persona_{persona_id}'
+
+
+def _versiones(persona_id):
+    """[versión global, versión de la persona] (1 query)"""
+    claves = [CLAVE_PERMISOS, clave_persona(persona_id)]
+    versiones = obtener_versiones(claves)
+    return [versiones[clave][0] for clave in claves]
+
+
+def _guardar_en_sesion(persona, versiones):
+    """Escribe en la sesión la identidad y los permisos vigentes de persona"""
+    session['user_id'] = persona.id
+    session['user_name'] = persona.nombre
+    session['es_socia'] = persona.es_socia
+    session['es_admin'] = persona.es_admin
+    session['permisos'] = {
+        'persona_id': persona.id,
+        'versiones': versiones,
+        'es_admin': bool(persona.es_admin),
+        'es_socia': bool(persona.es_socia),
+        # Admin ve a todos: no hace falta la lista
+        'visibles': None if persona.es_admin else sorted(personas_visibles(persona)),
+    }
+    return session['permisos']
+
+
+# ============= API =============
+
+def iniciar_sesion(persona):
+    """Inicia la sesión de persona (login) con sus permisos vigentes"""
+    session.clear()
+    g._usuario_actual = persona
+    g._permisos = _guardar_en_sesion(persona, _versiones(persona.id))
+
+
+def usuario_actual():
+    """Persona logueada (None sin sesión); se carga una vez por request"""
+    if '_usuario_actual' not in g:
+        persona_id = session.get('user_id')
+        g._usuario_actual = db.session.get(Persona, persona_id) if persona_id else None
+    return g._usuario_actual
+
+
+def permisos_actuales():
+    """
+    Permisos de la persona logueada, validados contra su versión.
+
+    Returns:
+        dict: persona_id, es_admin, es_socia y visibles (ids, None para admin);
+              None sin sesión o si la persona ya no está activa (se cierra la sesión)
+    """
+    if '_permisos' in g:
+        return g._permisos
+
+    persona_id = session.get('user_id')
+    permisos = None
+    if persona_id:
+        versiones = _versiones(persona_id)
+        permisos = session.get('permisos')
+        if not permisos or permisos.get('persona_id') != persona_id or permisos.get('versiones') != versiones:
+            persona = usuario_actual()
+            if persona and persona.activo:
+                permisos = _guardar_en_sesion(persona, versiones)
+            else:
+                session.clear()
+                permisos = None
+
+    g._permisos = permisos
+    return permisos
+
+
+def puede_ver(permisos, persona_id):
+    """Regla de Persona.puede_ver_persona aplicada a los permisos de la sesión"""
+    return (permisos['es_admin']
+            or persona_id == permisos['persona_id']
+            or persona_id in permisos['visibles'])
+
+
+# ============= VERSIONES =============
+
+def claves_permisos_modificadas(sesion_bd):
+    """
+    Claves de versiones_tablas a incrementar por los cambios del flush.
+
+    Corre en after_flush (ver registrar_versiones_tablas en app.py).
+    """
+    claves = set()
+    for persona in sesion_bd.deleted:
+        if isinstance(persona, Persona):
+            claves.update({clave_persona(persona.id), CLAVE_PERMISOS})
+
+    for persona in sesion_bd.new:
+        if isinstance(persona, Persona) and persona.reporte_a_id:
+            claves.add(CLAVE_PERMISOS)
+
+    for persona in sesion_bd.dirty:
+        if not isinstance(persona, Persona):
+            continue
+        atributos = inspect(persona).attrs
+        if any(atributos[nombre].history.has_changes() for nombre in ATRIBUTOS_PERMISOS):
+            claves.add(clave_persona(persona.id))
+        if atributos.reporte_a_id.history.has_changes() or atributos.supervisor.history.has_changes():
+            claves.add(CLAVE_PERMISOS)
+
+    return claves
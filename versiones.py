@@ -0,0 +1,82 @@
+"""
+Versiones de datos por tabla (tabla versiones_tablas)
+
+Cada escritura con el ORM incrementa la versión de las tablas que toca, en la
+misma transacción:
+    - flush de la sesión (altas, cambios y bajas de objetos): evento after_flush
+    - INSERT/UPDATE/DELETE masivos (query.delete(), update(Modelo), insert(Modelo)):
+      evento do_orm_execute
+
+Las versiones se comparten entre procesos a través de la base de datos, así que
+sirven para invalidar cachés de reportes en todos los workers de gunicorn
+(ver cache_resultados.py). Las cargas con SQL directo que no pasan por la sesión
+deben llamar a incrementar_versiones() al terminar.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import db, VersionTabla
+
+
+def tablas_modificadas(session):
+    """Nombres de las tablas con objetos nuevos, modificados o eliminados en la sesión"""
+    tablas = {type(obj).__table__.name for obj in session.new}
+    tablas.update(type(obj).__table__.name for obj in session.deleted)
+    tablas.update(
+        type(obj).__table__.name for obj in session.dirty
+        if session.is_modified(obj, include_collections=False)
+    )
+    tablas.discard(VersionTabla.__tablename__)
+    return tablas
+
+
+def insert_dialecto(conexion):
+    """insert() con soporte de ON CONFLICT del motor (PostgreSQL o SQLite)"""
+    if conexion.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def incrementar_versiones(conexion, tablas):
+    """
+    Incrementa la versión de las tablas indicadas (una sola sentencia, upsert).
+
+    Args:
+        conexion: Conexión de la transacción en curso (session.connection())
+        tablas: Nombres de tablas
+    """
+    tablas = sorted(set(tablas) - {VersionTabla.__tablename__})
+    if not tablas:
+        return
+
+    ahora = datetime.now()
+    insert = insert_dialecto(conexion)
+    sentencia = insert(VersionTabla.__table__).values([
+        {'tabla': tabla, 'version': 1, 'actualizado': ahora} for tabla in tablas
+    ])
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=['tabla'],
+        set_={'version': VersionTabla.__table__.c.version + 1, 'actualizado': ahora}
+    )
+    conexion.execute(sentencia)
+
+
+def obtener_versiones(tablas):
+    """
+    Versión y fecha del último cambio de cada tabla (1 query).
+
+    Returns:
+        dict: {tabla: (version, actualizado)}; (0, None) si la tabla nunca cambió
+    """
+    filas = db.session.execute(
+        select(VersionTabla.tabla, VersionTabla.version, VersionTabla.actualizado)
+        .where(VersionTabla.tabla.in_(tablas))
+    ).all()
+
+    versiones = {tabla: (0, None) for tabla in tablas}
+    versiones.update({tabla: (version, actualizado) for tabla, version, actualizado in filas})
+    return versiones